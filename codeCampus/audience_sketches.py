@@ -0,0 +1,130 @@
+# audience_sketches.py - Số người tham dự khác nhau (ước lượng HyperLogLog) theo event, organizer, ngày
+
+from datetime import timedelta
+
+from indexes import DeferredIndex
+from hyperloglog import HyperLogLog, overlap
+
+class AudienceSketches(DeferredIndex):
+    """Sketch HyperLogLog người tham dự của từng event, từng organizer và từng ngày diễn ra
+
+    - Chỉ giữ thành viên nhóm (organizer/ngày -> event_id); sketch được dựng từ danh
+      sách người tham dự ở lần đầu được hỏi, sau đó cập nhật theo từng lượt đăng ký
+    - HyperLogLog không xóa được phần tử: hủy đăng ký/xóa event/đổi organizer hay ngày
+      chỉ bỏ sketch bị ảnh hưởng, lần hỏi sau dựng lại từ dữ liệu hiện tại
+    - Số người khác nhau trong một khoảng ngày = hợp các sketch ngày, không cần hợp tập
+      user_id của mọi lượt đăng ký
+    attendees_of(event_id) trả về danh sách người tham dự hiện tại của một event.
+    """
+    snapshot_fields = ('organizer_id', 'date')
+
+    def __init__(self, attendees_of):
+        super().__init__()
+        self._attendees_of = attendees_of
+        self._group_of = {}                  # event_id -> (organizer_id, ngày)
+        self._members = {'organizer': {}, 'day': {}}    # loại nhóm -> {khóa: {event_id: None}}
+        self._sketches = {'event': {}, 'organizer': {}, 'day': {}}
+
+    # ====================== QUERY ======================
+
+    def _sketch(self, kind, key):
+        self._load_deferred()
+        sketches = self._sketches[kind]
+        sketch = sketches.get(key)
+        if sketch is None:
+            if kind == 'event':
+                sketch = HyperLogLog(self._attendees_of(key))
+            else:
+                sketch = HyperLogLog()
+                for event_id in self._members[kind].get(key, ()):
+                    sketch.update(self._attendees_of(event_id))
+            sketches[key] = sketch
+        return sketch
+
+    def event_sketch(self, event_id):
+        return self._sketch('event', event_id)
+
+    def organizer_audience(self, organizer_id):
+        """Số người khác nhau từng đăng ký event của organizer (ước lượng)"""
+        return self._sketch('organizer', organizer_id).count()
+
+    def audience_between(self, start_date, end_date):
+        """Số người khác nhau đăng ký event diễn ra trong khoảng ngày (ước lượng)"""
+        self._load_deferred()
+        days = self._members['day']
+        sketch = HyperLogLog()
+        day = start_date
+        while day <= end_date:
+            if day in days:
+                sketch.merge(self._sketch('day', day))
+            day += timedelta(days=1)
+        return sketch.count()
+
+    def overlap(self, first_id, second_id):
+        """(số người chung, chỉ số Jaccard) ước lượng giữa hai event"""
+        return overlap(self.event_sketch(first_id), self.event_sketch(second_id))
+
+    # ====================== UPDATE ======================
+
+    def _join(self, event_id, organizer_id, day):
+        self._group_of[event_id] = (organizer_id, day)
+        for kind, key in (('organizer', organizer_id), ('day', day)):
+            self._members[kind].setdefault(key, {})[event_id] = None
+
+    def _leave(self, event_id):
+        for kind, key in zip(('organizer', 'day'), self._group_of.pop(event_id)):
+            members = self._members[kind][key]
+            del members[event_id]
+            if not members:
+                del self._members[kind][key]
+            self._sketches[kind].pop(key, None)
+
+    def _built(self, event_id):
+        """Các sketch đã dựng có chứa event"""
+        organizer_id, day = self._group_of[event_id]
+        for kind, key in (('event', event_id), ('organizer', organizer_id), ('day', day)):
+            sketch = self._sketches[kind].get(key)
+            if sketch is not None:
+                yield sketch
+
+    def load(self, rows):
+        for event_id, organizer_id, day in rows:
+            self._join(event_id, organizer_id, day)
+
+    # ====================== EVENT HOOKS ======================
+
+    def on_event_added(self, event):
+        self._load_deferred()
+        self._join(event.event_id, event.organizer_id, event.date)
+        # Nhóm đã có sketch: thêm người tham dự sẵn có của event (thường là rỗng)
+        if len(event.attendees):
+            for sketch in self._built(event.event_id):
+                sketch.update(event.attendees)
+
+    def on_event_removed(self, event):
+        self._load_deferred()
+        self._sketches['event'].pop(event.event_id, None)
+        self._leave(event.event_id)
+
+    def on_attendee_added(self, event, user_id, registered_at):
+        self._load_deferred()
+        for sketch in self._built(event.event_id):
+            sketch.add(user_id)
+
+    def on_attendee_removed(self, event, user_id, registered_at):
+        self._load_deferred()
+        organizer_id, day = self._group_of[event.event_id]
+        self._sketches['event'].pop(event.event_id, None)
+        self._sketches['organizer'].pop(organizer_id, None)
+        self._sketches['day'].pop(day, None)
+
+    def on_field_updated(self, event, field, old_value, new_value):
+        if field not in ('organizer_id', 'date'):
+            return
+        self._load_deferred()
+        self._leave(event.event_id)
+        self._join(event.event_id, event.organizer_id, event.date)
+        for kind, key in (('organizer', event.organizer_id), ('day', event.date)):
+            sketch = self._sketches[kind].get(key)
+            if sketch is not None:
+                sketch.update(event.attendees)
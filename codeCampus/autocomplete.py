@@ -0,0 +1,358 @@
+# autocomplete.py - Gợi ý theo tiền tố (tên event, địa điểm, tên/username người dùng)
+
+import heapq
+from collections import Counter
+
+from models import fold_text
+from indexes import DeferredIndex
+
+# Danh sách ngắn hơn thì menu liệt kê hết, dài hơn thì hỏi tiền tố rồi chỉ hiện gợi ý
+LIST_ALL_LIMIT = 10
+
+class _Node:
+    """Nút trie: nút trong có children (+ ends, top), nút lá chỉ có bucket"""
+    __slots__ = ('children', 'bucket', 'ends', 'top')
+
+    def __init__(self):
+        self.children = None   # ký tự -> _Node (nút trong) hoặc None (nút lá)
+        self.bucket = set()    # nút lá: các (chuỗi, mục) có tiền tố là đường đi tới nút
+        self.ends = None       # nút trong: các (chuỗi, mục) kết thúc đúng tại nút
+        self.top = None        # nút trong: TOP_K mục điểm cao nhất của cây con, None = cần tính lại
+
+class PrefixIndex:
+    """Burst trie trên chuỗi đã bỏ dấu: top-k mục theo điểm cho một tiền tố
+
+    - Lá gom tối đa BURST chuỗi; lá đầy mới tách thành nút trong theo ký tự kế tiếp,
+      nên số nút chỉ bằng số mục / BURST thay vì số ký tự
+    - Nút trong giữ sẵn TOP_K mục tốt nhất: tăng điểm chỉ cập nhật các nút trên
+      đường đi; giảm điểm/xóa mục đang ở top thì đánh dấu nút để tính lại khi cần
+      (từ top của các nút con, không phải từ toàn bộ cây con)
+    Một mục có thể có nhiều chuỗi (vd: họ tên và username).
+    """
+    BURST = 64
+    MAX_DEPTH = 32
+    TOP_K = 10
+
+    def __init__(self):
+        self._root = _Node()
+        self._texts = {}     # mục -> tuple chuỗi đã fold (giữ thứ tự thêm)
+        self._scores = {}    # mục -> điểm phổ biến
+        self._has_tops = False   # chưa nút nào tính top: đổi điểm không cần đi trên trie
+
+    def __len__(self):
+        return len(self._texts)
+
+    def __contains__(self, entry):
+        return entry in self._texts
+
+    def entries(self):
+        """Các mục theo thứ tự thêm"""
+        return iter(self._texts)
+
+    def score_of(self, entry):
+        return self._scores.get(entry, 0)
+
+    def _rank(self, entry):
+        """Điểm cao trước, bằng điểm thì theo chuỗi đầu tiên (a-z)"""
+        return -self._scores[entry], self._texts[entry][0]
+
+    # ====================== QUERY ======================
+
+    def complete(self, prefix, k=TOP_K):
+        """Tối đa k mục (k <= TOP_K) có chuỗi bắt đầu bằng prefix, điểm cao nhất trước"""
+        prefix = fold_text(prefix)
+        node, depth = self._root, 0
+        while node.children is not None and depth < len(prefix):
+            node = node.children.get(prefix[depth])
+            if node is None:
+                return []
+            depth += 1
+        if node.children is not None:
+            return self._top(node)[:k]
+        matches = {entry for text, entry in node.bucket if text.startswith(prefix)}
+        return heapq.nsmallest(k, matches, key=self._rank)
+
+    def _top(self, node):
+        if node.children is None:
+            return heapq.nsmallest(self.TOP_K, {entry for _, entry in node.bucket}, key=self._rank)
+        if node.top is None:
+            candidates = {entry for _, entry in node.ends}
+            for child in node.children.values():
+                candidates.update(self._top(child))
+            node.top = heapq.nsmallest(self.TOP_K, candidates, key=self._rank)
+            self._has_tops = True
+        return node.top
+
+    # ====================== UPDATE ======================
+
+    def add(self, entry, texts, score=0):
+        """Thêm mục với các chuỗi texts (chưa fold); mục đã có thì thay chuỗi và điểm"""
+        if entry in self._texts:
+            self.remove(entry)
+        folded = tuple(dict.fromkeys(fold_text(text) for text in texts))
+        self._texts[entry] = folded
+        self._scores[entry] = score
+        for text in folded:
+            self._insert(text, entry)
+
+    def remove(self, entry):
+        texts = self._texts.get(entry)
+        if texts is None:
+            return
+        for text in texts:
+            node = self._walk(text, lambda node: self._forget(node, entry))
+            if node.children is None:
+                node.bucket.discard((text, entry))
+            else:
+                node.ends.discard((text, entry))
+        del self._texts[entry]
+        del self._scores[entry]
+
+    def add_score(self, entry, delta):
+        """Cộng delta vào điểm của mục (bỏ qua nếu mục không có)"""
+        if entry not in self._scores or not delta:
+            return
+        self._scores[entry] += delta
+        if not self._has_tops:
+            return
+        update = self._offer if delta > 0 else self._demote
+        for text in self._texts[entry]:
+            self._walk(text, lambda node: update(node, entry))
+
+    def _walk(self, text, visit):
+        """Gọi visit cho từng nút trong trên đường đi của text, trả về nút chứa text"""
+        node, depth = self._root, 0
+        while node.children is not None:
+            visit(node)
+            if depth == len(text):
+                break
+            node = node.children[text[depth]]
+            depth += 1
+        return node
+
+    def _insert(self, text, entry):
+        node, depth = self._root, 0
+        has_tops = self._has_tops
+        while node.children is not None:
+            if has_tops:
+                self._offer(node, entry)
+            if depth == len(text):
+                node.ends.add((text, entry))
+                return
+            child = node.children.get(text[depth])
+            if child is None:
+                child = node.children[text[depth]] = _Node()
+            node, depth = child, depth + 1
+        node.bucket.add((text, entry))
+        if len(node.bucket) > self.BURST and depth < self.MAX_DEPTH:
+            self._burst(node, depth)
+
+    def _burst(self, node, depth):
+        """Tách nút lá thành nút trong theo ký tự thứ depth"""
+        items, node.bucket = node.bucket, None
+        node.children, node.ends, node.top = {}, set(), None
+        for text, entry in items:
+            if len(text) == depth:
+                node.ends.add((text, entry))
+                continue
+            child = node.children.get(text[depth])
+            if child is None:
+                child = node.children[text[depth]] = _Node()
+            child.bucket.add((text, entry))
+        for child in node.children.values():
+            if len(child.bucket) > self.BURST and depth + 1 < self.MAX_DEPTH:
+                self._burst(child, depth + 1)
+
+    def _offer(self, node, entry):
+        """Điểm của entry vừa tăng (hoặc entry mới): cập nhật top của nút nếu đang có"""
+        top = node.top
+        if top is None:
+            return
+        if entry not in top:
+            if len(top) >= self.TOP_K and self._rank(entry) >= self._rank(top[-1]):
+                return
+            top.append(entry)
+        top.sort(key=self._rank)
+        del top[self.TOP_K:]
+
+    def _demote(self, node, entry):
+        """Điểm của entry vừa giảm: mục ngoài top có thể vượt lên nên tính lại nếu top đầy"""
+        top = node.top
+        if top is not None and entry in top:
+            if len(top) >= self.TOP_K:
+                node.top = None
+            else:
+                top.sort(key=self._rank)
+
+    def _forget(self, node, entry):
+        top = node.top
+        if top is not None and entry in top:
+            node.top = None
+
+def word_starts(text):
+    """Các đoạn bắt đầu từ mỗi từ: 'Nguyễn Văn An' -> 'Nguyễn Văn An', 'Văn An', 'An'"""
+    words = text.split()
+    return [' '.join(words[i:]) for i in range(len(words))] or [text]
+
+class AutocompleteIndex(DeferredIndex):
+    """Gợi ý theo tiền tố, xếp theo độ phổ biến và cập nhật qua EventBus
+
+    - Tên event: điểm = số đăng ký
+    - Địa điểm (khớp từ bất kỳ trong tên địa điểm): điểm = tổng đăng ký các event tại đó
+    - Người dùng theo vai trò (khớp từ trong họ tên hoặc username): organizer theo tổng
+      đăng ký các event của họ, student/visitor theo số event đã đăng ký
+    Khi load từ CSV/SQLite index được dựng dần qua các hook; với snapshot thì được
+    nạp trễ từ bản ghi snapshot ở lần gợi ý (hoặc thay đổi) đầu tiên.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.event_names = PrefixIndex()
+        self.locations = PrefixIndex()
+        self.users = {}                 # vai trò -> PrefixIndex user_id
+        self._role_of = {}              # user_id -> vai trò
+        self._event_info = {}           # event_id -> [địa điểm, organizer_id]
+        self._location_events = Counter()   # địa điểm -> số event
+
+    # ====================== QUERY ======================
+
+    def complete_event_names(self, prefix, k=PrefixIndex.TOP_K):
+        """event_id của các event có tên bắt đầu bằng prefix, nhiều đăng ký nhất trước"""
+        self._load_deferred()
+        return self.event_names.complete(prefix, k)
+
+    def complete_locations(self, prefix="", k=PrefixIndex.TOP_K):
+        """Các địa điểm có từ bắt đầu bằng prefix, nhiều đăng ký nhất trước"""
+        self._load_deferred()
+        return self.locations.complete(prefix, k)
+
+    def location_count(self):
+        self._load_deferred()
+        return len(self.locations)
+
+    def complete_users(self, role, prefix="", k=PrefixIndex.TOP_K):
+        """user_id vai trò role có họ tên/username khớp prefix, phổ biến nhất trước"""
+        self._load_deferred()
+        index = self.users.get(role)
+        return index.complete(prefix, k) if index is not None else []
+
+    def user_count(self, role):
+        self._load_deferred()
+        index = self.users.get(role)
+        return len(index) if index is not None else 0
+
+    def users_of(self, role):
+        """user_id vai trò role theo thứ tự thêm"""
+        self._load_deferred()
+        index = self.users.get(role)
+        return list(index.entries()) if index is not None else []
+
+    # ====================== UPDATE ======================
+
+    def _user_index(self, role):
+        index = self.users.get(role)
+        if index is None:
+            index = self.users[role] = PrefixIndex()
+        return index
+
+    def _add_user(self, user_id, role, full_name, username, score=0):
+        self._role_of[user_id] = role
+        self._user_index(role).add(user_id, word_starts(full_name) + [username], score)
+
+    def _add_user_score(self, user_id, delta):
+        role = self._role_of.get(user_id)
+        if role is not None:
+            self.users[role].add_score(user_id, delta)
+
+    def _add_location(self, location, registered):
+        if self._location_events[location] == 0:
+            self.locations.add(location, word_starts(location), registered)
+        else:
+            self.locations.add_score(location, registered)
+        self._location_events[location] += 1
+
+    def _remove_location(self, location, registered):
+        self._location_events[location] -= 1
+        if self._location_events[location] <= 0:
+            del self._location_events[location]
+            self.locations.remove(location)
+        else:
+            self.locations.add_score(location, -registered)
+
+    def load_registrations(self, pairs):
+        """Cộng điểm user từ các cặp (event_id, user_id) của event có danh sách tải lười"""
+        for _, user_id in pairs:
+            self._add_user_score(user_id, 1)
+
+    def load(self, rows):
+        """Nạp hàng loạt: (các bộ (event_id, tên, địa điểm, organizer_id, số đăng ký),
+        các bộ (user_id, vai trò, họ tên, username, số event đã đăng ký))"""
+        event_rows, user_rows = rows
+        location_totals = Counter()
+        organizer_totals = Counter()
+        for event_id, name, location, organizer_id, registered in event_rows:
+            self._event_info[event_id] = [location, organizer_id]
+            self.event_names.add(event_id, (name,), registered)
+            self._location_events[location] += 1
+            location_totals[location] += registered
+            organizer_totals[organizer_id] += registered
+        for location, total in location_totals.items():
+            self.locations.add(location, word_starts(location), total)
+        for user_id, role, full_name, username, registrations in user_rows:
+            score = organizer_totals[user_id] if role == "EventOrganizer" else registrations
+            self._add_user(user_id, role, full_name, username, score)
+
+    # ====================== EVENT HOOKS ======================
+
+    def on_user_added(self, user):
+        self._load_deferred()
+        self._add_user(user.user_id, user.role, user.full_name, user.username)
+
+    def on_event_added(self, event):
+        self._load_deferred()
+        registered = len(event.attendees)
+        self._event_info[event.event_id] = [event.location, event.organizer_id]
+        self.event_names.add(event.event_id, (event.name,), registered)
+        self._add_location(event.location, registered)
+        self._add_user_score(event.organizer_id, registered)
+        # Danh sách chưa tải (SQLite): điểm user được cộng qua load_registrations
+        if event.attendees.is_loaded:
+            for user_id in event.attendees:
+                self._add_user_score(user_id, 1)
+
+    def on_event_removed(self, event):
+        self._load_deferred()
+        registered = len(event.attendees)
+        location, organizer_id = self._event_info.pop(event.event_id)
+        self.event_names.remove(event.event_id)
+        self._remove_location(location, registered)
+        self._add_user_score(organizer_id, -registered)
+        for user_id in event.attendees:
+            self._add_user_score(user_id, -1)
+
+    def _attendee_changed(self, event, user_id, delta):
+        self._load_deferred()
+        location, organizer_id = self._event_info[event.event_id]
+        self.event_names.add_score(event.event_id, delta)
+        self.locations.add_score(location, delta)
+        self._add_user_score(organizer_id, delta)
+        self._add_user_score(user_id, delta)
+
+    def on_attendee_added(self, event, user_id, registered_at):
+        self._attendee_changed(event, user_id, 1)
+
+    def on_attendee_removed(self, event, user_id, registered_at):
+        self._attendee_changed(event, user_id, -1)
+
+    def on_field_updated(self, event, field, old_value, new_value):
+        if field == 'name':
+            self._load_deferred()
+            self.event_names.add(event.event_id, (new_value,), self.event_names.score_of(event.event_id))
+        elif field == 'location':
+            self._load_deferred()
+            # Gỡ đúng địa điểm và số đăng ký index đã cộng cho event, không dựa vào old_value
+            info = self._event_info[event.event_id]
+            registered = self.event_names.score_of(event.event_id)
+            self._remove_location(info[0], registered)
+            self._add_location(new_value, registered)
+            info[0] = new_value
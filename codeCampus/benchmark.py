@@ -0,0 +1,529 @@
+# benchmark.py - Sinh dữ liệu lớn và đo hiệu năng / bộ nhớ của hệ thống
+#
+# Chạy: python benchmark.py <lệnh> [số_event]
+#   memory - so sánh bộ nhớ model cũ/mới
+#   load   - đo thời gian SimpleCampusEventSystem.load_data từ CSV
+#   wal    - tốc độ đăng ký khi ghi WAL: fsync từng lượt vs group commit
+#   snapshot - thời gian khởi động: CSV so với snapshot nhị phân mmap
+#   fuzzy  - độ trễ tìm kiếm gần đúng (gõ sai) theo kích thước catalog
+#   fulltext - BM25: dựng index (tách từ) so với nạp segment đã lưu, độ trễ truy vấn
+#   batch  - thông lượng lớp truy vấn (event_queries) với file truy vấn sinh ngẫu nhiên
+#   columnar - thống kê vector hóa (NumPy) so với vòng lặp Python ở 10k/100k/1M events
+
+import os
+import sys
+import csv
+import random
+import tempfile
+import tracemalloc
+from time import perf_counter
+from datetime import date, time, timedelta
+
+from models import Admin, EventOrganizer, Student, Visitor, Event, registration_stamp
+from file_manager import EVENT_COLUMNS, USER_COLUMNS
+
+LOCATIONS = [
+    "Hội trường A - Tòa nhà Khoa học",
+    "Phòng Lab 201 - Tòa nhà Công nghệ",
+    "Sân vận động trường",
+    "Phòng hội thảo B - Tòa nhà Hành chính",
+    "Thư viện trung tâm",
+    "Nhà thi đấu đa năng",
+]
+
+EVENT_TOPICS = ["Hội thảo", "Workshop", "Seminar", "Ngày hội", "Talkshow", "Cuộc thi"]
+EVENT_SUBJECTS = ["Công nghệ AI", "Lập trình Python", "Khởi nghiệp", "Phát triển Nghề nghiệp",
+                  "Dữ liệu lớn", "Thiết kế UX", "Kỹ năng mềm", "An toàn thông tin"]
+
+# ====================== DATA GENERATION ======================
+
+def generate_users(n_users, n_organizers=None, seed=42):
+    """Sinh users: 1 admin, ~1% organizer, còn lại chia Student/Visitor"""
+    rng = random.Random(seed)
+    n_organizers = n_organizers or max(1, n_users // 100)
+    users = {}
+
+    admin = Admin("u0000000", "admin", "Quản trị viên Hệ thống", "admin@campus.edu.vn")
+    users[admin.user_id] = admin
+
+    for i in range(1, n_users):
+        user_id = f"u{i:07d}"
+        if i <= n_organizers:
+            cls, prefix = EventOrganizer, "organizer"
+        elif rng.random() < 0.8:
+            cls, prefix = Student, "student"
+        else:
+            cls, prefix = Visitor, "visitor"
+        users[user_id] = cls(user_id, f"{prefix}{i}", f"Người dùng {i}", f"{prefix}{i}@campus.edu.vn")
+
+    return users
+
+def generate_event_rows(n_events, organizer_ids, seed=42):
+    """Sinh tuple dữ liệu event (chưa tạo object)"""
+    rng = random.Random(seed)
+    start = date.today() + timedelta(days=1)
+    for i in range(n_events):
+        topic = rng.choice(EVENT_TOPICS)
+        subject = rng.choice(EVENT_SUBJECTS)
+        yield (
+            f"e{i:07d}",
+            f"{topic} {subject} #{i}",
+            f"{topic} về {subject} dành cho sinh viên toàn trường",
+            start + timedelta(days=rng.randrange(365)),
+            time(rng.randrange(7, 20), rng.choice((0, 30))),
+            rng.choice(LOCATIONS),
+            rng.choice((30, 50, 100, 200, 500)),
+            rng.choice(organizer_ids),
+        )
+
+def generate_dataset(n_events, n_users=None, registrations_per_event=10, seed=42, event_cls=Event):
+    """Sinh bộ dữ liệu users/events/đăng ký để benchmark"""
+    users = generate_users(n_users or max(100, n_events * 2), seed=seed)
+    events = generate_events(users, n_events, registrations_per_event, seed, event_cls)
+    return users, events
+
+def generate_events(users, n_events, registrations_per_event=10, seed=42, event_cls=Event):
+    """Sinh events và đăng ký ngẫu nhiên cho tập users có sẵn"""
+    rng = random.Random(seed)
+    organizer_ids = [u.user_id for u in users.values() if u.role == "EventOrganizer"]
+    attendee_ids = [u.user_id for u in users.values() if u.role in ("Student", "Visitor")]
+
+    events = {}
+    for row in generate_event_rows(n_events, organizer_ids, seed):
+        event = event_cls(*row)
+        count = min(event.max_capacity, rng.randrange(registrations_per_event * 2 + 1))
+        for user_id in rng.sample(attendee_ids, min(count, len(attendee_ids))):
+            event.add_attendee(user_id)
+        events[event.event_id] = event
+
+    return events
+
+def write_csv_dataset(directory, n_events, registrations_per_event=10, seed=42):
+    """Ghi thẳng users.csv/events.csv (không tạo object) để benchmark load"""
+    rng = random.Random(seed)
+    users = generate_users(max(100, n_events * 2), seed=seed)
+    organizer_ids = [u.user_id for u in users.values() if u.role == "EventOrganizer"]
+    attendee_ids = [u.user_id for u in users.values() if u.role in ("Student", "Visitor")]
+
+    with open(os.path.join(directory, 'users.csv'), 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(USER_COLUMNS)
+        for u in users.values():
+            writer.writerow([u.user_id, u.username, u.full_name, u.email, u.role])
+
+    # Thời điểm đăng ký rải trong 30 ngày gần nhất
+    now = registration_stamp()
+    window = 30 * 86400
+
+    total_registrations = 0
+    with open(os.path.join(directory, 'events.csv'), 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(EVENT_COLUMNS)
+        for (event_id, name, description, event_date, event_time,
+             location, max_capacity, organizer_id) in generate_event_rows(n_events, organizer_ids, seed):
+            count = min(max_capacity, rng.randrange(registrations_per_event * 2 + 1))
+            attendees = rng.sample(attendee_ids, count)
+            stamps = sorted(now - rng.randrange(window) for _ in attendees)
+            total_registrations += count
+            writer.writerow([event_id, name, description, str(event_date), str(event_time),
+                             location, max_capacity, organizer_id, ';'.join(attendees),
+                             ';'.join(map(str, stamps))])
+
+    return len(users), total_registrations
+
+def _timed(label, func, *args):
+    """Chạy func và in thời gian"""
+    start = perf_counter()
+    result = func(*args)
+    elapsed = perf_counter() - start
+    print(f"   {label:<40} {elapsed:>8.2f}s")
+    return result, elapsed
+
+# ====================== LOAD BENCHMARK ======================
+
+def load_benchmark(n_events=100000, registrations_per_event=10):
+    """Đo thời gian khởi động hệ thống từ events.csv/users.csv"""
+    from main import SimpleCampusEventSystem
+
+    print(f"\nBENCHMARK LOAD DỮ LIỆU ({n_events} events, ~{registrations_per_event} đăng ký/event)")
+    print("="*60)
+
+    previous_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        (n_users, n_registrations), _ = _timed("Sinh file CSV", write_csv_dataset,
+                                              directory, n_events, registrations_per_event)
+        os.chdir(directory)
+        try:
+            system, elapsed = _timed("SimpleCampusEventSystem() + load_data", SimpleCampusEventSystem)
+        finally:
+            os.chdir(previous_dir)
+
+    print(f"   {n_users} users, {len(system.events)} events, {n_registrations} đăng ký")
+    print(f"   Tốc độ: {n_registrations / elapsed:,.0f} đăng ký/s")
+    return elapsed
+
+# ====================== WAL BENCHMARK ======================
+
+def wal_benchmark(n_registrations=2000):
+    """So sánh tốc độ add_attendee có WAL: fsync mỗi lượt và group commit"""
+    from models import EventBus
+    from wal import WriteAheadLog
+
+    print(f"\nBENCHMARK WAL ({n_registrations} lượt đăng ký)")
+    print("="*60)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for label, sync_interval in (("fsync mỗi lượt", 0), ("group commit (50ms)", 0.05)):
+            bus = EventBus()
+            wal = bus.subscribe(WriteAheadLog(os.path.join(directory, f"bench_{sync_interval}.wal"),
+                                              sync_interval=sync_interval))
+            wal.open()
+            event = Event.from_record("e0000000", "Sự kiện benchmark", "", date.today(), time(9, 0),
+                                      "Hội trường A", n_registrations, "u0000001")
+            event.bus = bus
+
+            start = perf_counter()
+            for i in range(n_registrations):
+                event.add_attendee(f"u{i:07d}")
+            wal.close()
+            elapsed = perf_counter() - start
+
+            print(f"   {label:<25} {elapsed:>7.2f}s  {n_registrations / elapsed:>10,.0f} lượt/s  "
+                  f"({wal.sync_count} lần fsync)")
+
+# ====================== SNAPSHOT BENCHMARK ======================
+
+def snapshot_benchmark(n_events=100000, registrations_per_event=10):
+    """So sánh thời gian khởi động từ CSV và từ snapshot nhị phân"""
+    from main import SimpleCampusEventSystem
+    from file_manager import FileManager
+
+    print(f"\nBENCHMARK SNAPSHOT ({n_events} events, ~{registrations_per_event} đăng ký/event)")
+    print("="*60)
+
+    previous_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        _timed("Sinh file CSV", write_csv_dataset, directory, n_events, registrations_per_event)
+        os.chdir(directory)
+        try:
+            system, csv_elapsed = _timed("Khởi động từ CSV", SimpleCampusEventSystem)
+            del system
+            _timed("Ghi snapshot", FileManager().write_snapshot)
+            system, snapshot_elapsed = _timed("Khởi động từ snapshot", SimpleCampusEventSystem)
+
+            # Chi phí được dời sang lần truy cập đầu tiên
+            event_id = f"e{n_events // 2:07d}"
+            _timed("Tra cứu 1 event + danh sách tham dự", lambda: list(system.events[event_id].attendees))
+            _timed("Nạp index đăng ký (lần đầu dùng)", system.registration_index.count_of, "u0000001")
+            _timed("Tạo toàn bộ Event (duyệt lần đầu)", lambda: sum(1 for _ in system.events.values()))
+            snapshot_size = os.path.getsize(FileManager().snapshot_file)
+            csv_size = os.path.getsize('events.csv') + os.path.getsize('users.csv')
+        finally:
+            os.chdir(previous_dir)
+
+    print(f"   Kích thước: CSV {csv_size / 2**20:.1f} MB, snapshot {snapshot_size / 2**20:.1f} MB")
+    print(f"   Khởi động nhanh hơn {csv_elapsed / snapshot_elapsed:,.0f} lần")
+    return csv_elapsed, snapshot_elapsed
+
+# ====================== FUZZY SEARCH BENCHMARK ======================
+
+FUZZY_QUERIES = ["hoi thoa", "wrokshop pythn", "seminr ky nang mem", "cong nghe ai",
+                 "talksow khoi ngiep", "du lieu lon", "thiet ke ux", "cuoc thi an toan thong tn"]
+
+def fuzzy_benchmark(max_events=1000000):
+    """Độ trễ tìm gần đúng (sửa lỗi gõ + tìm chính xác) khi catalog tăng dần"""
+    from indexes import SubstringIndex, FuzzyIndex
+
+    print(f"\nBENCHMARK TÌM KIẾM GẦN ĐÚNG (tối đa {max_events} events, {len(FUZZY_QUERIES)} truy vấn)")
+    print("="*60)
+    print(f"   {'Số event':>10} {'Dựng index':>12} {'Từ vựng':>8} {'TB/truy vấn':>12} {'Chậm nhất':>10}")
+
+    sizes = [size for size in (1000, 10000, 100000, 1000000) if size < max_events] + [max_events]
+    for n_events in sizes:
+        rows = [(row[0], row[1]) for row in generate_event_rows(n_events, ["u0000001"])]
+        start = perf_counter()
+        names, vocabulary = SubstringIndex('name'), FuzzyIndex('name')
+        names.load(rows)
+        vocabulary.load(rows)
+        build_elapsed = perf_counter() - start
+        del rows
+
+        latencies = []
+        for query in FUZZY_QUERIES:
+            start = perf_counter()
+            found, _ = vocabulary.lookup(query, names.search_words)
+            latencies.append(perf_counter() - start)
+            assert found, query
+
+        print(f"   {n_events:>10,} {build_elapsed:>11.2f}s {len(vocabulary):>8} "
+              f"{sum(latencies) / len(latencies) * 1000:>10.2f}ms {max(latencies) * 1000:>8.2f}ms")
+
+# ====================== FULL-TEXT BENCHMARK ======================
+
+FULLTEXT_QUERIES = ["python", "hội thảo công nghệ ai", "kỹ năng mềm sinh viên",
+                    "workshop thiết kế ux", "cuộc thi an toàn thông tin toàn trường"]
+
+def fulltext_benchmark(n_events=100000):
+    """Index BM25: tách từ toàn bộ so với nạp segment, và độ trễ top-10"""
+    from fulltext import TextIndex
+
+    print(f"\nBENCHMARK TÌM TOÀN VĂN BM25 ({n_events} events)")
+    print("="*60)
+
+    rows = [(row[0], row[1], row[2]) for row in generate_event_rows(n_events, ["u0000001"])]
+    index = TextIndex()
+    _timed("Tách từ + dựng index", index.load, rows)
+    del rows
+    stamps = ((0, 0, 0), (0, 0, 0))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "campus.fts")
+        _timed("Ghi segment", index.save, path, stamps)
+        size = os.path.getsize(path)
+
+        loaded = TextIndex()
+        loaded.defer_segment(path, stamps, {}, lambda: [])
+        _timed("Nạp segment", loaded._load_deferred)
+
+    for query in FULLTEXT_QUERIES:
+        start = perf_counter()
+        results = loaded.search(query, 10)
+        elapsed = perf_counter() - start
+        print(f"   top-10 '{query}'".ljust(43) + f" {elapsed * 1000:>7.2f}ms  ({len(results)} kết quả)")
+    print(f"   Segment: {size / 2**20:.1f} MB, {len(loaded)} tài liệu")
+
+# ====================== BATCH QUERY BENCHMARK ======================
+
+def generate_query_lines(n_queries, seed=42):
+    """Sinh các dòng truy vấn theo định dạng file batch của event_queries"""
+    rng = random.Random(seed)
+    today = date.today()
+    statuses = ["full", "nearly_full", "spacious", "empty", "available"]
+    lines = []
+    for _ in range(n_queries):
+        kind = rng.choice(("name", "location", "date", "status", "text", "keyword", "advanced"))
+        subject = rng.choice(EVENT_SUBJECTS)
+        if kind == "name":
+            lines.append(f"name {rng.choice(EVENT_TOPICS)} {subject}")
+        elif kind == "location":
+            lines.append(f"location {rng.choice(LOCATIONS).split(' - ')[0]}")
+        elif kind == "date":
+            start = today + timedelta(days=rng.randrange(365))
+            lines.append(f"date {start} {start + timedelta(days=rng.choice((0, 6, 30)))}")
+        elif kind == "status":
+            lines.append(f"status {rng.choice(statuses)}")
+        elif kind == "text":
+            lines.append(f"text {subject} {rng.choice(EVENT_TOPICS)}")
+        elif kind == "keyword":
+            lines.append(f"keyword {subject.split()[-1]}")
+        else:
+            start = today + timedelta(days=rng.randrange(300))
+            lines.append(f"advanced name={subject};from={start};to={start + timedelta(days=60)};status=available")
+    return lines
+
+def batch_benchmark(n_events=100000, n_queries=5000, registrations_per_event=10):
+    """Chạy n_queries truy vấn sinh ngẫu nhiên qua chế độ batch (lần 1: cache lạnh, lần 2: cache nóng)"""
+    from main import SimpleCampusEventSystem
+    from event_queries import run_batch
+
+    print(f"\nBENCHMARK BATCH TRUY VẤN ({n_events} events, {n_queries} truy vấn)")
+    print("="*60)
+
+    previous_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        _timed("Sinh file CSV", write_csv_dataset, directory, n_events, registrations_per_event)
+        os.chdir(directory)
+        try:
+            system, _ = _timed("SimpleCampusEventSystem() + load_data", SimpleCampusEventSystem)
+            system.wal.close()
+        finally:
+            os.chdir(previous_dir)
+
+    lines = generate_query_lines(n_queries)
+    for label in ("cache lạnh", "cache nóng"):
+        print(f"\n-- Lượt chạy: {label}")
+        run_batch(system.queries, lines)
+
+# ====================== MEMORY REPORT ======================
+
+class _LegacyUser:
+    """Bản sao User cũ (dict-backed, role là chuỗi) để so sánh bộ nhớ"""
+    def __init__(self, user_id, username, full_name, email, role):
+        self.user_id = user_id
+        self.username = username
+        self.full_name = full_name
+        self.email = email
+        self.role = role
+
+class _LegacyEvent:
+    """Bản sao Event cũ (dict-backed, attendees là list) để so sánh bộ nhớ"""
+    def __init__(self, event_id, name, description, date, time, location, max_capacity, organizer_id):
+        self.event_id = event_id
+        self.name = name
+        self.description = description
+        self.date = date
+        self.time = time
+        # Chuỗi đọc từ input/CSV là object riêng, không được chia sẻ
+        self.location = "".join(location)
+        self.max_capacity = int(max_capacity)
+        self.organizer_id = "".join(organizer_id)
+        self.attendees = []
+
+    def add_attendee(self, user_id):
+        self.attendees.append(user_id)
+
+def _measure(build):
+    """Đo bộ nhớ (bytes) đã cấp phát bởi build()"""
+    tracemalloc.start()
+    snapshot_before = tracemalloc.take_snapshot()
+    data = build()
+    snapshot_after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in snapshot_after.compare_to(snapshot_before, 'filename'))
+    return data, total
+
+def memory_report(n_events=100000, registrations_per_event=10):
+    """So sánh bộ nhớ giữa model cũ (dict-backed) và model hiện tại (__slots__)"""
+    n_users = max(100, n_events * 2)
+
+    def build_legacy_users():
+        return {user_id: _LegacyUser(user_id, u.username, u.full_name, u.email, u.role)
+                for user_id, u in generate_users(n_users).items()}
+
+    def build_current_users():
+        return generate_users(n_users)
+
+    users = generate_users(n_users)
+
+    def build_legacy_events():
+        return generate_events(users, n_events, registrations_per_event, event_cls=_LegacyEvent)
+
+    def build_current_events():
+        return generate_events(users, n_events, registrations_per_event)
+
+    print(f"\nBÁO CÁO BỘ NHỚ ({n_users} users, {n_events} events, ~{registrations_per_event} đăng ký/event)")
+    print("="*70)
+    print(f"{'Bảng':<10} {'Model cũ (MB)':>15} {'Model mới (MB)':>15} {'Tiết kiệm':>12}")
+    print("-" * 70)
+
+    results = {}
+    for label, legacy, current in (("Users", build_legacy_users, build_current_users),
+                                   ("Events", build_legacy_events, build_current_events)):
+        _, legacy_bytes = _measure(legacy)
+        _, current_bytes = _measure(current)
+        saving = (1 - current_bytes / legacy_bytes) * 100 if legacy_bytes > 0 else 0
+        results[label] = (legacy_bytes, current_bytes)
+        print(f"{label:<10} {legacy_bytes / 2**20:>15.1f} {current_bytes / 2**20:>15.1f} {saving:>11.1f}%")
+
+    # Kích thước riêng của object (không tính các chuỗi/list được tham chiếu)
+    sample_user = next(iter(users.values()))
+    legacy_user = _LegacyUser(sample_user.user_id, sample_user.username, sample_user.full_name,
+                              sample_user.email, sample_user.role)
+    print(f"\nKích thước object User: cũ {_shallow_size(legacy_user)} bytes, mới {_shallow_size(sample_user)} bytes")
+
+    return results
+
+def _shallow_size(obj):
+    """sys.getsizeof của object cộng __dict__ (nếu có)"""
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+# ====================== COLUMNAR BENCHMARK ======================
+
+def _loop_group_by(events, key):
+    """Group-by bằng vòng lặp như StatisticsManager khi không có NumPy"""
+    totals = {}
+    for event in events:
+        stats = totals.setdefault(getattr(event, key), [0, 0, 0])
+        stats[0] += 1
+        stats[1] += len(event.attendees)
+        stats[2] += event.max_capacity
+    return sorted(((value, *stats) for value, stats in totals.items()), key=lambda x: x[2], reverse=True)
+
+def _loop_percentiles(events, percents=(25, 50, 75, 90)):
+    """Phân vị tỷ lệ lấp đầy bằng sắp xếp (nội suy tuyến tính như numpy.percentile)"""
+    rates = sorted(len(e.attendees) / e.max_capacity * 100 if e.max_capacity > 0 else 0.0 for e in events)
+    result = {}
+    for percent in percents:
+        position = (len(rates) - 1) * percent / 100
+        low = int(position)
+        high = min(low + 1, len(rates) - 1)
+        result[percent] = rates[low] + (rates[high] - rates[low]) * (position - low)
+    return result
+
+def columnar_benchmark(max_events=1000000, registrations_per_event=3):
+    """Các thống kê của StatisticsManager: vòng lặp trên Event so với mảng cột NumPy"""
+    import columnar
+    from reports import StatisticsReport
+
+    if columnar.np is None:
+        print("Chưa cài NumPy - không có engine dạng cột để so sánh")
+        return
+
+    print(f"\nBENCHMARK THỐNG KÊ DẠNG CỘT (tối đa {max_events} events)")
+    print("="*60)
+
+    users = generate_users(5000)
+    sizes = [size for size in (10000, 100000, 1000000) if size < max_events] + [max_events]
+    for n_events in sizes:
+        events = generate_events(users, n_events, registrations_per_event)
+        values = events.values()
+        columns = columnar.EventColumns()
+        start = perf_counter()
+        columns.load((e.event_id, e.max_capacity, len(e.attendees), e.date, e.organizer_id, e.location)
+                     for e in values)
+        build_elapsed = perf_counter() - start
+
+        print(f"\n   {n_events:,} events (dựng cột {build_elapsed:.2f}s)")
+        print(f"   {'Thống kê':<28} {'Vòng lặp':>10} {'NumPy':>10} {'Nhanh hơn':>10}")
+        cases = [
+            ("Tổng + phổ biến nhất/ít nhất", lambda: StatisticsReport(values),
+             lambda: (columns.totals(), columns.most_and_least_popular())),
+            ("Group-by organizer", lambda: _loop_group_by(values, 'organizer_id'), columns.by_organizer),
+            ("Group-by địa điểm", lambda: _loop_group_by(values, 'location'), columns.by_location),
+            ("Phân vị tỷ lệ lấp đầy", lambda: _loop_percentiles(values), columns.fill_percentiles),
+        ]
+        for label, loop, vectorized in cases:
+            timings = []
+            for func in (loop, vectorized):
+                runs = []
+                for _ in range(3):   # lấy lần nhanh nhất: bỏ chi phí khởi động lần gọi đầu
+                    start = perf_counter()
+                    func()
+                    runs.append(perf_counter() - start)
+                timings.append(min(runs))
+            loop_elapsed, vector_elapsed = timings
+            print(f"   {label:<28} {loop_elapsed * 1000:>8.1f}ms {vector_elapsed * 1000:>8.2f}ms "
+                  f"{loop_elapsed / vector_elapsed:>9.1f}x")
+        del events, values, columns
+
+# ====================== CLI ======================
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else "memory"
+    size = int(argv[2]) if len(argv) > 2 else 100000
+
+    if command == "memory":
+        memory_report(size)
+    elif command == "load":
+        load_benchmark(size)
+    elif command == "wal":
+        wal_benchmark(size)
+    elif command == "snapshot":
+        snapshot_benchmark(size)
+    elif command == "fuzzy":
+        fuzzy_benchmark(size)
+    elif command == "fulltext":
+        fulltext_benchmark(size)
+    elif command == "batch":
+        batch_benchmark(size)
+    elif command == "columnar":
+        columnar_benchmark(size if len(argv) > 2 else 1000000)
+    else:
+        print(f"Lệnh không hợp lệ: {command}")
+        print("Các lệnh: memory, load, wal, snapshot, fuzzy, fulltext, batch, columnar")
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,211 @@
+# columnar.py - Bản sao dạng cột của events (mảng NumPy) cho thống kê vector hóa
+
+try:
+    import numpy as np
+except ImportError:   # NumPy không bắt buộc: StatisticsManager quay về vòng lặp Python
+    np = None
+
+from indexes import DeferredIndex
+
+class _Codes:
+    """Mã số nguyên cho giá trị chuỗi (organizer_id, địa điểm) theo thứ tự xuất hiện"""
+
+    def __init__(self):
+        self.values = []
+        self._code_of = {}
+
+    def code(self, value):
+        code = self._code_of.get(value)
+        if code is None:
+            code = self._code_of[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+class EventColumns(DeferredIndex):
+    """Mỗi event một slot trong các mảng cột: sức chứa, số đăng ký, ngày (ordinal),
+    mã organizer, mã địa điểm
+
+    - Slot theo thứ tự thêm (giống thứ tự dict events) nên argmax/argmin giữ event
+      đầu tiên khi bằng nhau như max()/min()
+    - Xóa event chỉ đánh dấu slot; khi slot chết quá nửa thì nén lại mảng
+    - Các thống kê (group-by, phân vị, phân bố tỷ lệ lấp đầy) là phép toán trên mảng
+    """
+    snapshot_fields = ('max_capacity', 'attendee_count', 'date', 'organizer_id', 'location')
+    GROW = 1024
+
+    def __init__(self):
+        super().__init__()
+        self._size = 0          # số slot đã dùng (kể cả slot đã xóa)
+        self._dead = 0
+        self._ids = []          # slot -> event_id (None nếu đã xóa)
+        self._slot_of = {}
+        self._organizers = _Codes()
+        self._locations = _Codes()
+        self._allocate(0)
+
+    def _allocate(self, capacity):
+        self.capacity = np.zeros(capacity, np.int64)
+        self.registered = np.zeros(capacity, np.int64)
+        self.date = np.zeros(capacity, np.int32)
+        self.organizer = np.zeros(capacity, np.int32)
+        self.location = np.zeros(capacity, np.int32)
+        self.alive = np.zeros(capacity, bool)
+
+    _COLUMNS = ('capacity', 'registered', 'date', 'organizer', 'location', 'alive')
+
+    def __len__(self):
+        self._load_deferred()
+        return self._size - self._dead
+
+    # ====================== QUERY ======================
+
+    def _columns(self, *names):
+        """Các cột chỉ gồm event còn tồn tại (view không sao chép khi chưa có event bị xóa)"""
+        self._load_deferred()
+        if self._dead == 0:
+            return [getattr(self, name)[:self._size] for name in names]
+        alive = self.alive[:self._size]
+        return [getattr(self, name)[:self._size][alive] for name in names]
+
+    def _event_id_at(self, position):
+        """event_id của event thứ position trong các cột của _columns()"""
+        if self._dead == 0:
+            return self._ids[position]
+        return self._ids[int(np.flatnonzero(self.alive[:self._size])[position])]
+
+    def totals(self):
+        """(số event, tổng đăng ký, tổng sức chứa)"""
+        registered, capacity = self._columns('registered', 'capacity')
+        return len(registered), int(registered.sum()), int(capacity.sum())
+
+    def most_and_least_popular(self):
+        """(event_id nhiều đăng ký nhất, event_id ít nhất), event đầu tiên khi bằng nhau"""
+        registered, = self._columns('registered')
+        if len(registered) == 0:
+            return None, None
+        return (self._event_id_at(int(registered.argmax())),
+                self._event_id_at(int(registered.argmin())))
+
+    def fill_rates(self):
+        """Tỷ lệ lấp đầy (%) từng event, 0 nếu sức chứa không hợp lệ"""
+        registered, capacity = self._columns('registered', 'capacity')
+        rates = np.zeros(len(registered))
+        valid = capacity > 0
+        rates[valid] = registered[valid] / capacity[valid] * 100
+        return rates
+
+    def fill_percentiles(self, percents=(25, 50, 75, 90)):
+        """Phân vị tỷ lệ lấp đầy: {phần trăm: giá trị}"""
+        rates = self.fill_rates()
+        if len(rates) == 0:
+            return {}
+        return dict(zip(percents, np.percentile(rates, percents).tolist()))
+
+    def _group_by(self, column, codes):
+        """[(khóa, số event, tổng đăng ký, tổng sức chứa)] - nhiều đăng ký nhất trước,
+        bằng nhau thì theo thứ tự khóa xuất hiện"""
+        keys, registered, capacity = self._columns(column, 'registered', 'capacity')
+        size = len(codes.values)
+        events = np.bincount(keys, minlength=size)
+        attendees = np.bincount(keys, weights=registered, minlength=size).astype(np.int64)
+        capacities = np.bincount(keys, weights=capacity, minlength=size).astype(np.int64)
+        order = np.argsort(-attendees, kind='stable')
+        return [(codes.values[code], int(events[code]), int(attendees[code]), int(capacities[code]))
+                for code in order.tolist() if events[code] > 0]
+
+    def by_organizer(self):
+        return self._group_by('organizer', self._organizers)
+
+    def by_location(self):
+        return self._group_by('location', self._locations)
+
+    # ====================== UPDATE ======================
+
+    def _append(self, event_id, capacity, registered, date, organizer_id, location):
+        if self._size == len(self.alive):
+            self._grow(max(self.GROW, self._size * 2))
+        slot = self._size
+        self._size += 1
+        self._ids.append(event_id)
+        self._slot_of[event_id] = slot
+        self.capacity[slot] = capacity
+        self.registered[slot] = registered
+        self.date[slot] = date.toordinal()
+        self.organizer[slot] = self._organizers.code(organizer_id)
+        self.location[slot] = self._locations.code(location)
+        self.alive[slot] = True
+
+    def _grow(self, capacity):
+        old = {name: getattr(self, name)[:self._size] for name in self._COLUMNS}
+        self._allocate(capacity)
+        for name, values in old.items():
+            getattr(self, name)[:self._size] = values
+
+    def _compact(self):
+        """Bỏ các slot đã xóa, giữ nguyên thứ tự event còn lại"""
+        alive = self.alive[:self._size].copy()
+        kept = {name: getattr(self, name)[:self._size][alive] for name in self._COLUMNS}
+        self._ids = [event_id for event_id in self._ids if event_id is not None]
+        self._slot_of = {event_id: slot for slot, event_id in enumerate(self._ids)}
+        self._size, self._dead = len(self._ids), 0
+        self._allocate(max(self.GROW, self._size * 2))
+        for name, values in kept.items():
+            getattr(self, name)[:self._size] = values
+
+    def load(self, rows):
+        columns = list(zip(*rows))
+        if not columns:
+            return
+        event_ids, capacities, counts, dates, organizer_ids, locations = columns
+        self._ids = list(event_ids)
+        self._slot_of = {event_id: slot for slot, event_id in enumerate(self._ids)}
+        self._size, self._dead = len(self._ids), 0
+        self._allocate(max(self.GROW, self._size * 2))
+        size = self._size
+        self.capacity[:size] = capacities
+        self.registered[:size] = counts
+        self.date[:size] = [day.toordinal() for day in dates]
+        self.organizer[:size] = [self._organizers.code(value) for value in organizer_ids]
+        self.location[:size] = [self._locations.code(value) for value in locations]
+        self.alive[:size] = True
+
+    # ====================== EVENT HOOKS ======================
+
+    def on_event_added(self, event):
+        self._load_deferred()
+        self._append(event.event_id, event.max_capacity, len(event.attendees),
+                     event.date, event.organizer_id, event.location)
+
+    def on_event_removed(self, event):
+        self._load_deferred()
+        slot = self._slot_of.pop(event.event_id)
+        self._ids[slot] = None
+        self.alive[slot] = False
+        self._dead += 1
+        if self._dead >= self.GROW and self._dead * 2 > self._size:
+            self._compact()
+
+    def _registrations_changed(self, event):
+        self._load_deferred()
+        # Ghi số đăng ký hiện tại thay vì +/-1: cột luôn khớp event dù hook đến sau lần nạp
+        self.registered[self._slot_of[event.event_id]] = len(event.attendees)
+
+    def on_attendee_added(self, event, user_id, registered_at):
+        self._registrations_changed(event)
+
+    def on_attendee_removed(self, event, user_id, registered_at):
+        self._registrations_changed(event)
+
+    def on_field_updated(self, event, field, old_value, new_value):
+        if field not in ('max_capacity', 'date', 'organizer_id', 'location'):
+            return
+        self._load_deferred()
+        slot = self._slot_of[event.event_id]
+        if field == 'max_capacity':
+            self.capacity[slot] = new_value
+        elif field == 'date':
+            self.date[slot] = new_value.toordinal()
+        elif field == 'organizer_id':
+            self.organizer[slot] = self._organizers.code(new_value)
+        else:
+            self.location[slot] = self._locations.code(new_value)
@@ -48,7 +48,7 @@ class EventOperations:
                 organizer_id=self.system.current_user.user_id
             )
             
-            self.system.events[event_id] = event
+            self.system.add_event(event)
             print(f"Tạo sự kiện thành công: {name} (ID: {event_id})")
             
         except ValueError as e:
@@ -206,7 +206,7 @@ class EventOperations:
             
             # Xóa event khỏi dictionary
             event_name = event.name
-            del self.system.events[event_id]
+            self.system.remove_event(event_id)
             
             print(f"Đã xóa sự kiện '{event_name}' thành công!")
             
@@ -0,0 +1,290 @@
+# event_queries.py - Lớp truy vấn thuần: nhận tiêu chí, trả về kết quả (không input/print)
+#
+# SearchManager/ViewManager dựng menu và hiển thị trên lớp này; chế độ batch
+# (python main.py --batch queries.txt) chạy hàng loạt truy vấn từ file.
+#
+# Định dạng file batch - mỗi dòng một truy vấn, dòng trống/bắt đầu bằng # bị bỏ qua:
+#   name <từ khóa>                 location <từ khóa>
+#   date <YYYY-MM-DD> [YYYY-MM-DD]  organizer <user_id>
+#   status <full|nearly_full|spacious|empty|available>
+#   text <nội dung>                 keyword <từ khóa>
+#   advanced name=..;location=..;from=YYYY-MM-DD;to=YYYY-MM-DD;status=..;min=..;max=..
+
+import heapq
+from datetime import datetime
+from time import perf_counter
+
+from models import fold_text
+from indexes import FillStatusIndex
+from query_planner import QueryPlan
+from query_cache import ATTENDEES
+
+PAGE_SIZE = 20
+
+# Số kết quả tối đa của tìm kiếm gần đúng và tìm toàn văn
+FUZZY_RESULTS = 10
+FULLTEXT_RESULTS = 10
+
+class ResultSet:
+    """Kết quả truy vấn: các event_id theo thứ tự hiển thị, Event chỉ được lấy khi duyệt tới
+
+    Duyệt/phân trang lấy từng Event từ system.events (với snapshot là LazyTable thì
+    xem một trang chỉ tạo đúng các Event của trang đó).
+    - phrases: các cụm từ đã sửa lỗi gõ nếu là kết quả gần đúng, None nếu khớp chính xác
+    - scores: điểm liên quan song song với event_ids (tìm toàn văn)
+    """
+    __slots__ = ('events', 'event_ids', 'phrases', 'scores', '_members')
+
+    def __init__(self, events, event_ids, phrases=None, scores=None):
+        self.events = events
+        self.event_ids = event_ids
+        self.phrases = phrases
+        self.scores = scores
+        self._members = None
+
+    def __len__(self):
+        return len(self.event_ids)
+
+    def __iter__(self):
+        events = self.events
+        for event_id in self.event_ids:
+            yield events[event_id]
+
+    def __contains__(self, event_id):
+        if self._members is None:
+            self._members = frozenset(self.event_ids)
+        return event_id in self._members
+
+    @property
+    def is_fuzzy(self):
+        return self.phrases is not None
+
+    def page_count(self, size=PAGE_SIZE):
+        return -(-len(self.event_ids) // size)
+
+    def page(self, number, size=PAGE_SIZE):
+        """Các Event của trang number (đánh số từ 1)"""
+        events = self.events
+        start = (number - 1) * size
+        return [events[event_id] for event_id in self.event_ids[start:start + size]]
+
+    def pages(self, size=PAGE_SIZE):
+        """Lần lượt từng trang, trang sau chỉ được lấy khi cần"""
+        for number in range(1, self.page_count(size) + 1):
+            yield self.page(number, size)
+
+    def top(self, k, key, largest=False):
+        """k event đầu theo key, duyệt một lượt với heap k phần tử (không sắp toàn bộ)"""
+        select = heapq.nlargest if largest else heapq.nsmallest
+        return select(k, self, key=key)
+
+class EventQueries:
+    """Các truy vấn sự kiện trên index + cache kết quả; mọi kết quả là ResultSet"""
+
+    # Lựa chọn lọc tình trạng -> các nhóm của FillStatusIndex
+    FILL_STATUSES = {
+        'full': (FillStatusIndex.FULL,),
+        'nearly_full': (FillStatusIndex.NEARLY_FULL,),
+        'spacious': (FillStatusIndex.LOW, FillStatusIndex.EMPTY),
+        'empty': (FillStatusIndex.EMPTY,),
+        'available': FillStatusIndex.AVAILABLE,
+    }
+
+    def __init__(self, system):
+        self.system = system
+
+    def _result(self, event_ids, **extra):
+        return ResultSet(self.system.events, event_ids, **extra)
+
+    def _cached(self, key, depends_on, compute):
+        return self.system.query_cache.get(key, depends_on, lambda: tuple(compute()))
+
+    def _by_date(self, event_ids):
+        """Sắp tập event_id theo ngày (thứ tự của index ngày)"""
+        return sorted(event_ids, key=self.system.date_index.sort_key)
+
+    def _fuzzy(self, field, term, vocabulary, exact_search, limit):
+        """Tìm gần đúng qua FuzzyIndex của field, kết quả theo ngày"""
+        def lookup():
+            found_ids, phrases = vocabulary.lookup(term, exact_search, limit)
+            return tuple(self._by_date(found_ids)), tuple(phrases)
+
+        key = ('fuzzy', field, fold_text(term), limit)
+        found_ids, phrases = self.system.query_cache.get(key, (field, 'date'), lookup)
+        return self._result(found_ids, phrases=phrases)
+
+    # ====================== QUERIES ======================
+
+    def by_name(self, term, fuzzy=True, limit=FUZZY_RESULTS):
+        """Event có tên chứa term (không dấu); không có thì thử tên gần giống nếu fuzzy"""
+        system = self.system
+        found_ids = self._cached(('name', fold_text(term)), ('name', 'date'),
+                                 lambda: self._by_date(system.name_index.search(term)))
+        if found_ids or not fuzzy:
+            return self._result(found_ids)
+        return self._fuzzy('name', term, system.name_vocabulary,
+                           lambda words, limit: system.name_index.search_words(words, limit), limit)
+
+    def by_location(self, term, fuzzy=True, limit=FUZZY_RESULTS):
+        """Event có địa điểm chứa term (không dấu); không có thì thử địa điểm gần giống"""
+        system = self.system
+        found_ids = self._cached(('location', fold_text(term)), ('location', 'date'),
+                                 lambda: self._by_date(system.location_index.event_ids(term)))
+        if found_ids or not fuzzy:
+            return self._result(found_ids)
+        sort_key = system.date_index.sort_key
+        return self._fuzzy('location', term, system.location_vocabulary,
+                           lambda words, limit: heapq.nsmallest(
+                               limit, system.location_index.event_ids_with_words(words), key=sort_key),
+                           limit)
+
+    def between(self, start_date=None, end_date=None):
+        """Event trong khoảng ngày (None = không giới hạn), theo ngày"""
+        date_index = self.system.date_index
+        return self._result(self._cached(('date', start_date, end_date), ('date',),
+                                         lambda: date_index.between(start_date, end_date)))
+
+    def by_organizer(self, organizer_id):
+        """Event của organizer, theo ngày"""
+        return self._result(self._by_date(self.system.organizer_index.events_of(organizer_id)))
+
+    def by_fill_status(self, status):
+        """Event theo tình trạng đăng ký (khóa của FILL_STATUSES), theo ngày"""
+        fill_index = self.system.fill_status_index
+        return self._result(self._cached(
+            ('fill', status), (ATTENDEES, 'max_capacity', 'date'),
+            lambda: self._by_date(fill_index.event_ids(*self.FILL_STATUSES[status]))))
+
+    def advanced(self, criteria):
+        """Tìm nâng cao theo dict tiêu chí của QueryPlan, theo ngày"""
+        return self._result(self._cached(
+            QueryPlan.cache_key(criteria), QueryPlan.dependencies(criteria),
+            lambda: (event.event_id for event in QueryPlan(self.system, criteria).execute())))
+
+    def explain(self, criteria):
+        """Chạy lại kế hoạch (không qua cache) để có số dòng thực tế: (plan, ResultSet)"""
+        plan = QueryPlan(self.system, criteria)
+        return plan, self._result(tuple(event.event_id for event in plan.execute()))
+
+    def full_text(self, query, limit=FULLTEXT_RESULTS):
+        """Top limit event theo điểm BM25 trên tên + mô tả, liên quan nhất trước"""
+        text_index = self.system.text_index
+        key = ('text', tuple(sorted(set(text_index.tokens(query)))), limit)
+        results = self.system.query_cache.get(key, ('name', 'description'),
+                                              lambda: tuple(text_index.search(query, limit)))
+        return self._result(tuple(event_id for event_id, _ in results),
+                            scores=tuple(score for _, score in results))
+
+    def keyword(self, term):
+        """Event có tên, mô tả hoặc địa điểm chứa term (không dấu), theo ngày"""
+        system = self.system
+
+        def search():
+            matches = set(system.name_index.search(term))
+            matches.update(system.description_index.search(term))
+            matches.update(system.location_index.event_ids(term))
+            return self._by_date(matches)
+
+        return self._result(self._cached(('keyword', fold_text(term)),
+                                         ('name', 'description', 'location', 'date'), search))
+
+# ====================== BATCH MODE ======================
+
+def _parse_date(text):
+    return datetime.strptime(text, "%Y-%m-%d").date()
+
+def _parse_advanced(text):
+    """'name=..;from=..;status=..' -> dict tiêu chí của QueryPlan"""
+    fields = dict(part.split('=', 1) for part in text.split(';') if part.strip())
+    fields = {key.strip(): value.strip() for key, value in fields.items()}
+    criteria = {}
+    if fields.get('name'):
+        criteria['name'] = fields['name'].lower()
+    if fields.get('location'):
+        criteria['location'] = fields['location'].lower()
+    if 'from' in fields or 'to' in fields:
+        criteria['date_range'] = (_parse_date(fields.get('from') or '0001-01-01'),
+                                  _parse_date(fields.get('to') or '9999-12-31'))
+    if fields.get('status'):
+        if fields['status'] not in ('full', 'available', 'empty'):
+            raise ValueError(f"tình trạng không hợp lệ: {fields['status']}")
+        criteria['status'] = fields['status']
+    if 'min' in fields or 'max' in fields:
+        criteria['attendee_range'] = (int(fields.get('min') or 0),
+                                      int(fields['max']) if fields.get('max') else float('inf'))
+    return criteria
+
+def parse_query(queries, line):
+    """Một dòng của file batch -> (loại truy vấn, hàm không tham số trả về ResultSet)"""
+    kind, _, argument = line.strip().partition(' ')
+    argument = argument.strip()
+    if kind == 'date':
+        dates = [_parse_date(part) for part in argument.split()]
+        if not 1 <= len(dates) <= 2:
+            raise ValueError("cần 1 hoặc 2 ngày")
+        return kind, lambda: queries.between(dates[0], dates[-1])
+    if kind == 'advanced':
+        criteria = _parse_advanced(argument)
+        return kind, lambda: queries.advanced(criteria)
+    if kind == 'status':
+        if argument not in queries.FILL_STATUSES:
+            raise ValueError(f"tình trạng không hợp lệ: {argument}")
+        return kind, lambda: queries.by_fill_status(argument)
+
+    simple = {'name': queries.by_name, 'location': queries.by_location, 'organizer': queries.by_organizer,
+              'text': queries.full_text, 'keyword': queries.keyword}
+    if kind not in simple:
+        raise ValueError(f"loại truy vấn không hợp lệ: {kind}")
+    if not argument:
+        raise ValueError("thiếu từ khóa")
+    return kind, lambda: simple[kind](argument)
+
+def run_batch(queries, lines, page_size=PAGE_SIZE):
+    """Chạy các truy vấn (mỗi truy vấn lấy trang đầu như khi hiển thị) và in thông lượng
+
+    Trả về dict loại truy vấn -> [số truy vấn, tổng thời gian (s), tổng số kết quả].
+    """
+    parsed = []
+    errors = 0
+    for line_no, line in enumerate(lines, 1):
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        try:
+            parsed.append(parse_query(queries, line))
+        except ValueError as e:
+            errors += 1
+            print(f"Dòng {line_no} bị bỏ qua: {e}")
+
+    totals = {}
+    start = perf_counter()
+    for kind, run in parsed:
+        query_start = perf_counter()
+        result = run()
+        result.page(1, page_size)
+        elapsed = perf_counter() - query_start
+        entry = totals.setdefault(kind, [0, 0.0, 0])
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] += len(result)
+    elapsed = perf_counter() - start
+
+    print(f"\nBATCH: {len(parsed)} truy vấn trong {elapsed:.2f}s "
+          f"({len(parsed) / elapsed if elapsed else 0:,.0f} truy vấn/s), {errors} dòng lỗi")
+    print(f"   {'Loại':<10} {'Số lần':>8} {'TB (ms)':>10} {'KQ TB':>10}")
+    for kind, (count, total, results) in sorted(totals.items()):
+        print(f"   {kind:<10} {count:>8} {total / count * 1000:>10.3f} {results / count:>10.1f}")
+    stats = queries.system.query_cache.stats()
+    print(f"   Query cache: {stats['hits']} hit / {stats['misses']} miss ({stats['hit_rate']:.1f}%), "
+          f"{stats['evictions']} evicted, {stats['size']}/{stats['capacity']} entries")
+    return totals
+
+def run_batch_file(queries, path):
+    """Chạy file truy vấn batch, False nếu không đọc được file"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            lines = f.readlines()
+    except OSError as e:
+        print(f"Không đọc được file truy vấn {path}: {e}")
+        return False
+    run_batch(queries, lines)
+    return True
@@ -2,39 +2,142 @@
 
 import csv
 import json
-from datetime import datetime
+import os
+import sys
+import struct
+from datetime import date, time
+
+from models import Event, USER_CLASSES
+from journal import ChangeJournal, sync_file, set_aside
+from snapshot import Snapshot, write_snapshot, data_stamps
+from reports import write_summary_csv, EXCEL_LABELS, WPS_LABELS
+
+# registered_at: thời điểm đăng ký (giây epoch) song song với attendees, để trống nếu không rõ.
+# Cột mới luôn được thêm ở cuối - file cũ thiếu cột cuối vẫn đọc được.
+EVENT_COLUMNS = [
+    'event_id', 'name', 'description', 'date', 'time', 
+    'location', 'max_capacity', 'organizer_id', 'attendees', 'registered_at'
+]
+USER_COLUMNS = ['user_id', 'username', 'full_name', 'email', 'role']
+
+# ====================== ROW CONVERSION ======================
+
+def event_to_row(event):
+    """Event -> dòng CSV (cùng thứ tự EVENT_COLUMNS)"""
+    return [
+        event.event_id, 
+        event.name, 
+        event.description,
+        str(event.date), 
+        str(event.time), 
+        event.location,
+        event.max_capacity, 
+        event.organizer_id, 
+        ';'.join(event.attendees),
+        _join_stamps(event.attendees.stamps())
+    ]
+
+def _join_stamps(stamps):
+    return ';'.join(map(str, stamps)) if stamps is not None else ''
+
+def user_to_row(user):
+    """User -> dòng CSV (cùng thứ tự USER_COLUMNS)"""
+    return [user.user_id, user.username, user.full_name, user.email, user.role]
+
+def event_from_row(row, intern=sys.intern, parse_date=date.fromisoformat, 
+                   parse_time=time.fromisoformat, from_record=Event.from_record):
+    """Dòng CSV -> Event
+    
+    Ngày/giờ được parse bằng date/time.fromisoformat (nhanh hơn strptime nhiều lần)
+    và event được tạo qua Event.from_record để bỏ qua validation từng dòng.
+    """
+    (event_id, name, description, date_str, time_str, 
+     location, max_capacity, organizer_id, attendees_str, *rest) = row
+    attendees = map(intern, attendees_str.split(';')) if attendees_str else ()
+    # Dòng cũ (file/journal trước khi có cột registered_at) không có thời điểm đăng ký
+    stamps_str = rest[0] if rest else ''
+    stamps = map(int, stamps_str.split(';')) if stamps_str else None
+    return from_record(
+        event_id, name, description,
+        parse_date(date_str), parse_time(time_str),
+        location, max_capacity, organizer_id, attendees, stamps
+    )
+
+def user_from_row(row, intern=sys.intern):
+    """Dòng CSV -> User đúng class theo role"""
+    user_id, username, full_name, email, role = row
+    user_class = USER_CLASSES.get(role)
+    if user_class is None:
+        raise ValueError(f"Vai trò không hợp lệ: {role}")
+    return user_class(intern(user_id), username, full_name, email)
+
+def parse_rows(rows, parse, source):
+    """parse(row) cho từng dòng đã lưu; dòng lỗi (ValueError) được báo và bỏ qua
+    thay vì làm hỏng cả lần load
+    
+    Dòng lỗi vẫn nằm nguyên trên đĩa (lưu tăng dần và gộp journal chỉ chép lại dòng
+    thô), sửa tay rồi khởi động lại là đọc được.
+    """
+    for row in rows:
+        try:
+            yield parse(row)
+        except ValueError as e:
+            print(f"Bỏ qua dòng lỗi trong {source} (id {row[0] if row else '?'}): {e}")
+
+def merge_rows(rows, changes):
+    """Áp thay đổi từ journal lên luồng dòng CSV, giữ nguyên thứ tự các dòng cũ
+    
+    changes: {id: row mới hoặc None nếu đã xóa}; id mới chưa có trong CSV được thêm ở cuối.
+    """
+    if not changes:
+        yield from rows
+        return
+    
+    pending = dict(changes)
+    for row in rows:
+        if row[0] in pending:
+            replacement = pending.pop(row[0])
+            if replacement is not None:
+                yield replacement
+        else:
+            yield row
+    
+    for row in pending.values():
+        if row is not None:
+            yield row
 
 class FileManager:
     """Quản lý file operations"""
     
+    def __init__(self, users_file='users.csv', events_file='events.csv', 
+                 journal_file='changes.journal', compact_threshold=1000,
+                 snapshot_file='campus.snap', text_index_file='campus.fts'):
+        self.users_file = users_file
+        self.events_file = events_file
+        self.snapshot_file = snapshot_file
+        self.text_index_file = text_index_file
+        self.journal = ChangeJournal(journal_file)
+        self.compact_threshold = compact_threshold
+    
     def save_events_to_csv(self, events):
-        """Lưu events data vào CSV file với encoding đúng"""
+        """Lưu events data vào CSV file với encoding đúng (ghi file tạm rồi đổi tên)"""
         try:
-            with open('events.csv', 'w', newline='', encoding='utf-8-sig') as f:
+            temp_file = self.events_file + '.tmp'
+            with open(temp_file, 'w', newline='', encoding='utf-8-sig') as f:
                 writer = csv.writer(f, quoting=csv.QUOTE_MINIMAL)
                 
                 # Header
-                writer.writerow([
-                    'event_id', 'name', 'description', 'date', 'time', 
-                    'location', 'max_capacity', 'organizer_id', 'attendees'
-                ])
+                writer.writerow(EVENT_COLUMNS)
                 
                 # Data rows
                 for event in events.values():
-                    attendees_str = ';'.join(event.attendees) if event.attendees else ''
-                    writer.writerow([
-                        event.event_id, 
-                        event.name, 
-                        event.description,
-                        str(event.date), 
-                        str(event.time), 
-                        event.location,
-                        event.max_capacity, 
-                        event.organizer_id, 
-                        attendees_str
-                    ])
+                    writer.writerow(event_to_row(event))
+                
+                sync_file(f)
             
-            print(f"Đã lưu {len(events)} events vào events.csv")
+            # Crash giữa chừng chỉ để lại file .tmp, events.csv cũ vẫn nguyên vẹn
+            os.replace(temp_file, self.events_file)
+            print(f"Đã lưu {len(events)} events vào {self.events_file}")
             return True
             
         except Exception as e:
@@ -42,129 +145,42 @@ class FileManager:
             return False
     
     def save_users_to_csv(self, users):
-        """Lưu users data vào CSV file với encoding đúng"""
+        """Lưu users data vào CSV file với encoding đúng (ghi file tạm rồi đổi tên)"""
         try:
-            with open('users.csv', 'w', newline='', encoding='utf-8-sig') as f:
+            temp_file = self.users_file + '.tmp'
+            with open(temp_file, 'w', newline='', encoding='utf-8-sig') as f:
                 writer = csv.writer(f, quoting=csv.QUOTE_MINIMAL)
                 
                 # Header
-                writer.writerow(['user_id', 'username', 'full_name', 'email', 'role'])
+                writer.writerow(USER_COLUMNS)
                 
                 # Data rows
                 for user in users.values():
-                    writer.writerow([
-                        user.user_id, 
-                        user.username, 
-                        user.full_name,
-                        user.email, 
-                        user.role
-                    ])
+                    writer.writerow(user_to_row(user))
+                
+                sync_file(f)
             
-            print(f"Đã lưu {len(users)} users vào users.csv")
+            os.replace(temp_file, self.users_file)
+            print(f"Đã lưu {len(users)} users vào {self.users_file}")
             return True
             
         except Exception as e:
             print(f"Lỗi lưu users: {e}")
             return False
     
-    def export_statistics_csv(self, events):
-        """Xuất báo cáo thống kê ra CSV tương thích Excel và WPS"""
+    def export_statistics_csv(self, report):
+        """Xuất báo cáo thống kê ra CSV tương thích Excel và WPS
+        
+        report: StatisticsReport đã dựng sẵn (vd. StatisticsReport.from_indexes) -
+        không tự duyệt lại toàn bộ events, cùng một report được ghi ra cả 2 phiên bản.
+        """
         try:
-            filename = f"statistics_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            
-            # Tạo 2 phiên bản: Excel và WPS
-            # Phiên bản cho Excel (UTF-8 with BOM)
-            with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
-                writer = csv.writer(f, delimiter=',', quoting=csv.QUOTE_MINIMAL)
-                
-                # Tính toán thống kê
-                total_events = len(events)
-                total_attendees = sum(len(event.attendees) for event in events.values())
-                average = total_attendees / total_events if total_events > 0 else 0
-                
-                # Thống kê tổng quan (tiếng Anh cho Excel)
-                writer.writerow(['STATISTICS SUMMARY'])
-                writer.writerow(['Total Events', str(total_events)])
-                writer.writerow(['Total Attendees', str(total_attendees)])
-                writer.writerow(['Average Attendees per Event', f"{average:.2f}"])
-                writer.writerow([''])
-                
-                # Tìm sự kiện có attendance cao nhất và thấp nhất
-                if events:
-                    max_event = max(events.values(), key=lambda e: len(e.attendees))
-                    min_event = min(events.values(), key=lambda e: len(e.attendees))
-                    
-                    writer.writerow(['MOST POPULAR EVENT'])
-                    writer.writerow(['Event Name', max_event.name])
-                    writer.writerow(['Attendees', str(len(max_event.attendees))])
-                    writer.writerow([''])
-                    
-                    writer.writerow(['LEAST POPULAR EVENT'])
-                    writer.writerow(['Event Name', min_event.name])
-                    writer.writerow(['Attendees', str(len(min_event.attendees))])
-                    writer.writerow([''])
-                
-                # Chi tiết từng sự kiện
-                writer.writerow(['EVENT DETAILS'])
-                writer.writerow([
-                    'ID', 'Event Name', 'Date', 'Registered', 
-                    'Capacity', 'Fill Rate (%)'
-                ])
-                
-                for event in events.values():
-                    fill_rate = (len(event.attendees) / event.max_capacity) * 100
-                    writer.writerow([
-                        event.event_id, 
-                        event.name, 
-                        str(event.date),
-                        str(len(event.attendees)), 
-                        str(event.max_capacity), 
-                        f"{fill_rate:.1f}"
-                    ])
-            
-            # Tạo phiên bản WPS (UTF-8 thuần)
-            filename_wps = f"statistics_report_WPS_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            with open(filename_wps, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f, delimiter=',')
-                
-                # Thống kê tổng quan (tiếng Việt cho WPS)
-                writer.writerow(['THONG KE TONG QUAN'])
-                writer.writerow(['Tong so su kien', str(total_events)])
-                writer.writerow(['Tong so nguoi tham du', str(total_attendees)])
-                writer.writerow(['Trung binh nguoi/su kien', f"{average:.2f}"])
-                writer.writerow([''])
-                
-                if events:
-                    max_event = max(events.values(), key=lambda e: len(e.attendees))
-                    min_event = min(events.values(), key=lambda e: len(e.attendees))
-                    
-                    writer.writerow(['SU KIEN PHO BIEN NHAT'])
-                    writer.writerow(['Ten su kien', max_event.name])
-                    writer.writerow(['So nguoi tham du', str(len(max_event.attendees))])
-                    writer.writerow([''])
-                    
-                    writer.writerow(['SU KIEN IT QUAN TAM NHAT'])
-                    writer.writerow(['Ten su kien', min_event.name])
-                    writer.writerow(['So nguoi tham du', str(len(min_event.attendees))])
-                    writer.writerow([''])
-                
-                # Chi tiết từng sự kiện
-                writer.writerow(['CHI TIET TUNG SU KIEN'])
-                writer.writerow([
-                    'ID', 'Ten su kien', 'Ngay', 'Da dang ky', 
-                    'Suc chua', 'Ty le (%)'
-                ])
-                
-                for event in events.values():
-                    fill_rate = (len(event.attendees) / event.max_capacity) * 100
-                    writer.writerow([
-                        event.event_id, 
-                        event.name, 
-                        str(event.date),
-                        str(len(event.attendees)), 
-                        str(event.max_capacity), 
-                        f"{fill_rate:.1f}"
-                    ])
+            # Phiên bản cho Excel (UTF-8 with BOM, tiếng Anh)
+            filename = write_summary_csv(f"statistics_report_{report.timestamp}.csv",
+                                         report, EXCEL_LABELS)
+            # Phiên bản cho WPS (UTF-8 thuần, tiếng Việt)
+            filename_wps = write_summary_csv(f"statistics_report_WPS_{report.timestamp}.csv",
+                                             report, WPS_LABELS)
             
             print(f"Đã xuất báo cáo:")
             print(f"   - Cho Excel: {filename}")
@@ -186,8 +202,180 @@ class FileManager:
             success = False
         
         if success:
+            self.write_snapshot()
             print("Đã lưu tất cả dữ liệu thành công")
         else:
             print("Có lỗi khi lưu dữ liệu")
         
-        return success
\ No newline at end of file
+        return success
+    
+    # ====================== LOAD DATA ======================
+    
+    def has_saved_data(self):
+        """Kiểm tra đã có file dữ liệu được lưu chưa"""
+        return os.path.exists(self.users_file) and os.path.exists(self.events_file)
+    
+    def load_users(self):
+        """Đọc toàn bộ users đã lưu (CSV + journal thay đổi)"""
+        user_changes, _ = self.journal.read_changes()
+        return self.iter_users_from_csv(user_changes)
+    
+    def load_events(self):
+        """Đọc toàn bộ events đã lưu (CSV + journal thay đổi)"""
+        _, event_changes = self.journal.read_changes()
+        return self.iter_events_from_csv(event_changes)
+    
+    def set_aside_saved_data(self):
+        """Đổi tên các file dữ liệu không đọc được thành *.bad để lần lưu sau (dữ liệu
+        mẫu) không ghi đè lên chúng; trả về danh sách file đã đổi tên"""
+        self.journal.wait_for_compaction()
+        paths = (self.users_file, self.events_file, self.journal.path, self.journal.compacting_path,
+                 self.snapshot_file, self.text_index_file)
+        moved = [set_aside(path) for path in paths if os.path.exists(path)]
+        self.journal.record_count = 0
+        return moved
+    
+    def open_snapshot(self):
+        """Mở snapshot nhị phân (đã phủ journal) nếu nó khớp với CSV hiện tại, ngược lại None"""
+        if not os.path.exists(self.snapshot_file):
+            return None
+        try:
+            snapshot = Snapshot(self.snapshot_file)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Bỏ qua snapshot {self.snapshot_file}: {e}")
+            return None
+        
+        if not snapshot.matches(self.users_file, self.events_file):
+            # CSV đã được ghi lại sau snapshot (hoặc bị sửa tay) - đọc CSV
+            snapshot.close()
+            return None
+        
+        user_changes, event_changes = self.journal.read_changes()
+        # Mỗi dòng journal được dựng hai lần: Event cho bảng events và bản sao cố định
+        # làm nguồn nạp trễ cho index phụ
+        try:
+            snapshot.apply_changes(
+                {user_id: row and user_from_row(row) for user_id, row in user_changes.items()},
+                {event_id: row and event_from_row(row) for event_id, row in event_changes.items()},
+                {event_id: row and event_from_row(row) for event_id, row in event_changes.items()}
+            )
+        except ValueError as e:
+            # Đọc CSV + journal thay thế: dòng lỗi được bỏ qua từng dòng
+            print(f"Bỏ qua snapshot {self.snapshot_file}: journal có dòng lỗi ({e})")
+            snapshot.close()
+            return None
+        return snapshot
+    
+    def write_snapshot(self):
+        """Ghi snapshot nhị phân từ users.csv/events.csv hiện tại (lỗi không ảnh hưởng CSV)"""
+        try:
+            return write_snapshot(
+                self.snapshot_file,
+                self._iter_rows(self.users_file, USER_COLUMNS),
+                self._iter_rows(self.events_file, EVENT_COLUMNS),
+                self.users_file, self.events_file
+            )
+        except (OSError, ValueError, struct.error) as e:
+            # Snapshot cũ không còn khớp dấu CSV nên sẽ tự bị bỏ qua khi khởi động
+            print(f"Lỗi ghi snapshot {self.snapshot_file}: {e}")
+            return None
+    
+    def data_stamps(self):
+        """Dấu phiên bản của users.csv/events.csv - segment toàn văn lưu kèm để kiểm tra còn khớp"""
+        try:
+            return data_stamps(self.users_file, self.events_file)
+        except OSError:
+            return None
+    
+    def iter_lazy_registrations(self):
+        """CSV luôn tải đủ danh sách người tham dự - không có đăng ký tải lười"""
+        return iter(())
+    
+    def iter_users_from_csv(self, changes=None):
+        """Đọc users.csv từng dòng (đã áp thay đổi từ journal), yield User object"""
+        return parse_rows(self._iter_rows(self.users_file, USER_COLUMNS, changes),
+                          user_from_row, self.users_file)
+    
+    def iter_events_from_csv(self, changes=None):
+        """Đọc events.csv từng dòng (đã áp thay đổi từ journal), yield Event object"""
+        return parse_rows(self._iter_rows(self.events_file, EVENT_COLUMNS, changes),
+                          event_from_row, self.events_file)
+    
+    def _iter_rows(self, filename, columns, changes=None):
+        """Đọc streaming các dòng dữ liệu của file CSV"""
+        with open(filename, 'r', newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            missing = self._check_header(next(reader, None), columns, filename)
+            if missing:
+                # File cũ: bù giá trị rỗng cho các cột được thêm sau
+                padding = [''] * missing
+                reader = (row + padding for row in reader)
+            yield from merge_rows(reader, changes)
+    
+    def _check_header(self, header, expected, filename):
+        """Đảm bảo file có đúng cấu trúc cột (cho phép thiếu các cột mới ở cuối),
+        trả về số cột còn thiếu"""
+        if not header or header != expected[:len(header)]:
+            raise ValueError(f"File {filename} không đúng định dạng (header: {header})")
+        return len(expected) - len(header)
+    
+    # ====================== INCREMENTAL SAVE ======================
+    
+    def save_changes(self, users, events, tracker):
+        """Chỉ lưu các dòng đã thay đổi (theo DirtyTracker) vào journal
+        
+        Lần lưu đầu tiên (chưa có file) hoặc khi tracker yêu cầu thì ghi lại toàn bộ.
+        Khi journal đủ dài, nó được gộp vào CSV trên thread nền.
+        """
+        if tracker.full_rewrite or not self.has_saved_data():
+            self.journal.wait_for_compaction()
+            success = self.save_all_data(users, events)
+            if success:
+                self.journal.reset()
+            return success
+        
+        try:
+            records = []
+            for user_id in tracker.dirty_users:
+                if user_id in users:
+                    records.append({'table': 'users', 'op': 'upsert', 'id': user_id,
+                                    'row': user_to_row(users[user_id])})
+            for event_id in tracker.deleted_events:
+                records.append({'table': 'events', 'op': 'delete', 'id': event_id})
+            for event_id in tracker.dirty_events:
+                if event_id in events:
+                    records.append({'table': 'events', 'op': 'upsert', 'id': event_id,
+                                    'row': event_to_row(events[event_id])})
+            
+            self.journal.append(records)
+            print(f"Đã ghi {len(records)} thay đổi vào {self.journal.path}")
+            
+            if self.journal.record_count >= self.compact_threshold:
+                if self.journal.start_compaction(self):
+                    print("Đang gộp journal vào file CSV (chạy nền)")
+            return True
+            
+        except Exception as e:
+            print(f"Lỗi lưu thay đổi: {e}")
+            return False
+    
+    def rewrite_csv_with_changes(self, user_changes, event_changes):
+        """Ghi lại users.csv/events.csv đã áp thay đổi (ghi file tạm rồi đổi tên)
+        và snapshot nhị phân tương ứng
+        
+        Chỉ làm việc trên file nên có thể chạy trên thread nền.
+        """
+        for filename, columns, changes in ((self.users_file, USER_COLUMNS, user_changes),
+                                           (self.events_file, EVENT_COLUMNS, event_changes)):
+            if not changes:
+                continue
+            
+            temp_file = filename + '.tmp'
+            with open(temp_file, 'w', newline='', encoding='utf-8-sig') as f:
+                writer = csv.writer(f, quoting=csv.QUOTE_MINIMAL)
+                writer.writerow(columns)
+                writer.writerows(self._iter_rows(filename, columns, changes))
+                sync_file(f)
+            os.replace(temp_file, filename)
+        
+        self.write_snapshot()
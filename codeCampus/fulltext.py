@@ -0,0 +1,296 @@
+# fulltext.py - Tìm kiếm toàn văn trên tên + mô tả sự kiện, xếp hạng BM25
+#
+# Bố cục file segment (campus.fts, mảng array theo byte order của máy như snapshot):
+#   HEADER    magic, dấu users.csv/events.csv, số tài liệu/từ/posting, tổng độ dài, cỡ 2 blob
+#   DOC IDS   event_id của từng số tài liệu, nối bằng '\n' ('' = tài liệu đã xóa)
+#   TERMS     các từ, nối bằng '\n'
+#   LENGTHS   độ dài (số token, tên tính NAME_BOOST lần) từng tài liệu - uint32
+#   COUNTS    số posting của từng từ - uint32
+#   DOCS/TFS  posting của mọi từ nối liền: số tài liệu (uint32) và tần suất (uint16)
+
+import os
+import re
+import math
+import heapq
+import struct
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from operator import itemgetter
+
+from models import fold_text
+from indexes import DeferredIndex
+from journal import sync_file
+
+MAGIC = b'CCFTS001'
+
+# magic | dấu users.csv, events.csv | số tài liệu, số từ | số posting, tổng độ dài, cỡ blob id, cỡ blob từ
+HEADER = struct.Struct('<8s6q2I4Q')
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+class TextIndex(DeferredIndex):
+    """Inverted index BM25 trên tên + mô tả (đã bỏ dấu), lấy top-k bằng heap
+
+    - Mỗi event là một tài liệu được đánh số tăng dần; posting của một từ là cặp
+      array (số tài liệu, tần suất) nên luôn sắp theo số tài liệu và rất gọn
+    - Xóa/cập nhật: tài liệu cũ bị đánh dấu xóa, bản mới được thêm với số mới;
+      khi số tài liệu đã xóa vượt số còn sống thì posting được dọn lại
+    - df lấy bằng độ dài posting nên tính cả tài liệu đã xóa chưa dọn (như Lucene)
+    - Có thể lưu ra segment và nạp lại khi khởi động mà không phải tách từ lại
+    """
+    snapshot_fields = ('name', 'description')
+    K1 = 1.2
+    B = 0.75
+    NAME_BOOST = 2
+    COMPACT_MIN = 1024
+
+    def __init__(self):
+        super().__init__()
+        self._clear()
+        self.saved_stamps = None   # dấu dữ liệu của segment đang khớp với index
+
+    def _clear(self):
+        self._postings = {}            # từ -> (array số tài liệu, array tần suất)
+        self._doc_ids = []             # số tài liệu -> event_id (None nếu đã xóa)
+        self._docno_of = {}            # event_id -> số tài liệu
+        self._lengths = array('I')
+        self._total_length = 0
+        self._deleted = 0
+
+    @staticmethod
+    def tokens(text):
+        return _TOKEN_PATTERN.findall(fold_text(text))
+
+    def __len__(self):
+        """Số tài liệu (event) đang có trong index"""
+        self._load_deferred()
+        return len(self._docno_of)
+
+    # ====================== QUERY ======================
+
+    def search(self, query, limit=10):
+        """Top limit (event_id, điểm BM25) cho query, điểm cao nhất trước
+
+        MaxScore: xét từ hiếm (điểm tối đa cao) trước; khi điểm thứ limit đã không
+        thấp hơn tổng điểm tối đa của các từ còn lại thì tài liệu mới không thể lọt
+        top - các từ còn lại chỉ cộng điểm cho ứng viên đã có (tra bằng bisect).
+        """
+        self._load_deferred()
+        n_docs = len(self._docno_of)
+        if n_docs == 0 or limit <= 0:
+            return []
+
+        k1 = self.K1
+        norm_constant = k1 * (1 - self.B)
+        norm_length = k1 * self.B * n_docs / self._total_length if self._total_length else 0.0
+
+        terms = []
+        for term in set(self.tokens(query)):
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            df = min(len(posting[0]), n_docs)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            terms.append((idf * (k1 + 1), idf, posting))
+        terms.sort(key=itemgetter(0), reverse=True)
+
+        doc_ids, lengths = self._doc_ids, self._lengths
+        scores = {}
+        remaining = sum(upper for upper, _, _ in terms)
+        essential = True
+        for upper, idf, (docs, tfs) in terms:
+            remaining -= upper
+            if essential:
+                for docno, tf in zip(docs, tfs):
+                    if doc_ids[docno] is not None:
+                        score = idf * tf * (k1 + 1) / (tf + norm_constant + norm_length * lengths[docno])
+                        scores[docno] = scores.get(docno, 0.0) + score
+                if len(scores) >= limit and heapq.nlargest(limit, scores.values())[-1] >= remaining:
+                    essential = False
+            else:
+                for docno in scores:
+                    position = bisect_left(docs, docno)
+                    if position < len(docs) and docs[position] == docno:
+                        tf = tfs[position]
+                        scores[docno] += idf * tf * (k1 + 1) / (tf + norm_constant + norm_length * lengths[docno])
+
+        top = heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+        return [(doc_ids[docno], score) for docno, score in top]
+
+    # ====================== UPDATE ======================
+
+    def _add(self, event_id, name, description):
+        """Thêm (hoặc thay) tài liệu của event"""
+        if event_id in self._docno_of:
+            self._remove(event_id)
+
+        freqs = Counter(self.tokens(description))
+        for term in self.tokens(name):
+            freqs[term] += self.NAME_BOOST
+
+        docno = len(self._doc_ids)
+        self._doc_ids.append(event_id)
+        self._docno_of[event_id] = docno
+        length = sum(freqs.values())
+        self._lengths.append(length)
+        self._total_length += length
+
+        postings = self._postings
+        for term, tf in freqs.items():
+            posting = postings.get(term)
+            if posting is None:
+                posting = postings[term] = (array('I'), array('H'))
+            posting[0].append(docno)
+            posting[1].append(min(tf, 0xFFFF))
+
+    def _remove(self, event_id):
+        docno = self._docno_of.pop(event_id, None)
+        if docno is None:
+            return
+        self._doc_ids[docno] = None
+        self._total_length -= self._lengths[docno]
+        self._deleted += 1
+        if self._deleted > max(self.COMPACT_MIN, len(self._docno_of)):
+            self._compact()
+
+    def _compact(self):
+        """Đánh số lại tài liệu còn sống và bỏ posting của tài liệu đã xóa"""
+        renumber = array('i', [-1]) * len(self._doc_ids)
+        doc_ids = []
+        lengths = array('I')
+        for docno, event_id in enumerate(self._doc_ids):
+            if event_id is not None:
+                renumber[docno] = len(doc_ids)
+                doc_ids.append(event_id)
+                lengths.append(self._lengths[docno])
+
+        postings = {}
+        for term, (docs, tfs) in self._postings.items():
+            new_docs, new_tfs = array('I'), array('H')
+            for docno, tf in zip(docs, tfs):
+                if renumber[docno] >= 0:
+                    new_docs.append(renumber[docno])
+                    new_tfs.append(tf)
+            if new_docs:
+                postings[term] = (new_docs, new_tfs)
+
+        self._postings = postings
+        self._doc_ids = doc_ids
+        self._docno_of = {event_id: docno for docno, event_id in enumerate(doc_ids)}
+        self._lengths = lengths
+        self._deleted = 0
+
+    # ====================== EVENT HOOKS ======================
+
+    def load(self, rows):
+        """Nạp hàng loạt (event_id, tên, mô tả)"""
+        for event_id, name, description in rows:
+            self._add(event_id, name, description)
+
+    def on_event_added(self, event):
+        self._load_deferred()
+        self._add(event.event_id, event.name, event.description)
+
+    def on_event_removed(self, event):
+        self._load_deferred()
+        self._remove(event.event_id)
+
+    def on_field_updated(self, event, field, old_value, new_value):
+        if field in self.snapshot_fields:
+            self._load_deferred()
+            self._add(event.event_id, event.name, event.description)
+
+    # ====================== PERSISTENCE ======================
+
+    @property
+    def is_loaded(self):
+        return self._deferred is None
+
+    def needs_save(self, stamps):
+        """Chỉ lưu index đã nạp và khi segment trên đĩa không còn khớp dữ liệu"""
+        return stamps is not None and self.is_loaded and stamps != self.saved_stamps
+
+    def save(self, path, stamps):
+        """Ghi segment (file tạm, fsync rồi os.replace) kèm dấu dữ liệu stamps"""
+        terms = list(self._postings)
+        ids_blob = '\n'.join(event_id or '' for event_id in self._doc_ids).encode('utf-8')
+        terms_blob = '\n'.join(terms).encode('utf-8')
+        counts = array('I', (len(self._postings[term][0]) for term in terms))
+        n_postings = sum(counts)
+
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, *stamps[0], *stamps[1], len(self._doc_ids), len(terms),
+                                n_postings, self._total_length, len(ids_blob), len(terms_blob)))
+            f.write(ids_blob)
+            f.write(terms_blob)
+            self._lengths.tofile(f)
+            counts.tofile(f)
+            for term in terms:
+                self._postings[term][0].tofile(f)
+            for term in terms:
+                self._postings[term][1].tofile(f)
+            sync_file(f)
+        os.replace(temp_path, path)
+        self.saved_stamps = stamps
+
+    @staticmethod
+    def read_stamps(path):
+        """Dấu dữ liệu ghi trong header segment, None nếu không có/không đọc được"""
+        try:
+            with open(path, 'rb') as f:
+                fields = HEADER.unpack(f.read(HEADER.size))
+        except (OSError, struct.error):
+            return None
+        if fields[0] != MAGIC:
+            return None
+        return (fields[1:4], fields[4:7])
+
+    def defer_segment(self, path, stamps, changes, fallback):
+        """Dùng segment đã lưu làm nguồn nạp trễ nếu nó khớp stamps
+
+        changes là các event đã đổi sau khi ghi CSV (journal: event_id -> Event hoặc
+        None nếu đã xóa), được áp lên segment. Segment hỏng thì dùng fallback().
+        """
+        if path is None or stamps is None or self.read_stamps(path) != stamps:
+            return False
+        self.defer(lambda: self._read_segment(path, stamps, changes, fallback))
+        return True
+
+    def _read_segment(self, path, stamps, changes, fallback):
+        try:
+            with open(path, 'rb') as f:
+                fields = HEADER.unpack(f.read(HEADER.size))
+                n_docs, n_terms, n_postings, total_length, ids_size, terms_size = fields[7:]
+                ids = f.read(ids_size).decode('utf-8').split('\n') if n_docs else []
+                terms = f.read(terms_size).decode('utf-8').split('\n') if n_terms else []
+                lengths, counts, docs, tfs = array('I'), array('I'), array('I'), array('H')
+                lengths.fromfile(f, n_docs)
+                counts.fromfile(f, n_terms)
+                docs.fromfile(f, n_postings)
+                tfs.fromfile(f, n_postings)
+            if len(ids) != n_docs or len(terms) != n_terms:
+                raise ValueError("số tài liệu/từ không khớp header")
+        except (OSError, EOFError, ValueError, struct.error) as e:
+            print(f"Bỏ qua segment toàn văn {path}: {e}")
+            self._clear()
+            return fallback()
+
+        self._doc_ids = [event_id or None for event_id in ids]
+        self._docno_of = {event_id: docno for docno, event_id in enumerate(ids) if event_id}
+        self._deleted = n_docs - len(self._docno_of)
+        self._lengths = lengths
+        self._total_length = total_length
+        offset = 0
+        for term, count in zip(terms, counts):
+            self._postings[term] = (docs[offset:offset + count], tfs[offset:offset + count])
+            offset += count
+        self.saved_stamps = stamps
+
+        # Thay đổi sau lần ghi CSV: event đã xóa bỏ khỏi index, event đã đổi được thêm lại
+        for event_id, event in changes.items():
+            if event is None:
+                self._remove(event_id)
+        return [(event_id, event.name, event.description)
+                for event_id, event in changes.items() if event is not None]
@@ -0,0 +1,141 @@
+# hyperloglog.py - Sketch HyperLogLog: ước lượng số phần tử khác nhau với bộ nhớ cố định
+#
+# Độ chính xác (PRECISION = 12, m = 4096 thanh ghi):
+# - Sai số chuẩn 1.04 / sqrt(m) ~ 1.6%: ~68% ước lượng lệch dưới 1.6%, ~95% lệch dưới 3.3%
+# - Ước lượng theo Ertl (2017): không lệch trên mọi khoảng, tập nhỏ gần như chính xác
+# - Giao hai tập tính theo bao hàm - loại trừ |A| + |B| - |A ∪ B|: sai số tuyệt đối cỡ
+#   sai số của |A ∪ B|, nên phần giao nhỏ giữa hai tập lớn chỉ mang tính tham khảo
+# Bộ nhớ: tối đa m byte mỗi sketch bất kể số phần tử; sketch nhỏ giữ dạng thưa (3 byte/thanh
+# ghi đã dùng) tới khi chạm m/4 thanh ghi thì chuyển sang mảng đầy đủ.
+# Hàm băm là hash() của Python (ngẫu nhiên theo tiến trình) - sketch chỉ dùng trong bộ nhớ,
+# không ghi ra file.
+
+from array import array
+from math import log, sqrt
+
+PRECISION = 12
+REGISTERS = 1 << PRECISION
+STANDARD_ERROR = 1.04 / REGISTERS ** 0.5
+
+_HASH_BITS = 64
+_REST_BITS = _HASH_BITS - PRECISION
+_HASH_MASK = (1 << _HASH_BITS) - 1
+_REST_MASK = (1 << _REST_BITS) - 1
+_SPARSE_LIMIT = REGISTERS // 4
+_ALPHA = 1 / (2 * log(2))
+
+class HyperLogLog:
+    """Sketch đếm phần tử khác nhau, gộp được (union) bằng max từng thanh ghi"""
+    __slots__ = ('_indices', '_ranks', '_registers')
+
+    def __init__(self, values=()):
+        self._indices = array('H')   # dạng thưa: chỉ số thanh ghi đã dùng
+        self._ranks = bytearray()    # dạng thưa: giá trị song song với _indices
+        self._registers = None       # dạng đầy đủ: bytearray m thanh ghi
+        self.update(values)
+
+    def add(self, value):
+        h = hash(value) & _HASH_MASK
+        self._set(h >> _REST_BITS, _REST_BITS - (h & _REST_MASK).bit_length() + 1)
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+
+    def _set(self, index, rank):
+        registers = self._registers
+        if registers is not None:
+            if registers[index] < rank:
+                registers[index] = rank
+            return
+        try:
+            position = self._indices.index(index)
+        except ValueError:
+            self._indices.append(index)
+            self._ranks.append(rank)
+            if len(self._ranks) > _SPARSE_LIMIT:
+                self._densify()
+        else:
+            if self._ranks[position] < rank:
+                self._ranks[position] = rank
+
+    def _densify(self):
+        registers = bytearray(REGISTERS)
+        for index, rank in zip(self._indices, self._ranks):
+            registers[index] = rank
+        self._registers = registers
+        self._indices, self._ranks = array('H'), bytearray()
+
+    def merge(self, other):
+        """Gộp other vào sketch này (hợp hai tập), trả về self"""
+        if other._registers is None:
+            for index, rank in zip(other._indices, other._ranks):
+                self._set(index, rank)
+        else:
+            if self._registers is None:
+                self._densify()
+            self._registers = bytearray(map(max, self._registers, other._registers))
+        return self
+
+    @classmethod
+    def union(cls, sketches):
+        result = cls()
+        for sketch in sketches:
+            result.merge(sketch)
+        return result
+
+    def count(self):
+        """Số phần tử khác nhau (ước lượng)"""
+        if self._registers is None:
+            histogram = [0] * (_REST_BITS + 2)
+            for rank in self._ranks:
+                histogram[rank] += 1
+            histogram[0] = REGISTERS - len(self._ranks)
+        else:
+            histogram = [self._registers.count(rank) for rank in range(_REST_BITS + 2)]
+        return round(_estimate(histogram))
+
+    @property
+    def size_bytes(self):
+        """Số byte dữ liệu thanh ghi (không tính phần đầu object), tối đa REGISTERS"""
+        if self._registers is not None:
+            return len(self._registers)
+        return len(self._indices) * self._indices.itemsize + len(self._ranks)
+
+def _sigma(x):
+    if x == 1:
+        return float('inf')
+    y, z = 1.0, x
+    while True:
+        x *= x
+        previous, z = z, z + x * y
+        y += y
+        if z == previous:
+            return z
+
+def _tau(x):
+    if x == 0 or x == 1:
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = sqrt(x)
+        y *= 0.5
+        previous, z = z, z - (1 - x) ** 2 * y
+        if z == previous:
+            return z / 3
+
+def _estimate(histogram):
+    """Ước lượng từ histogram giá trị thanh ghi (Ertl 2017) - không lệch ở cả vùng nhỏ
+    lẫn vùng chuyển tiếp ~2.5m mà công thức HyperLogLog gốc cần hiệu chỉnh riêng"""
+    z = REGISTERS * _tau(1 - histogram[-1] / REGISTERS)
+    for count in reversed(histogram[1:-1]):
+        z = 0.5 * (z + count)
+    z += REGISTERS * _sigma(histogram[0] / REGISTERS)
+    return _ALPHA * REGISTERS * REGISTERS / z
+
+def overlap(first, second):
+    """(số phần tử chung, chỉ số Jaccard) ước lượng của hai sketch"""
+    a, b = first.count(), second.count()
+    union = HyperLogLog.union((first, second)).count()
+    common = max(0, min(a + b - union, a, b))
+    return common, common / union if union else 0.0
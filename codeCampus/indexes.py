@@ -0,0 +1,756 @@
+# indexes.py - Các index phụ được cập nhật tự động qua EventBus
+
+import re
+import heapq
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from itertools import product
+
+from models import EventListener, fold_text
+
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+def edit_distance(a, b, limit):
+    """Khoảng cách sửa (Levenshtein + đảo 2 ký tự kề nhau), dừng sớm: trả về limit + 1 nếu vượt limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+class DeferredIndex(EventListener, ABC):
+    """Index có thể nạp trễ: nguồn dữ liệu (vd: snapshot) chỉ được đọc ở lần đầu index được dùng
+
+    Lớp con khai báo snapshot_fields - các field của event cần để dựng index - và
+    cài đặt load(rows) nhận các bộ (event_id, *giá trị các field đó).
+    """
+    snapshot_fields = ()
+
+    def __init__(self):
+        self._deferred = None
+
+    def defer(self, source):
+        """source() trả về các bộ dữ liệu cho load(), chỉ được gọi khi cần"""
+        self._deferred = source
+
+    def _load_deferred(self):
+        if self._deferred is not None:
+            source, self._deferred = self._deferred, None
+            self.load(source())
+
+    @abstractmethod
+    def load(self, rows):
+        """Nạp hàng loạt dữ liệu từ nguồn đã defer()"""
+
+class RegistrationIndex(DeferredIndex):
+    """Index ngược user_id -> các event_id mà user đã đăng ký"""
+
+    def __init__(self):
+        super().__init__()
+        self._user_events = {}
+
+    @property
+    def user_events(self):
+        self._load_deferred()
+        return self._user_events
+
+    def events_of(self, user_id):
+        """Danh sách event_id user đã đăng ký (theo thứ tự đăng ký)"""
+        return list(self.user_events.get(user_id, ()))
+
+    def is_registered(self, user_id, event_id):
+        return event_id in self.user_events.get(user_id, ())
+
+    def count_of(self, user_id):
+        return len(self.user_events.get(user_id, ()))
+
+    # ====================== EVENT HOOKS ======================
+
+    def load_registrations(self, pairs):
+        """Nạp hàng loạt (event_id, user_id) - dùng cho event có danh sách tải lười"""
+        user_events = self._user_events
+        for event_id, user_id in pairs:
+            registered = user_events.get(user_id)
+            if registered is None:
+                user_events[user_id] = {event_id: None}
+            else:
+                registered[event_id] = None
+
+    load = load_registrations
+
+    def on_event_added(self, event):
+        # Danh sách chưa tải: storage nạp đăng ký qua load_registrations
+        if not event.attendees.is_loaded:
+            return
+
+        # Vòng lặp inline vì đây là đường nóng khi bulk load hàng triệu đăng ký
+        user_events = self.user_events
+        event_id = event.event_id
+        for user_id in event.attendees:
+            registered = user_events.get(user_id)
+            if registered is None:
+                user_events[user_id] = {event_id: None}
+            else:
+                registered[event_id] = None
+
+    def on_event_removed(self, event):
+        for user_id in event.attendees:
+            self.on_attendee_removed(event, user_id, 0)
+
+    def on_attendee_added(self, event, user_id, registered_at):
+        # dict giữ thứ tự chèn và cho phép xóa O(1)
+        self.user_events.setdefault(user_id, {})[event.event_id] = None
+
+    def on_attendee_removed(self, event, user_id, registered_at):
+        registered = self.user_events.get(user_id)
+        if registered is None:
+            return
+        registered.pop(event.event_id, None)
+        if not registered:
+            del self.user_events[user_id]
+
+class OrganizerIndex(DeferredIndex):
+    """Index organizer_id -> các event_id do organizer đó phụ trách"""
+    snapshot_fields = ('organizer_id',)
+
+    def __init__(self):
+        super().__init__()
+        self._organizer_events = {}
+
+    @property
+    def organizer_events(self):
+        self._load_deferred()
+        return self._organizer_events
+
+    def events_of(self, organizer_id):
+        """Danh sách event_id của organizer (theo thứ tự tạo)"""
+        return list(self.organizer_events.get(organizer_id, ()))
+
+    def count_of(self, organizer_id):
+        return len(self.organizer_events.get(organizer_id, ()))
+
+    def organizers(self):
+        """Các organizer_id đang có ít nhất một sự kiện"""
+        return list(self.organizer_events)
+
+    # ====================== EVENT HOOKS ======================
+
+    def load(self, rows):
+        """Nạp hàng loạt (event_id, organizer_id)"""
+        organizer_events = self._organizer_events
+        for event_id, organizer_id in rows:
+            owned = organizer_events.get(organizer_id)
+            if owned is None:
+                organizer_events[organizer_id] = {event_id: None}
+            else:
+                owned[event_id] = None
+
+    def on_event_added(self, event):
+        self.organizer_events.setdefault(event.organizer_id, {})[event.event_id] = None
+
+    def on_event_removed(self, event):
+        owned = self.organizer_events.get(event.organizer_id)
+        if owned is None:
+            return
+        owned.pop(event.event_id, None)
+        if not owned:
+            del self.organizer_events[event.organizer_id]
+
+class SubstringIndex(DeferredIndex):
+    """Tìm chuỗi con không phân biệt hoa thường và dấu tiếng Việt trên một field của event
+
+    Mỗi giá trị được fold_text() một lần khi event được tạo/cập nhật và lưu làm khóa
+    tìm kiếm, nên truy vấn chỉ fold từ khóa. Với trigrams=True, search(term) chỉ kiểm
+    tra các event có đủ mọi trigram của term; trigrams=False chỉ giữ khóa (ít bộ nhớ,
+    hợp với field dài như mô tả) và quét chúng.
+    """
+
+    def __init__(self, field, trigrams=True):
+        super().__init__()
+        self.field = field
+        self.snapshot_fields = (field,)
+        self.use_trigrams = trigrams
+        self._values = {}     # event_id -> khóa tìm kiếm (đã fold)
+        self._order = {}      # event_id -> thứ tự thêm (kết quả theo thứ tự của system.events)
+        self._postings = {}   # trigram -> set(event_id)
+        self._next_order = 0
+
+    @staticmethod
+    def trigrams(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def key_of(self, event_id):
+        """Khóa tìm kiếm đã fold của event ('' nếu không có)"""
+        self._load_deferred()
+        return self._values.get(event_id, '')
+
+    def matches(self, event_id, term):
+        """Event có chứa term (đã fold) không - không phải fold lại giá trị"""
+        return term in self.key_of(event_id)
+
+    def search(self, term, limit=None):
+        """Các event_id có field chứa term, theo thứ tự thêm (tối đa limit kết quả)"""
+        return self.search_words([term], limit)
+
+    def search_words(self, words, limit=None):
+        """Các event_id có field chứa mọi từ trong words (không cần liền nhau)"""
+        self._load_deferred()
+        words = [fold_text(word) for word in words]
+        values = self._values
+
+        grams = set()
+        if self.use_trigrams:
+            for word in words:
+                grams.update(self.trigrams(word))
+
+        # Không có trigram nào (từ quá ngắn hoặc không dùng trigram): quét các khóa đã fold sẵn
+        if not grams:
+            return self._scan(words, limit)
+
+        postings = []
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if not posting:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+
+        # Chỉ cần vài kết quả đầu và từ khóa phổ biến: quét khóa theo thứ tự thêm thường
+        # gặp đủ kết quả rất sớm; giới hạn số khóa quét bằng cỡ posting nhỏ nhất
+        if limit is not None:
+            matches = self._scan(words, limit, budget=len(postings[0]))
+            if matches is not None:
+                return matches
+
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return []
+
+        # Có đủ trigram chưa chắc là chuỗi con liên tục - kiểm tra lại trên ứng viên
+        matches = [event_id for event_id in candidates
+                   if all(word in values[event_id] for word in words)]
+        if limit is not None:
+            return heapq.nsmallest(limit, matches, key=self._order.__getitem__)
+        matches.sort(key=self._order.__getitem__)
+        return matches
+
+    def _scan(self, words, limit=None, budget=None):
+        """Quét khóa theo thứ tự thêm; None nếu quét hết budget khóa mà chưa đủ limit"""
+        matches = []
+        for scanned, (event_id, value) in enumerate(self._values.items()):
+            if budget is not None and scanned >= budget:
+                return None
+            if all(word in value for word in words):
+                matches.append(event_id)
+                if len(matches) == limit:
+                    break
+        return matches
+
+    def estimate(self, term):
+        """Cận trên số kết quả của search(term) - không cần giao các posting"""
+        self._load_deferred()
+        term = fold_text(term)
+        if len(term) < 3 or not self.use_trigrams:
+            return len(self._values)
+        return min((len(self._postings.get(gram, ())) for gram in self.trigrams(term)), default=0)
+
+    def _add(self, event_id, value):
+        """Thêm/cập nhật giá trị của event - event đã có giữ nguyên thứ tự"""
+        old_value = self._values.get(event_id)
+        if old_value is not None:
+            self._unindex(event_id, old_value)
+        else:
+            self._order[event_id] = self._next_order
+            self._next_order += 1
+
+        value = fold_text(value)
+        self._values[event_id] = value
+        if not self.use_trigrams:
+            return
+        postings = self._postings
+        for gram in self.trigrams(value):
+            posting = postings.get(gram)
+            if posting is None:
+                postings[gram] = {event_id}
+            else:
+                posting.add(event_id)
+
+    def _unindex(self, event_id, value):
+        if not self.use_trigrams:
+            return
+        for gram in self.trigrams(value):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(event_id)
+                if not posting:
+                    del self._postings[gram]
+
+    # ====================== EVENT HOOKS ======================
+
+    def load(self, rows):
+        """Nạp hàng loạt (event_id, giá trị field)"""
+        for event_id, value in rows:
+            self._add(event_id, value)
+
+    def on_event_added(self, event):
+        self._load_deferred()
+        self._add(event.event_id, getattr(event, self.field))
+
+    def on_event_removed(self, event):
+        self._load_deferred()
+        value = self._values.pop(event.event_id, None)
+        if value is not None:
+            self._unindex(event.event_id, value)
+            del self._order[event.event_id]
+
+    def on_field_updated(self, event, field, old_value, new_value):
+        if field == self.field:
+            self._load_deferred()
+            self._add(event.event_id, new_value)
+
+class DateIndex(DeferredIndex):
+    """Index sự kiện sắp theo ngày: truy vấn khoảng ngày bằng bisect, O(log n + k)
+
+    Khóa là một số nguyên (ordinal của ngày << 32 | thứ tự thêm) nên các event cùng
+    ngày giữ thứ tự của system.events - kết quả giống sorted(..., key=lambda e: e.date).
+    Event mới được gom vào _pending và trộn ở truy vấn kế tiếp: lô nhỏ (thêm/đổi ngày
+    lẻ) được chèn từng khóa bằng bisect, lô lớn (load hàng loạt) được trộn một lần.
+    """
+    snapshot_fields = ('date',)
+    # Lô chờ nhỏ hơn len(_keys) / INSORT_RATIO thì chèn từng khóa thay vì trộn cả list
+    INSORT_RATIO = 256
+
+    def __init__(self):
+        super().__init__()
+        self._keys = []       # khóa đã sắp xếp
+        self._ids = []        # event_id song song với _keys
+        self._pending = {}    # khóa -> event_id, chưa trộn vào _keys
+        self._key_of = {}     # event_id -> khóa hiện tại
+        self._next_order = 0
+
+    def between(self, start_date=None, end_date=None):
+        """Các event_id có start_date <= ngày <= end_date, theo thứ tự ngày"""
+        self._flush()
+        keys = self._keys
+        lo = bisect_left(keys, start_date.toordinal() << 32) if start_date else 0
+        hi = bisect_left(keys, (end_date.toordinal() + 1) << 32) if end_date else len(keys)
+        return self._ids[lo:hi]
+
+    def on_date(self, day):
+        """Các event_id diễn ra đúng ngày day"""
+        return self.between(day, day)
+
+    def count_between(self, start_date=None, end_date=None):
+        """Số event trong khoảng ngày - O(log n), không tạo list kết quả"""
+        self._flush()
+        keys = self._keys
+        lo = bisect_left(keys, start_date.toordinal() << 32) if start_date else 0
+        hi = bisect_left(keys, (end_date.toordinal() + 1) << 32) if end_date else len(keys)
+        return max(0, hi - lo)
+
+    def sort_key(self, event_id):
+        """Khóa sắp xếp theo (ngày, thứ tự thêm) - dùng sắp lại một tập event_id con"""
+        self._load_deferred()
+        return self._key_of[event_id]
+
+    def _flush(self):
+        self._load_deferred()
+        if not self._pending:
+            return
+        pending = sorted(self._pending.items())
+        self._pending = {}
+        keys, ids = self._keys, self._ids
+        if len(pending) * self.INSORT_RATIO < len(keys):
+            for key, event_id in pending:
+                position = bisect_left(keys, key)
+                keys.insert(position, key)
+                ids.insert(position, event_id)
+            return
+        # Hai dãy đã sắp nối nhau: timsort trộn trong O(n)
+        entries = list(zip(keys, ids))
+        entries += pending
+        entries.sort()
+        self._keys = [key for key, _ in entries]
+        self._ids = [event_id for _, event_id in entries]
+
+    def _append(self, event_id, day, order=None):
+        if order is None:
+            order = self._next_order
+            self._next_order += 1
+        key = day.toordinal() << 32 | order
+        self._key_of[event_id] = key
+        self._pending[key] = event_id
+
+    def _delete(self, event_id):
+        """Xóa khóa của event, trả về khóa cũ (None nếu không có)"""
+        key = self._key_of.pop(event_id, None)
+        if key is None or self._pending.pop(key, None) is not None:
+            return key
+        position = bisect_left(self._keys, key)
+        del self._keys[position]
+        del self._ids[position]
+        return key
+
+    # ====================== EVENT HOOKS ======================
+
+    def load(self, rows):
+        """Nạp hàng loạt (event_id, ngày)"""
+        for event_id, day in rows:
+            self._append(event_id, day)
+
+    def on_event_added(self, event):
+        self._load_deferred()
+        self._delete(event.event_id)
+        self._append(event.event_id, event.date)
+
+    def on_event_removed(self, event):
+        self._load_deferred()
+        self._delete(event.event_id)
+
+    def on_field_updated(self, event, field, old_value, new_value):
+        if field == 'date':
+            self._load_deferred()
+            # Giữ thứ tự thêm cũ để event không đổi vị trí giữa các event cùng ngày
+            key = self._delete(event.event_id)
+            self._append(event.event_id, new_value, key & 0xFFFFFFFF if key is not None else None)
+
+class LocationIndex(DeferredIndex):
+    """Hash địa điểm -> các event_id tại đó
+
+    Số địa điểm khác nhau rất ít so với số event, nên tìm theo từ khóa chỉ cần
+    kiểm tra từng địa điểm một lần rồi lấy cả nhóm event.
+    """
+    snapshot_fields = ('location',)
+
+    def __init__(self):
+        super().__init__()
+        self._location_events = {}   # địa điểm -> {event_id: None}
+        self._folded = {}            # địa điểm -> khóa tìm kiếm (fold_text)
+
+    @property
+    def location_events(self):
+        self._load_deferred()
+        return self._location_events
+
+    def locations(self, term=""):
+        """Các địa điểm có chứa term (không phân biệt hoa thường và dấu)"""
+        term = fold_text(term)
+        return [location for location in self.location_events if term in self._folded[location]]
+
+    def key_of(self, location):
+        """Khóa tìm kiếm đã fold của địa điểm"""
+        folded = self._folded.get(location)
+        return folded if folded is not None else fold_text(location)
+
+    def count(self, term):
+        """Số event tại các địa điểm chứa term"""
+        location_events = self.location_events
+        return sum(len(location_events[location]) for location in self.locations(term))
+
+    def event_ids(self, term):
+        """Tập event_id tại các địa điểm chứa term"""
+        return self.event_ids_with_words([term])
+
+    def event_ids_with_words(self, words):
+        """Tập event_id tại các địa điểm chứa mọi từ trong words"""
+        words = [fold_text(word) for word in words]
+        result = set()
+        for location, events in self.location_events.items():
+            folded = self._folded[location]
+            if all(word in folded for word in words):
+                result.update(events)
+        return result
+
+    def _add(self, event_id, location):
+        events = self._location_events.get(location)
+        if events is None:
+            self._location_events[location] = {event_id: None}
+            self._folded[location] = fold_text(location)
+        else:
+            events[event_id] = None
+
+    def _remove(self, event_id, location):
+        events = self._location_events.get(location)
+        if events is None:
+            return
+        events.pop(event_id, None)
+        if not events:
+            del self._location_events[location]
+            del self._folded[location]
+
+    # ====================== EVENT HOOKS ======================
+
+    def load(self, rows):
+        """Nạp hàng loạt (event_id, địa điểm)"""
+        for event_id, location in rows:
+            self._add(event_id, location)
+
+    def on_event_added(self, event):
+        self._load_deferred()
+        self._add(event.event_id, event.location)
+
+    def on_event_removed(self, event):
+        self._load_deferred()
+        self._remove(event.event_id, event.location)
+
+    def on_field_updated(self, event, field, old_value, new_value):
+        if field == 'location':
+            self._load_deferred()
+            self._remove(event.event_id, old_value)
+            self._add(event.event_id, new_value)
+
+class FillStatusIndex(DeferredIndex):
+    """Nhóm event theo tỷ lệ lấp đầy (như thống kê trạng thái): đầy, gần đầy, khá, ít, chưa có
+
+    Mỗi lần đăng ký/hủy/sửa sức chứa chỉ tính lại nhóm của đúng event đó và
+    chuyển nhóm khi vượt ngưỡng - O(1). Đọc một nhóm không cần duyệt mọi event.
+    """
+    snapshot_fields = ('attendee_count', 'max_capacity')
+
+    FULL = 'full'                 # >= 100%
+    NEARLY_FULL = 'nearly_full'   # 80-99%
+    HALF = 'half'                 # 50-79%
+    LOW = 'low'                   # 1-49%
+    EMPTY = 'empty'               # 0%
+    BUCKETS = (FULL, NEARLY_FULL, HALF, LOW, EMPTY)
+    AVAILABLE = (NEARLY_FULL, HALF, LOW, EMPTY)
+
+    def __init__(self):
+        super().__init__()
+        self._buckets = {bucket: {} for bucket in self.BUCKETS}   # nhóm -> {event_id: None}
+        self._bucket_of = {}                                       # event_id -> nhóm
+
+    @classmethod
+    def classify(cls, registered, capacity):
+        """Nhóm của event có registered đăng ký trên sức chứa capacity"""
+        fill_rate = registered / capacity if capacity > 0 else 0
+        if fill_rate >= 1.0:
+            return cls.FULL
+        if fill_rate >= 0.8:
+            return cls.NEARLY_FULL
+        if fill_rate >= 0.5:
+            return cls.HALF
+        if fill_rate > 0:
+            return cls.LOW
+        return cls.EMPTY
+
+    def bucket_of(self, event_id):
+        self._load_deferred()
+        return self._bucket_of.get(event_id)
+
+    def event_ids(self, *buckets):
+        """Các event_id thuộc các nhóm đã cho (theo thứ tự nhóm)"""
+        self._load_deferred()
+        for bucket in buckets:
+            yield from self._buckets[bucket]
+
+    def count(self, *buckets):
+        self._load_deferred()
+        return sum(len(self._buckets[bucket]) for bucket in buckets)
+
+    def counts(self):
+        """Số event của từng nhóm"""
+        self._load_deferred()
+        return {bucket: len(events) for bucket, events in self._buckets.items()}
+
+    def _place(self, event_id, registered, capacity):
+        bucket = self.classify(registered, capacity)
+        previous = self._bucket_of.get(event_id)
+        if bucket != previous:
+            if previous is not None:
+                del self._buckets[previous][event_id]
+            self._buckets[bucket][event_id] = None
+            self._bucket_of[event_id] = bucket
+
+    def _update(self, event):
+        self._load_deferred()
+        self._place(event.event_id, len(event.attendees), event.max_capacity)
+
+    # ====================== EVENT HOOKS ======================
+
+    def load(self, rows):
+        """Nạp hàng loạt (event_id, số đăng ký, sức chứa)"""
+        for event_id, registered, capacity in rows:
+            self._place(event_id, registered, capacity)
+
+    def on_event_added(self, event):
+        self._update(event)
+
+    def on_event_removed(self, event):
+        self._load_deferred()
+        bucket = self._bucket_of.pop(event.event_id, None)
+        if bucket is not None:
+            del self._buckets[bucket][event.event_id]
+
+    def on_attendee_added(self, event, user_id, registered_at):
+        self._update(event)
+
+    def on_attendee_removed(self, event, user_id, registered_at):
+        self._update(event)
+
+    def on_field_updated(self, event, field, old_value, new_value):
+        if field == 'max_capacity':
+            self._update(event)
+
+class FuzzyIndex(DeferredIndex):
+    """Từ vựng (token đã fold) của một field, dùng gợi ý khi từ khóa bị gõ sai
+
+    Chỉ giữ token -> số event chứa token và index trigram trên chính các token
+    (không phải trên từng event), nên kích thước theo số từ khác nhau chứ không
+    theo số event. Token chỉ gồm chữ số (vd: số thứ tự trong tên) không được sửa.
+    Một token cách query k phép sửa thì còn chung ít nhất len(token) - 4k trigram
+    (mỗi phép sửa/đảo chữ phá tối đa 4 trigram), nên chỉ các token đủ số trigram
+    chung mới phải tính khoảng cách sửa.
+    """
+
+    def __init__(self, field):
+        super().__init__()
+        self.field = field
+        self.snapshot_fields = (field,)
+        self._counts = {}      # token -> số event chứa token
+        self._grams = {}       # trigram của token ($token$) -> set(token)
+        self._by_length = {}   # độ dài -> set(token), cho token quá ngắn để lọc bằng trigram
+
+    def __len__(self):
+        """Số token khác nhau trong từ vựng"""
+        self._load_deferred()
+        return len(self._counts)
+
+    @staticmethod
+    def tokens(value):
+        """Các token đã fold của một giá trị (bỏ token toàn chữ số)"""
+        return [token for token in _TOKEN_PATTERN.findall(fold_text(value)) if not token.isdigit()]
+
+    @staticmethod
+    def _token_grams(token):
+        padded = f"${token}$"
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    @staticmethod
+    def max_distance(token):
+        """Số lỗi gõ chấp nhận theo độ dài token"""
+        return 1 if len(token) <= 4 else 2
+
+    def corrections(self, token, limit=3):
+        """Các token trong từ vựng gần token nhất: list (token, khoảng cách), gần nhất trước"""
+        self._load_deferred()
+        max_dist = self.max_distance(token)
+        grams = self._token_grams(token)
+        needed = len(grams) - 4 * max_dist
+
+        if needed > 0:
+            overlap = {}
+            for gram in grams:
+                for candidate in self._grams.get(gram, ()):
+                    overlap[candidate] = overlap.get(candidate, 0) + 1
+            candidates = [candidate for candidate, count in overlap.items() if count >= needed]
+        else:
+            candidates = [candidate for length in range(len(token) - max_dist, len(token) + max_dist + 1)
+                          for candidate in self._by_length.get(length, ())]
+
+        scored = []
+        for candidate in candidates:
+            distance = edit_distance(token, candidate, max_dist)
+            if distance <= max_dist:
+                scored.append((distance, -self._counts[candidate], candidate))
+        return [(candidate, distance) for distance, _, candidate in heapq.nsmallest(limit, scored)]
+
+    def suggest(self, term, limit=5):
+        """Các cụm từ khóa đã sửa gần term nhất: list (cụm, tổng khoảng cách), gần nhất trước
+
+        Token không có trong từ vựng và không sửa được thì bị bỏ khỏi cụm.
+        """
+        options = []
+        for token in _TOKEN_PATTERN.findall(fold_text(term)):
+            if token.isdigit():
+                options.append([(token, 0)])
+                continue
+            corrected = self.corrections(token)
+            if corrected:
+                options.append(corrected)
+        if not options:
+            return []
+
+        phrases = ((" ".join(token for token, _ in combo), sum(distance for _, distance in combo))
+                   for combo in product(*options))
+        return heapq.nsmallest(limit, phrases, key=lambda phrase: phrase[1])
+
+    def lookup(self, term, exact_search, limit=10):
+        """Tối đa limit event_id khớp các cụm đã sửa lỗi gõ, cụm gần nhất trước
+
+        exact_search(các từ, limit) trả về event_id có đủ các từ đó (vd:
+        SubstringIndex.search_words). Trả về (list event_id, các cụm đã dùng).
+        """
+        found = {}
+        phrases = []
+        for phrase, _ in self.suggest(term):
+            before = len(found)
+            for event_id in exact_search(phrase.split(), limit - len(found)):
+                found.setdefault(event_id)
+            if len(found) > before:
+                phrases.append(phrase)
+            if len(found) >= limit:
+                break
+        return list(found), phrases
+
+    def _add_tokens(self, value):
+        counts = self._counts
+        for token in set(self.tokens(value)):
+            count = counts.get(token)
+            if count is not None:
+                counts[token] = count + 1
+                continue
+            counts[token] = 1
+            self._by_length.setdefault(len(token), set()).add(token)
+            for gram in self._token_grams(token):
+                self._grams.setdefault(gram, set()).add(token)
+
+    def _remove_tokens(self, value):
+        counts = self._counts
+        for token in set(self.tokens(value)):
+            count = counts.get(token)
+            if count is None:
+                continue
+            if count > 1:
+                counts[token] = count - 1
+                continue
+            del counts[token]
+            self._by_length[len(token)].discard(token)
+            for gram in self._token_grams(token):
+                tokens = self._grams.get(gram)
+                if tokens is not None:
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._grams[gram]
+
+    # ====================== EVENT HOOKS ======================
+
+    def load(self, rows):
+        """Nạp hàng loạt (event_id, giá trị field)"""
+        for _, value in rows:
+            self._add_tokens(value)
+
+    def on_event_added(self, event):
+        self._load_deferred()
+        self._add_tokens(getattr(event, self.field))
+
+    def on_event_removed(self, event):
+        self._load_deferred()
+        self._remove_tokens(getattr(event, self.field))
+
+    def on_field_updated(self, event, field, old_value, new_value):
+        if field == self.field:
+            self._load_deferred()
+            self._remove_tokens(old_value)
+            self._add_tokens(new_value)
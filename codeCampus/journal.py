@@ -0,0 +1,170 @@
+# journal.py - Theo dõi thay đổi (dirty tracking) và journal ghi thay đổi tăng dần
+
+import os
+import json
+import threading
+
+from models import EventListener
+
+def sync_file(f):
+    """Đẩy buffer của file xuống đĩa (flush + fsync)"""
+    f.flush()
+    os.fsync(f.fileno())
+
+def set_aside(path):
+    """Đổi tên file thành path.bad (path.bad.1, ... nếu đã có) để giữ lại, trả về tên mới"""
+    target, n = path + '.bad', 0
+    while os.path.exists(target):
+        n += 1
+        target = f"{path}.bad.{n}"
+    os.replace(path, target)
+    return target
+
+class DirtyTracker(EventListener):
+    """Ghi nhận các event/user đã thay đổi kể từ lần lưu gần nhất"""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Đánh dấu toàn bộ dữ liệu là đã lưu"""
+        self.dirty_events = set()
+        self.deleted_events = set()
+        self.dirty_users = set()
+        self.full_rewrite = False
+
+    def mark_all(self):
+        """Yêu cầu lần lưu tới ghi lại toàn bộ (vd: dữ liệu mẫu chưa từng được lưu)"""
+        self.full_rewrite = True
+
+    def has_changes(self):
+        return bool(self.full_rewrite or self.dirty_events or
+                    self.deleted_events or self.dirty_users)
+
+    def change_count(self):
+        return len(self.dirty_events) + len(self.deleted_events) + len(self.dirty_users)
+
+    # ====================== EVENT HOOKS ======================
+
+    def on_user_added(self, user):
+        self.dirty_users.add(user.user_id)
+
+    def on_event_added(self, event):
+        self.deleted_events.discard(event.event_id)
+        self.dirty_events.add(event.event_id)
+
+    def on_event_removed(self, event):
+        self.dirty_events.discard(event.event_id)
+        self.deleted_events.add(event.event_id)
+
+    def on_attendee_added(self, event, user_id, registered_at):
+        self.dirty_events.add(event.event_id)
+
+    def on_attendee_removed(self, event, user_id, registered_at):
+        self.dirty_events.add(event.event_id)
+
+    def on_field_updated(self, event, field, old_value, new_value):
+        self.dirty_events.add(event.event_id)
+
+class ChangeJournal:
+    """Journal append-only (JSON lines) chứa các dòng users/events đã thay đổi
+
+    Mỗi bản ghi: {"table": "users"|"events", "op": "upsert"|"delete", "id": ..., "row": [...]}
+    "row" có cùng thứ tự cột với file CSV tương ứng. Khi journal đủ dài, nó được
+    đổi tên thành <path>.compacting và một thread nền gộp vào file CSV.
+    """
+
+    def __init__(self, path='changes.journal'):
+        self.path = path
+        self.compacting_path = path + '.compacting'
+        self.record_count = self._count_records(path)
+        self._compaction_thread = None
+
+    def _count_records(self, path):
+        if not os.path.exists(path):
+            return 0
+        with open(path, 'r', encoding='utf-8') as f:
+            return sum(1 for _ in f)
+
+    def append(self, records):
+        """Ghi thêm các bản ghi vào cuối journal"""
+        if not records:
+            return 0
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False))
+                f.write('\n')
+            sync_file(f)
+        self.record_count += len(records)
+        return len(records)
+
+    def read_records(self, path):
+        """Đọc các bản ghi của một file journal (bỏ qua dòng cuối bị ghi dở)"""
+        if not os.path.exists(path):
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    break
+
+    def read_changes(self, include_live=True):
+        """Gộp journal thành {id: row hoặc None (đã xóa)} cho từng bảng
+
+        Journal đang gộp dở (.compacting) được đọc trước, journal hiện tại đọc sau
+        nên bản ghi mới nhất của mỗi id sẽ được giữ lại.
+        """
+        changes = {'users': {}, 'events': {}}
+        paths = [self.compacting_path, self.path] if include_live else [self.compacting_path]
+        for path in paths:
+            for record in self.read_records(path):
+                table = changes[record['table']]
+                table[record['id']] = record.get('row') if record['op'] == 'upsert' else None
+        return changes['users'], changes['events']
+
+    def reset(self):
+        """Xóa journal sau khi đã ghi lại toàn bộ dữ liệu"""
+        self.wait_for_compaction()
+        for path in (self.path, self.compacting_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self.record_count = 0
+
+    # ====================== COMPACTION ======================
+
+    def is_compacting(self):
+        return self._compaction_thread is not None and self._compaction_thread.is_alive()
+
+    def wait_for_compaction(self):
+        if self._compaction_thread is not None:
+            self._compaction_thread.join()
+            self._compaction_thread = None
+
+    def start_compaction(self, file_manager):
+        """Gộp journal vào CSV trên thread nền, trả về False nếu đang có lần gộp khác"""
+        if self.is_compacting():
+            return False
+
+        # Journal .compacting còn sót lại (lần gộp trước bị ngắt) được gộp trước,
+        # journal hiện tại chờ lần sau
+        if not os.path.exists(self.compacting_path):
+            if not os.path.exists(self.path):
+                return False
+            os.replace(self.path, self.compacting_path)
+            self.record_count = 0
+
+        self._compaction_thread = threading.Thread(
+            target=self._compact, args=(file_manager,), name="journal-compaction"
+        )
+        self._compaction_thread.start()
+        return True
+
+    def _compact(self, file_manager):
+        """Chạy trên thread nền: chỉ đọc file, không chạm vào object trong bộ nhớ"""
+        try:
+            user_changes, event_changes = self.read_changes(include_live=False)
+            file_manager.rewrite_csv_with_changes(user_changes, event_changes)
+            os.remove(self.compacting_path)
+        except Exception as e:
+            print(f"Lỗi gộp journal (sẽ thử lại lần sau): {e}")
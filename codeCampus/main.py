@@ -1,6 +1,27 @@
 # main.py - Simplified Campus Event Management System (Modular Architecture)
 
+import os
+import sys
+import sqlite3
+from functools import partial
+from collections import Counter
+
+from models import EventBus, ROLES
+from indexes import DeferredIndex, RegistrationIndex, OrganizerIndex, SubstringIndex, DateIndex, LocationIndex, FillStatusIndex, FuzzyIndex
+from journal import DirtyTracker, set_aside
+from wal import WriteAheadLog
+from fulltext import TextIndex
+from query_cache import QueryCache
+from autocomplete import AutocompleteIndex
+from stats_registry import StatsRegistry
+from registration_timeline import RegistrationTimeline
+from audience_sketches import AudienceSketches
+from popularity import PopularityRanking, OccupancyMatrix
+from rolling_stats import RollingWindows
+import columnar
+from event_queries import EventQueries, run_batch_file
 from file_manager import FileManager
+from sqlite_storage import SQLiteStorage
 from sample_data import initialize_sample_data
 from event_operations import EventOperations
 from registration_manager import RegistrationManager
@@ -12,15 +33,25 @@ from search_manager import SearchManager
 class SimpleCampusEventSystem:
     """Hệ thống quản lý sự kiện campus đơn giản - kiến trúc modular"""
     
-    def __init__(self):
+    def __init__(self, storage=None):
         # Core data
         self.users = {}
         self.events = {}
         self.current_role = None
         self.current_user = None
+        # Lý do không được lưu (dữ liệu cũ không đọc được và chưa được chuyển đi), None nếu lưu bình thường
+        self.save_blocked = None
+        
+        # Index phụ - cập nhật tự động khi Event thay đổi
+        self._init_indexes()
         
         # Managers
         self.file_manager = FileManager()
+        # Backend lưu trữ: FileManager (CSV) mặc định hoặc SQLiteStorage
+        self.storage = storage or self.file_manager
+        
+        # Lớp truy vấn thuần (không input/print) - menu tìm kiếm/hiển thị dựng trên lớp này
+        self.queries = EventQueries(self)
         
         # Initialize all operation managers
         self.event_ops = EventOperations(self)
@@ -37,7 +68,121 @@ class SimpleCampusEventSystem:
         """Khởi tạo dữ liệu với 4 sự kiện có sẵn"""
         print("CAMPUS EVENT MANAGEMENT SYSTEM")
         
-        self.users, self.events = initialize_sample_data()
+        loaded = False
+        try:
+            # has_saved_data() cũng có thể lỗi: SQLite mở file và chạy schema ngay lúc kiểm tra
+            if self.storage.has_saved_data():
+                self.load_data()
+                loaded = True
+        except (OSError, ValueError, sqlite3.Error) as e:
+            print(f"Không đọc được dữ liệu đã lưu ({e}), dùng dữ liệu mẫu")
+            self.users, self.events = {}, {}
+            self._init_indexes()
+            self.set_aside_saved_data()
+        
+        if not loaded:
+            self.load_sample_data()
+        
+        # Khôi phục các thao tác sau lần lưu cuối (nếu lần chạy trước bị crash)
+        if self.save_blocked is None:
+            recovered = self.wal.replay(self)
+            if recovered:
+                print(f"Đã khôi phục {recovered} thao tác chưa lưu từ {self.wal.path}")
+            self.wal.open()
+    
+    def set_aside_saved_data(self):
+        """Dữ liệu đã lưu không đọc được: đổi tên file (kể cả WAL - thao tác trong đó thuộc về
+        dữ liệu cũ) thành *.bad trước khi dùng dữ liệu mẫu, để lần lưu sau không ghi đè lên
+        dữ liệu thật. Không đổi tên được thì chặn lưu trong phiên này."""
+        try:
+            moved = self.storage.set_aside_saved_data()
+            if os.path.exists(self.wal.path):
+                moved.append(set_aside(self.wal.path))
+        except OSError as e:
+            self.save_blocked = f"không chuyển được dữ liệu cũ sang file .bad ({e})"
+            print(f"Sẽ không lưu trong phiên này: {self.save_blocked}")
+            return
+        for path in moved:
+            print(f"Đã giữ lại dữ liệu cũ ở {path}")
+    
+    def load_sample_data(self):
+        """Nạp dữ liệu mẫu"""
+        users, events = initialize_sample_data()
+        
+        for user in users.values():
+            self.add_user(user)
+        for event in events.values():
+            self.add_event(event)
+        
+        # Dữ liệu mẫu chưa có trên đĩa - lần lưu đầu ghi toàn bộ
+        self.dirty_tracker.mark_all()
+    
+    def _init_indexes(self):
+        """Tạo EventBus và các index phụ (rỗng)"""
+        self.event_bus = EventBus()
+        self.registration_index = self.event_bus.subscribe(RegistrationIndex())
+        self.organizer_index = self.event_bus.subscribe(OrganizerIndex())
+        self.name_index = self.event_bus.subscribe(SubstringIndex('name'))
+        self.description_index = self.event_bus.subscribe(SubstringIndex('description', trigrams=False))
+        self.date_index = self.event_bus.subscribe(DateIndex())
+        self.location_index = self.event_bus.subscribe(LocationIndex())
+        self.fill_status_index = self.event_bus.subscribe(FillStatusIndex())
+        self.name_vocabulary = self.event_bus.subscribe(FuzzyIndex('name'))
+        self.location_vocabulary = self.event_bus.subscribe(FuzzyIndex('location'))
+        self.text_index = self.event_bus.subscribe(TextIndex())
+        self.query_cache = self.event_bus.subscribe(QueryCache())
+        self.autocomplete = self.event_bus.subscribe(AutocompleteIndex())
+        self.stats = self.event_bus.subscribe(StatsRegistry())
+        self.timeline = self.event_bus.subscribe(RegistrationTimeline())
+        self.audience = self.event_bus.subscribe(AudienceSketches(self._attendees_of))
+        self.ranking = self.event_bus.subscribe(PopularityRanking())
+        self.occupancy = self.event_bus.subscribe(OccupancyMatrix())
+        self.rolling = self.event_bus.subscribe(RollingWindows())
+        # Bản sao dạng cột cho thống kê vector hóa - chỉ có khi cài NumPy
+        self.columnar = self.event_bus.subscribe(columnar.EventColumns()) if columnar.np is not None else None
+        self.dirty_tracker = self.event_bus.subscribe(DirtyTracker())
+        self.wal = self.event_bus.subscribe(WriteAheadLog())
+    
+    # ====================== DATA REGISTRY ======================
+    
+    def add_user(self, user):
+        """Thêm user vào hệ thống"""
+        self.users[user.user_id] = user
+        self.event_bus.emit('on_user_added', user)
+        return user
+    
+    def add_event(self, event):
+        """Thêm event vào hệ thống và gắn vào EventBus để các index tự cập nhật"""
+        self.events[event.event_id] = event
+        event.bus = self.event_bus
+        self.event_bus.emit('on_event_added', event)
+        return event
+    
+    def remove_event(self, event_id):
+        """Gỡ event khỏi hệ thống và khỏi các index"""
+        event = self.events.pop(event_id)
+        self.event_bus.emit('on_event_removed', event)
+        event.bus = None
+        return event
+    
+    def get_user_registrations(self, user_id):
+        """Các event user đã đăng ký - O(số đăng ký của user)"""
+        return [self.events[event_id] 
+                for event_id in self.registration_index.events_of(user_id)]
+    
+    def get_events_between(self, start_date=None, end_date=None):
+        """Các event trong khoảng ngày, đã sắp theo ngày - O(log n + k)"""
+        return list(self.queries.between(start_date, end_date))
+    
+    def search_text(self, query, limit=10):
+        """Tìm toàn văn trên tên + mô tả: list (event, điểm BM25), liên quan nhất trước"""
+        result = self.queries.full_text(query, limit)
+        return list(zip(result, result.scores))
+    
+    def get_organizer_events(self, organizer_id):
+        """Các event của organizer - O(số event của organizer)"""
+        return [self.events[event_id] 
+                for event_id in self.organizer_index.events_of(organizer_id)]
     
     # ====================== MAIN SYSTEM CONTROL ======================
     
@@ -69,14 +214,28 @@ class SimpleCampusEventSystem:
         finally:
             # Lưu dữ liệu cuối cùng
             self.save_data()
+            self.wal.close()
     
     # ====================== DATA OPERATIONS ======================
     
     def save_data(self):
-        """Lưu dữ liệu ra file"""
+        """Lưu dữ liệu ra file - chỉ ghi những gì đã thay đổi từ lần lưu trước"""
+        if self.save_blocked is not None:
+            print(f"Không lưu: {self.save_blocked}")
+            return False
         try:
-            success = self.file_manager.save_all_data(self.users, self.events)
+            if not self.dirty_tracker.has_changes():
+                print("Không có thay đổi cần lưu")
+                self.save_text_index()
+                return True
+            
+            self.wal.sync()
+            success = self.storage.save_changes(self.users, self.events, self.dirty_tracker)
             if success:
+                # Thay đổi đã nằm trong snapshot/journal - WAL không cần giữ nữa
+                self.wal.checkpoint()
+                self.dirty_tracker.clear()
+                self.save_text_index()
                 print("Đã lưu tất cả dữ liệu")
             else:
                 print("Có lỗi khi lưu dữ liệu")
@@ -85,10 +244,98 @@ class SimpleCampusEventSystem:
             print(f"Lỗi lưu dữ liệu: {e}")
             return False
     
+    def save_text_index(self):
+        """Lưu segment toàn văn khi CSV đã được ghi lại (chỉ khi index đã được dựng)
+        
+        Gọi sau khi dữ liệu trong bộ nhớ đã lưu hết: segment = CSV + journal hiện tại,
+        journal được áp lại lên segment khi khởi động nên kết quả vẫn đúng.
+        """
+        stamps = self.storage.data_stamps()
+        if not self.text_index.needs_save(stamps):
+            return
+        try:
+            self.text_index.save(self.storage.text_index_file, stamps)
+        except OSError as e:
+            # Segment cũ không còn khớp dấu CSV nên sẽ tự bị bỏ qua khi khởi động
+            print(f"Lỗi lưu index toàn văn: {e}")
+    
     def load_data(self):
-        """Load dữ liệu từ file (tính năng tương lai)"""
-        # Có thể implement sau để load từ CSV
-        pass
+        """Load dữ liệu từ storage (CSV + journal hoặc SQLite), đọc streaming từng dòng"""
+        snapshot = self.storage.open_snapshot()
+        if snapshot is not None:
+            return self.load_snapshot(snapshot)
+        
+        for user in self.storage.load_users():
+            self.add_user(user)
+        
+        for event in self.storage.load_events():
+            self.add_event(event)
+        
+        # Event có danh sách tải lười (SQLite): nạp index đăng ký và điểm gợi ý trực tiếp từ storage,
+        # đọc bảng registrations một lần rồi chia cho từng index
+        rows = list(self._of_loaded_events(self.storage.iter_lazy_registrations()))
+        pairs = [(event_id, user_id) for event_id, user_id, _ in rows]
+        self.registration_index.load_registrations(pairs)
+        self.autocomplete.load_registrations(pairs)
+        self.stats.load_registrations(pairs)
+        self.timeline.load_registration_times((event_id, stamp) for event_id, _, stamp in rows if stamp)
+        
+        self.dirty_tracker.clear()
+        
+        print(f"Đã tải {len(self.users)} users, {len(self.events)} events, "
+              f"{self.stats.total_registrations} đăng ký từ file")
+        return True
+    
+    def _of_loaded_events(self, pairs):
+        """Các cặp (event_id, ...) của event đã load - bỏ event có dòng lỗi bị bỏ qua khi đọc"""
+        events = self.events
+        return (pair for pair in pairs if pair[0] in events)
+    
+    def load_snapshot(self, snapshot):
+        """Dùng snapshot nhị phân đã mmap: user/event chỉ được tạo khi truy cập tới,
+        các index phụ được nạp ở lần đầu cần đến"""
+        self.users = snapshot.user_table()
+        self.events = snapshot.event_table(on_load=self._attach_event)
+        self.registration_index.defer(snapshot.iter_registrations)
+        for listener in self.event_bus.listeners:
+            if isinstance(listener, DeferredIndex) and listener.snapshot_fields:
+                listener.defer(partial(snapshot.iter_event_fields, *listener.snapshot_fields))
+        self.autocomplete.defer(partial(self._autocomplete_rows, snapshot))
+        self.stats.defer(partial(self._stats_rows, snapshot))
+        self.timeline.defer(snapshot.iter_registration_times)
+        # Index toàn văn: đọc segment đã lưu thay vì tách từ lại toàn bộ mô tả
+        self.text_index.defer_segment(
+            self.storage.text_index_file, snapshot.stamps, snapshot.event_sources,
+            partial(snapshot.iter_event_fields, *self.text_index.snapshot_fields))
+        
+        self.dirty_tracker.clear()
+        
+        print(f"Đã tải {len(self.users)} users, {len(self.events)} events, "
+              f"{snapshot.registration_count} đăng ký từ {snapshot.path}")
+        return True
+    
+    def _autocomplete_rows(self, snapshot):
+        """Nguồn nạp trễ index gợi ý: field event và số đăng ký của từng user đọc từ snapshot"""
+        registrations = Counter(user_id for _, user_id in snapshot.iter_registrations())
+        event_rows = snapshot.iter_event_fields('name', 'location', 'organizer_id', 'attendee_count')
+        user_rows = ((u.user_id, u.role, u.full_name, u.username, registrations[u.user_id]) 
+                     for u in self.users.values())
+        return event_rows, user_rows
+    
+    def _stats_rows(self, snapshot):
+        """Nguồn nạp trễ bộ đếm tổng hợp: số đăng ký/sức chứa từng event và lượt đăng ký từ snapshot"""
+        event_rows = (row[1:] for row in snapshot.iter_event_fields('attendee_count', 'max_capacity'))
+        user_rows = ((u.user_id, u.role) for u in self.users.values())
+        registered_user_ids = (user_id for _, user_id in snapshot.iter_registrations())
+        return event_rows, user_rows, registered_user_ids
+    
+    def _attendees_of(self, event_id):
+        """Nguồn dựng sketch người tham dự: danh sách hiện tại của một event"""
+        return self.events[event_id].attendees
+    
+    def _attach_event(self, event):
+        """Event được tạo từ snapshot cũng phải gắn vào EventBus của hệ thống"""
+        event.bus = self.event_bus
     
     def backup_data(self):
         """Backup dữ liệu (tính năng tương lai)"""
@@ -99,12 +346,13 @@ class SimpleCampusEventSystem:
     
     def get_system_stats(self):
         """Lấy thống kê hệ thống nhanh"""
+        user_counts = self.stats.user_counts()
         return {
             'total_users': len(self.users),
             'total_events': len(self.events),
-            'total_registrations': sum(len(e.attendees) for e in self.events.values()),
-            'user_roles': {role: sum(1 for u in self.users.values() if u.role == role) 
-                          for role in ['Admin', 'EventOrganizer', 'Student', 'Visitor']}
+            'total_registrations': self.stats.total_registrations,
+            'query_cache': self.query_cache.stats(),
+            'user_roles': {role: user_counts[role] for role in ROLES}
         }
     
     def validate_system_data(self):
@@ -122,6 +370,9 @@ class SimpleCampusEventSystem:
                 if attendee_id not in self.users:
                     issues.append(f"Event {event.event_id} có attendee không tồn tại: {attendee_id}")
         
+        # Bộ đếm tổng hợp phải khớp với kết quả tính lại từ đầu
+        issues.extend(self.stats.check(self.events, self.users))
+        
         return issues
     
     def show_system_architecture(self):
@@ -138,6 +389,23 @@ class SimpleCampusEventSystem:
         print("view_manager.py - Hiển thị dữ liệu")
         print("statistics_manager.py - Thống kê báo cáo")
         print("search_manager.py - Tìm kiếm lọc")
+        print("indexes.py - Index phụ cập nhật qua EventBus")
+        print("journal.py - Dirty tracking & journal thay đổi")
+        print("wal.py - Write-ahead log & khôi phục sau crash")
+        print("sqlite_storage.py - Backend lưu trữ SQLite")
+        print("snapshot.py - Snapshot nhị phân mmap, khởi động nhanh")
+        print("reports.py - Mô hình báo cáo thống kê dùng chung")
+        print("query_planner.py - Kế hoạch truy vấn cho tìm kiếm nâng cao")
+        print("fulltext.py - Tìm kiếm toàn văn BM25 (tên + mô tả)")
+        print("query_cache.py - Cache LRU kết quả tìm kiếm, vô hiệu theo field thay đổi")
+        print("event_queries.py - Truy vấn thuần (kết quả phân trang), chế độ batch")
+        print("autocomplete.py - Gợi ý theo tiền tố (tên event, địa điểm, người dùng)")
+        print("stats_registry.py - Bộ đếm tổng hợp cập nhật theo từng thay đổi")
+        print("columnar.py - Bản sao dạng cột (NumPy) cho thống kê vector hóa")
+        print("registration_timeline.py - Biểu đồ tốc độ đăng ký theo phút/giờ/ngày")
+        print("hyperloglog.py, audience_sketches.py - Ước lượng số người tham dự khác nhau")
+        print("popularity.py - Top-K/bottom-K sự kiện (heap) và ma trận lấp đầy địa điểm × thứ")
+        print("rolling_stats.py - Thống kê cửa sổ trượt 7/30/90 ngày (vòng đệm theo ngày)")
         
         print(f"\nMANAGERS ĐƯỢC KHỞI TẠO:")
         print(f"   EventOperations - Tạo/Sửa/Xóa sự kiện")
@@ -152,6 +420,10 @@ class SimpleCampusEventSystem:
         print(f"   Users: {stats['total_users']}")
         print(f"   Events: {stats['total_events']}")
         print(f"   Registrations: {stats['total_registrations']}")
+        cache = stats['query_cache']
+        print(f"   Query cache: {cache['size']}/{cache['capacity']} entries, "
+              f"{cache['hits']} hit / {cache['misses']} miss ({cache['hit_rate']:.1f}%), "
+              f"{cache['evictions']} evicted, {cache['invalidations']} invalidated")
         
         # Kiểm tra tính toàn vẹn
         issues = self.validate_system_data()
@@ -225,7 +497,9 @@ def main():
         print("Khởi động Campus Event Management System...")
         print("Loading các modules...")
         
-        system = SimpleCampusEventSystem()
+        # python main.py --sqlite: lưu dữ liệu trong campus.db thay vì CSV
+        storage = SQLiteStorage() if '--sqlite' in sys.argv else None
+        system = SimpleCampusEventSystem(storage)
         
         print("Hệ thống đã sẵn sàng!")
         print("Kiến trúc: 8 modules, 6 managers")
@@ -236,6 +510,16 @@ def main():
         
         print("\n" + "="*60)
         
+        # python main.py --batch queries.txt: chạy file truy vấn, báo thông lượng rồi thoát
+        if '--batch' in sys.argv:
+            position = sys.argv.index('--batch') + 1
+            if position < len(sys.argv):
+                run_batch_file(system.queries, sys.argv[position])
+            else:
+                print("Thiếu đường dẫn file truy vấn cho --batch")
+            system.wal.close()
+            return
+        
         system.run()
         
     except ImportError as e:
@@ -1,5 +1,7 @@
 # menu_manager.py - Quản lý giao diện menu
 
+from autocomplete import LIST_ALL_LIMIT
+
 class MenuManager:
     """Class quản lý các menu giao diện"""
     
@@ -24,8 +26,8 @@ class MenuManager:
         
         if choice == '1':
             self.system.current_role = "Admin"
-            admin_users = [u for u in self.system.users.values() if u.role == "Admin"]
-            self.system.current_user = admin_users[0] if admin_users else None
+            admin_ids = self.system.autocomplete.users_of("Admin")
+            self.system.current_user = self.system.users[admin_ids[0]] if admin_ids else None
             return "Admin"
         elif choice == '2':
             self.system.current_role = "EventOrganizer"
@@ -50,60 +52,46 @@ class MenuManager:
     
     def select_organizer(self):
         """Chọn organizer cụ thể"""
-        organizers = [u for u in self.system.users.values() if u.role == "EventOrganizer"]
-        if not organizers:
-            print("Không có organizer nào")
-            return
-        
-        print("\nChọn Organizer:")
-        for i, org in enumerate(organizers, 1):
-            print(f"{i}. {org.full_name} ({org.username})")
-        
-        try:
-            choice = int(input("\nChọn organizer (số): ")) - 1
-            self.system.current_user = organizers[choice]
-            print(f"Đã chọn: {self.system.current_user.full_name}")
-        except (ValueError, IndexError):
-            print("Lựa chọn không hợp lệ")
-            self.system.current_user = organizers[0]  # Default first organizer
+        self._select_user("EventOrganizer", "organizer", "Organizer")
     
     def select_student(self):
         """Chọn student cụ thể"""
-        students = [u for u in self.system.users.values() if u.role == "Student"]
-        if not students:
-            print("Không có student nào")
-            return
-        
-        print("\nChọn Student:")
-        for i, student in enumerate(students, 1):
-            print(f"{i}. {student.full_name} ({student.username})")
-        
-        try:
-            choice = int(input("\nChọn student (số): ")) - 1
-            self.system.current_user = students[choice]
-            print(f"Đã chọn: {self.system.current_user.full_name}")
-        except (ValueError, IndexError):
-            print("Lựa chọn không hợp lệ")
-            self.system.current_user = students[0]  # Default first student
+        self._select_user("Student", "student", "Student")
     
     def select_visitor(self):
         """Chọn visitor cụ thể"""
-        visitors = [u for u in self.system.users.values() if u.role == "Visitor"]
-        if not visitors:
-            print("Không có visitor nào")
+        self._select_user("Visitor", "visitor", "Visitor")
+    
+    def _select_user(self, role, label, title):
+        """Chọn user theo vai trò: ít thì liệt kê hết, nhiều thì gõ đầu họ tên/username để gợi ý"""
+        autocomplete = self.system.autocomplete
+        total = autocomplete.user_count(role)
+        if total == 0:
+            print(f"Không có {label} nào")
             return
         
-        print("\nChọn Visitor:")
-        for i, visitor in enumerate(visitors, 1):
-            print(f"{i}. {visitor.full_name} ({visitor.username})")
+        if total <= LIST_ALL_LIMIT:
+            candidates = autocomplete.users_of(role)
+        else:
+            # Gợi ý theo tiền tố, người hoạt động nhiều nhất trước (Enter = phổ biến nhất)
+            prefix = input(f"\nCó {total} {label}. Nhập đầu họ tên hoặc username: ").strip()
+            candidates = autocomplete.complete_users(role, prefix)
+            if not candidates:
+                print(f"Không có {label} nào khớp '{prefix}', hiển thị {label} phổ biến nhất")
+                candidates = autocomplete.complete_users(role)
+        
+        print(f"\nChọn {title}:")
+        for i, user_id in enumerate(candidates, 1):
+            user = self.system.users[user_id]
+            print(f"{i}. {user.full_name} ({user.username})")
         
         try:
-            choice = int(input("\nChọn visitor (số): ")) - 1
-            self.system.current_user = visitors[choice]
+            choice = int(input(f"\nChọn {label} (số): ")) - 1
+            self.system.current_user = self.system.users[candidates[choice]]
             print(f"Đã chọn: {self.system.current_user.full_name}")
         except (ValueError, IndexError):
             print("Lựa chọn không hợp lệ")
-            self.system.current_user = visitors[0]  # Default first visitor
+            self.system.current_user = self.system.users[candidates[0]]  # Default first user
     
     # ====================== MAIN MENUS ======================
     
@@ -203,20 +191,16 @@ class MenuManager:
         print("\nTHÔNG TIN HỆ THỐNG")
         print("="*40)
         
-        # Thống kê users theo role
-        user_stats = {}
-        for user in self.system.users.values():
-            role = user.role
-            user_stats[role] = user_stats.get(role, 0) + 1
+        # Thống kê users theo role - đọc từ bộ đếm tổng hợp
+        stats = self.system.stats
         
         print("NGƯỜI DÙNG:")
-        for role, count in user_stats.items():
-            print(f"   {role}: {count} người")
-        
-        print(f"\nSỰ KIỆN: {len(self.system.events)} sự kiện có sẵn")
+        for role, count in stats.user_counts().items():
+            if count > 0:
+                print(f"   {role}: {count} người")
         
-        total_attendees = sum(len(e.attendees) for e in self.system.events.values())
-        print(f"ĐĂNG KÝ: {total_attendees} lượt tham gia")
+        print(f"\nSỰ KIỆN: {stats.event_count} sự kiện có sẵn")
+        print(f"ĐĂNG KÝ: {stats.total_registrations} lượt tham gia")
         
         print("\nĐẶC ĐIỂM HỆ THỐNG:")
         print("- Không cần đăng nhập phức tạp")
@@ -1,9 +1,43 @@
 # models.py - Simplified Models (No password required) - Updated with validation methods
 
+import sys
+import unicodedata
+from array import array
 from datetime import datetime
 
+# Vai trò được mã hóa thành số nguyên - mỗi user chỉ giữ 1 int nhỏ thay vì chuỗi
+ROLES = ("Admin", "EventOrganizer", "Student", "Visitor")
+ROLE_CODES = {role: code for code, role in enumerate(ROLES)}
+
+def intern_value(value):
+    """Intern chuỗi lặp lại nhiều (địa điểm, organizer_id) để các object dùng chung"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+def _build_fold_table():
+    """Bảng translate: chữ có dấu (dựng sẵn) -> chữ gốc, dấu rời (combining) -> bỏ"""
+    table = {ord('đ'): 'd', ord('Đ'): 'D'}
+    for start, end in ((0x00C0, 0x0250), (0x1E00, 0x1F00)):
+        for code in range(start, end):
+            base = ''.join(c for c in unicodedata.normalize('NFD', chr(code))
+                           if not unicodedata.combining(c))
+            if base != chr(code):
+                table[code] = base
+    for code in range(0x0300, 0x0370):
+        table[code] = None
+    return table
+
+_FOLD_TABLE = _build_fold_table()
+
+def fold_text(text):
+    """Khóa tìm kiếm: chữ thường, bỏ dấu tiếng Việt ("Hội thảo" -> "hoi thao")"""
+    if text.isascii():
+        return text.lower()
+    return text.lower().translate(_FOLD_TABLE)
+
 class User:
     """Base class cho tất cả user types"""
+    __slots__ = ('user_id', 'username', 'full_name', 'email', 'role_code')
+
     def __init__(self, user_id, username, full_name, email, role):
         self.user_id = user_id
         self.username = username
@@ -11,28 +45,240 @@ class User:
         self.email = email
         self.role = role
 
+    @property
+    def role(self):
+        return ROLES[self.role_code]
+
+    @role.setter
+    def role(self, value):
+        if value not in ROLE_CODES:
+            raise ValueError(f"Vai trò không hợp lệ: {value}")
+        self.role_code = ROLE_CODES[value]
+
 class Admin(User):
     """Admin class - có quyền cao nhất"""
+    __slots__ = ()
+
     def __init__(self, user_id, username, full_name, email):
         super().__init__(user_id, username, full_name, email, "Admin")
 
 class EventOrganizer(User):
     """Event Organizer class - quản lý events của mình"""
+    __slots__ = ()
+
     def __init__(self, user_id, username, full_name, email):
         super().__init__(user_id, username, full_name, email, "EventOrganizer")
 
 class Student(User):
     """Student class - có thể đăng ký events"""
+    __slots__ = ()
+
     def __init__(self, user_id, username, full_name, email):
         super().__init__(user_id, username, full_name, email, "Student")
 
 class Visitor(User):
     """Visitor class - tương tự Student"""
+    __slots__ = ()
+
     def __init__(self, user_id, username, full_name, email):
         super().__init__(user_id, username, full_name, email, "Visitor")
 
+# Map role -> class, dùng khi tạo user từ dữ liệu đã lưu
+USER_CLASSES = {
+    "Admin": Admin,
+    "EventOrganizer": EventOrganizer,
+    "Student": Student,
+    "Visitor": Visitor,
+}
+
+# Các field của Event có thể cập nhật qua update_field
+UPDATABLE_FIELDS = ("name", "description", "date", "time", "location", "max_capacity")
+
+class EventListener:
+    """Interface nhận thông báo thay đổi từ model (các method mặc định không làm gì)"""
+    def on_user_added(self, user):
+        pass
+
+    def on_event_added(self, event):
+        pass
+
+    def on_event_removed(self, event):
+        pass
+
+    def on_attendee_added(self, event, user_id, registered_at):
+        pass
+
+    def on_attendee_removed(self, event, user_id, registered_at):
+        pass
+
+    def on_field_updated(self, event, field, old_value, new_value):
+        pass
+
+class EventBus:
+    """Phát thông báo thay đổi của Event tới các index/listener đã đăng ký"""
+    def __init__(self):
+        self.listeners = []
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+        return listener
+
+    def emit(self, hook, *args):
+        for listener in self.listeners:
+            getattr(listener, hook)(*args)
+
+def registration_stamp(moment=None):
+    """Thời điểm đăng ký dạng gọn: số giây epoch (uint32), mặc định là lúc này"""
+    return int((moment or datetime.now()).timestamp())
+
+def _with_stamps(user_ids, stamps):
+    """dict user_id -> thời điểm đăng ký theo thứ tự đăng ký (thiếu thời điểm thì 0)"""
+    items = dict.fromkeys(user_ids, 0)
+    if stamps:
+        for user_id, stamp in zip(items, stamps):
+            items[user_id] = stamp
+    return items
+
+class AttendeeSet:
+    """Tập người tham dự giữ thứ tự đăng ký - add/contains/remove O(1)
+
+    Dùng dict làm nền (dict giữ thứ tự chèn) nên duyệt, ';'.join(...) và
+    export vẫn theo đúng thứ tự đăng ký như list cũ. Thời điểm đăng ký (giây
+    epoch, 0 = không rõ) là giá trị của dict nên hủy đăng ký và tra thời điểm
+    cũng chỉ là một lần tra dict.
+    """
+    __slots__ = ('_items',)
+    is_loaded = True
+
+    def __init__(self, user_ids=(), stamps=None):
+        self._items = _with_stamps(user_ids, stamps)
+
+    def add(self, user_id, stamp=0):
+        """Thêm user_id (kèm thời điểm đăng ký), trả về False nếu đã có"""
+        if user_id in self._items:
+            return False
+        self._items[user_id] = stamp
+        return True
+
+    def pop(self, user_id, default=None):
+        """Xóa user_id, trả về thời điểm đăng ký (0 nếu không rõ) hoặc default nếu không có"""
+        return self._items.pop(user_id, default)
+
+    def remove(self, user_id):
+        """Xóa user_id, raise KeyError nếu không có (giống list.remove)"""
+        if self.pop(user_id) is None:
+            raise KeyError(user_id)
+
+    def discard(self, user_id):
+        """Xóa user_id nếu có, trả về True nếu đã xóa"""
+        return self.pop(user_id) is not None
+
+    def clear(self):
+        self._items.clear()
+
+    def copy(self):
+        """Bản sao dạng list theo thứ tự đăng ký"""
+        return list(self._items)
+
+    def stamps(self):
+        """array('I') thời điểm đăng ký theo thứ tự đăng ký, None nếu không có thời điểm nào"""
+        stamps = self._items.values()
+        return array('I', stamps) if any(stamps) else None
+
+    def registered_at(self, user_id):
+        """Thời điểm đăng ký của user_id (0 nếu không rõ hoặc không có)"""
+        return self._items.get(user_id, 0)
+
+    def registrations(self):
+        """Các cặp (user_id, thời điểm đăng ký) theo thứ tự đăng ký"""
+        return iter(self._items.items())
+
+    def __contains__(self, user_id):
+        return user_id in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __eq__(self, other):
+        if isinstance(other, AttendeeSet):
+            return list(self._items) == list(other._items)
+        if isinstance(other, list):
+            return list(self._items) == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"AttendeeSet({list(self._items)!r})"
+
+class LazyAttendeeSet(AttendeeSet):
+    """AttendeeSet chưa đọc danh sách từ storage - chỉ biết số lượng
+
+    len() trả về số đếm có sẵn; thao tác đầu tiên cần đến danh sách sẽ gọi loader
+    (trả về user_id và thời điểm đăng ký) rồi chuyển object thành AttendeeSet
+    thường (không còn chi phí kiểm tra sau đó).
+    """
+    __slots__ = ()
+    is_loaded = False
+
+    def __init__(self, loader, count):
+        self._items = (loader, count)
+
+    def _materialize(self):
+        loader, _ = self._items
+        user_ids, stamps = loader()
+        self._items = _with_stamps(user_ids, stamps)
+        self.__class__ = AttendeeSet
+        return self
+
+    def __len__(self):
+        return self._items[1]
+
+    def add(self, user_id, stamp=0):
+        return self._materialize().add(user_id, stamp)
+
+    def pop(self, user_id, default=None):
+        return self._materialize().pop(user_id, default)
+
+    def remove(self, user_id):
+        return self._materialize().remove(user_id)
+
+    def discard(self, user_id):
+        return self._materialize().discard(user_id)
+
+    def clear(self):
+        return self._materialize().clear()
+
+    def copy(self):
+        return self._materialize().copy()
+
+    def stamps(self):
+        return self._materialize().stamps()
+
+    def registered_at(self, user_id):
+        return self._materialize().registered_at(user_id)
+
+    def registrations(self):
+        return self._materialize().registrations()
+
+    def __contains__(self, user_id):
+        return user_id in self._materialize()
+
+    def __iter__(self):
+        return iter(self._materialize())
+
+    def __eq__(self, other):
+        return self._materialize() == other
+
+    def __repr__(self):
+        return f"LazyAttendeeSet(<{self._items[1]} chưa tải>)"
+
 class Event:
     """Event class - chứa thông tin sự kiện"""
+    __slots__ = ('event_id', 'name', 'description', 'date', 'time', 'location',
+                 'max_capacity', 'organizer_id', 'attendees', 'bus')
+
     def __init__(self, event_id, name, description, date, time, location, max_capacity, organizer_id):
         self._validate_inputs(name, date, max_capacity)
         self.event_id = event_id
@@ -40,10 +286,33 @@ class Event:
         self.description = description
         self.date = date
         self.time = time
-        self.location = location
+        self.location = intern_value(location)
         self.max_capacity = int(max_capacity)
-        self.organizer_id = organizer_id
-        self.attendees = []
+        self.organizer_id = intern_value(organizer_id)
+        self.attendees = AttendeeSet()
+        self.bus = None  # EventBus của hệ thống, gán khi event được thêm vào system
+    
+    @classmethod
+    def from_record(cls, event_id, name, description, date, time, location, 
+                    max_capacity, organizer_id, attendees=(), registered_at=None):
+        """Tạo Event từ dữ liệu đã lưu - bỏ qua validation (dữ liệu đã hợp lệ khi tạo)
+        
+        Dùng cho bulk load: không gọi datetime.now() cho từng event và cho phép
+        load lại cả các sự kiện đã diễn ra.
+        """
+        event = cls.__new__(cls)
+        event.event_id = event_id
+        event.name = name
+        event.description = description
+        event.date = date
+        event.time = time
+        event.location = intern_value(location)
+        event.max_capacity = int(max_capacity)
+        event.organizer_id = intern_value(organizer_id)
+        event.attendees = (attendees if isinstance(attendees, AttendeeSet) 
+                           else AttendeeSet(attendees, registered_at))
+        event.bus = None
+        return event
     
     def _validate_inputs(self, name, date, max_capacity):
         """Xác thực đầu vào theo yêu cầu đề bài"""
@@ -62,23 +331,28 @@ class Event:
         if int(max_capacity) <= 0:
             raise ValueError("Sức chứa phải là số nguyên dương")
     
-    def add_attendee(self, user_id):
-        """Thêm người tham dự với kiểm tra sức chứa"""
+    def add_attendee(self, user_id, registered_at=None):
+        """Thêm người tham dự với kiểm tra sức chứa (registered_at: giây epoch, mặc định lúc này)"""
         if len(self.attendees) >= self.max_capacity:
             raise ValueError("Sự kiện đã đầy, không thể đăng ký thêm")
         
-        if user_id in self.attendees:
+        stamp = registered_at if registered_at is not None else registration_stamp()
+        if not self.attendees.add(user_id, stamp):
             raise ValueError("Bạn đã đăng ký sự kiện này rồi")
         
-        self.attendees.append(user_id)
+        if self.bus is not None:
+            self.bus.emit('on_attendee_added', self, user_id, stamp)
         return True
     
     def remove_attendee(self, user_id):
         """Xóa người tham dự"""
-        if user_id in self.attendees:
-            self.attendees.remove(user_id)
-            return True
-        return False
+        stamp = self.attendees.pop(user_id)
+        if stamp is None:
+            return False
+        
+        if self.bus is not None:
+            self.bus.emit('on_attendee_removed', self, user_id, stamp)
+        return True
     
     # ====================== NEW UPDATE/DELETE METHODS ======================
     
@@ -157,6 +431,8 @@ class Event:
         if not valid:
             raise ValueError(message)
         
+        old_value = getattr(self, field) if field in UPDATABLE_FIELDS else None
+        
         if field == "name":
             self.name = new_value.strip()
         elif field == "description":
@@ -172,10 +448,12 @@ class Event:
             else:
                 self.time = new_value
         elif field == "location":
-            self.location = new_value.strip()
+            self.location = intern_value(new_value.strip())
         elif field == "max_capacity":
             self.max_capacity = int(new_value)
         
+        if self.bus is not None and field in UPDATABLE_FIELDS:
+            self.bus.emit('on_field_updated', self, field, old_value, getattr(self, field))
         return True
     
     def get_deletion_impact(self):
@@ -201,9 +479,13 @@ class Event:
     
     def prepare_for_deletion(self):
         """Chuẩn bị xóa event - clear tất cả attendees"""
-        removed_attendees = self.attendees.copy()
+        removed = list(self.attendees.registrations())
         self.attendees.clear()
-        return removed_attendees
+        
+        if self.bus is not None:
+            for user_id, stamp in removed:
+                self.bus.emit('on_attendee_removed', self, user_id, stamp)
+        return [user_id for user_id, _ in removed]
     
     def __str__(self):
         """String representation của Event"""
@@ -0,0 +1,211 @@
+# popularity.py - Top-K/bottom-K sự kiện theo số đăng ký (heap) và ma trận lấp đầy địa điểm × thứ
+
+from heapq import heapify, heappush, heappop
+
+from indexes import DeferredIndex
+from reports import fill_rate
+
+WEEKDAYS = ('T2', 'T3', 'T4', 'T5', 'T6', 'T7', 'CN')
+
+class PopularityRanking(DeferredIndex):
+    """Sự kiện nhiều/ít đăng ký nhất, đọc k event đầu mà không sắp xếp toàn bộ
+
+    Hai min-heap khóa số nguyên: (số đăng ký << 32 | thứ tự thêm) cho bottom-K và
+    ((MAX - số đăng ký) << 32 | thứ tự thêm) cho top-K, nên bằng nhau thì event thêm
+    trước đứng trước (giống max()/min() trên system.events). Mỗi thay đổi đăng ký
+    đẩy khóa mới vào cả hai heap, O(log n); khóa cũ bị bỏ qua khi đọc (so với số
+    đăng ký hiện tại) và heap được dựng lại khi dài gấp 4 lần số event. Chỗ của event
+    đã xóa được thu hồi khi chiếm quá nửa mảng: thứ tự thêm được đánh lại liền nhau
+    (không dùng lại chỗ trống vì sẽ làm đổi thứ tự khi bằng nhau).
+    """
+    snapshot_fields = ('attendee_count',)
+    MAX_COUNT = (1 << 31) - 1
+    COMPACT_MIN = 1024
+
+    def __init__(self):
+        super().__init__()
+        self._ids = []          # thứ tự thêm -> event_id (None nếu đã xóa)
+        self._counts = []       # thứ tự thêm -> số đăng ký hiện tại
+        self._order_of = {}     # event_id -> thứ tự thêm
+        self._top = []
+        self._bottom = []
+
+    def __len__(self):
+        self._load_deferred()
+        return len(self._order_of)
+
+    # ====================== QUERY ======================
+
+    def top(self, k):
+        """[(event_id, số đăng ký)] của k event nhiều đăng ký nhất"""
+        return self._take('_top', k, lambda key: self.MAX_COUNT - (key >> 32))
+
+    def bottom(self, k):
+        """[(event_id, số đăng ký)] của k event ít đăng ký nhất"""
+        return self._take('_bottom', k, lambda key: key >> 32)
+
+    def _take(self, name, k, count_of):
+        self._load_deferred()
+        heap = getattr(self, name)   # lấy sau khi nạp trễ: load() dựng lại heap
+        taken, seen = [], set()
+        while heap and len(taken) < k:
+            key = heappop(heap)
+            order = key & 0xFFFFFFFF
+            # Khóa cũ (số đăng ký đã đổi, event đã xóa) hoặc trùng thì bỏ hẳn
+            if order in seen or self._ids[order] is None or self._counts[order] != count_of(key):
+                continue
+            seen.add(order)
+            taken.append(key)
+        for key in taken:
+            heappush(heap, key)
+        return [(self._ids[key & 0xFFFFFFFF], count_of(key)) for key in taken]
+
+    # ====================== UPDATE ======================
+
+    def _push(self, order, count):
+        heappush(self._top, (self.MAX_COUNT - count) << 32 | order)
+        heappush(self._bottom, count << 32 | order)
+        if len(self._bottom) > max(self.COMPACT_MIN, 4 * len(self._order_of)):
+            self._compact()
+
+    def _compact(self):
+        """Dựng lại heap chỉ với khóa hiện tại của event còn tồn tại"""
+        live = [(order, self._counts[order]) for order in self._order_of.values()]
+        self._top = [(self.MAX_COUNT - count) << 32 | order for order, count in live]
+        self._bottom = [count << 32 | order for order, count in live]
+        heapify(self._top)
+        heapify(self._bottom)
+
+    def _renumber(self):
+        """Bỏ chỗ của event đã xóa, đánh lại thứ tự thêm (giữ thứ tự tương đối) rồi dựng lại heap"""
+        live = [(event_id, count) for event_id, count in zip(self._ids, self._counts)
+                if event_id is not None]
+        self._ids = [event_id for event_id, _ in live]
+        self._counts = [count for _, count in live]
+        self._order_of = {event_id: order for order, event_id in enumerate(self._ids)}
+        self._compact()
+
+    def _set(self, event_id, count):
+        order = self._order_of[event_id]
+        self._counts[order] = count
+        self._push(order, count)
+
+    def _append(self, event_id, count):
+        order = self._order_of[event_id] = len(self._ids)
+        self._ids.append(event_id)
+        self._counts.append(count)
+        return order
+
+    def load(self, rows):
+        """Nạp hàng loạt (event_id, số đăng ký)"""
+        for event_id, count in rows:
+            self._append(event_id, count)
+        self._compact()
+
+    # ====================== EVENT HOOKS ======================
+
+    def on_event_added(self, event):
+        self._load_deferred()
+        if event.event_id in self._order_of:
+            self._set(event.event_id, len(event.attendees))
+        else:
+            self._push(self._append(event.event_id, len(event.attendees)), len(event.attendees))
+
+    def on_event_removed(self, event):
+        self._load_deferred()
+        order = self._order_of.pop(event.event_id, None)
+        if order is not None:
+            self._ids[order] = None
+            if 2 * len(self._order_of) < len(self._ids):
+                self._renumber()
+
+    def on_attendee_added(self, event, user_id, registered_at):
+        self._load_deferred()
+        self._set(event.event_id, len(event.attendees))
+
+    def on_attendee_removed(self, event, user_id, registered_at):
+        self._load_deferred()
+        self._set(event.event_id, len(event.attendees))
+
+class OccupancyMatrix(DeferredIndex):
+    """Ma trận địa điểm × thứ trong tuần: số event, tổng đăng ký, tổng sức chứa mỗi ô
+
+    Mỗi thay đổi (đăng ký/hủy, thêm/xóa event, đổi ngày/địa điểm/sức chứa) chỉ cập
+    nhật đúng ô của event, nên dashboard đọc ma trận không cần duyệt event.
+    """
+    snapshot_fields = ('location', 'date', 'attendee_count', 'max_capacity')
+
+    def __init__(self):
+        super().__init__()
+        self._cells = {}      # địa điểm -> 7 ô [số event, đăng ký, sức chứa] (Thứ 2 .. Chủ nhật)
+        self._cell_of = {}    # event_id -> (địa điểm, thứ, số đăng ký, sức chứa) đã cộng vào ma trận
+
+    # ====================== QUERY ======================
+
+    def rows(self, limit=None):
+        """[(địa điểm, [(số event, đăng ký, sức chứa) × 7])] - nhiều đăng ký nhất trước"""
+        self._load_deferred()
+        locations = sorted(self._cells.items(),
+                           key=lambda item: sum(cell[1] for cell in item[1]), reverse=True)
+        return [(location, [tuple(cell) for cell in cells]) for location, cells in locations[:limit]]
+
+    def fill_rates(self, limit=None):
+        """[(địa điểm, [tỷ lệ lấp đầy % hoặc None nếu ô không có event] × 7)]"""
+        return [(location, [fill_rate(registered, capacity) if events else None
+                            for events, registered, capacity in cells])
+                for location, cells in self.rows(limit)]
+
+    # ====================== UPDATE ======================
+
+    def _add(self, event_id, location, day, registered, capacity):
+        weekday = day.weekday()
+        self._cell_of[event_id] = (location, weekday, registered, capacity)
+        cells = self._cells.get(location)
+        if cells is None:
+            cells = self._cells[location] = [[0, 0, 0] for _ in WEEKDAYS]
+        cell = cells[weekday]
+        cell[0] += 1
+        cell[1] += registered
+        cell[2] += capacity
+
+    def _remove(self, event_id):
+        entry = self._cell_of.pop(event_id, None)
+        if entry is None:
+            return
+        location, weekday, registered, capacity = entry
+        cells = self._cells[location]
+        cell = cells[weekday]
+        cell[0] -= 1
+        cell[1] -= registered
+        cell[2] -= capacity
+        if not any(cell[0] for cell in cells):
+            del self._cells[location]
+
+    def _update(self, event):
+        self._load_deferred()
+        self._remove(event.event_id)
+        self._add(event.event_id, event.location, event.date, len(event.attendees), event.max_capacity)
+
+    def load(self, rows):
+        """Nạp hàng loạt (event_id, địa điểm, ngày, số đăng ký, sức chứa)"""
+        for row in rows:
+            self._add(*row)
+
+    # ====================== EVENT HOOKS ======================
+
+    def on_event_added(self, event):
+        self._update(event)
+
+    def on_event_removed(self, event):
+        self._load_deferred()
+        self._remove(event.event_id)
+
+    def on_attendee_added(self, event, user_id, registered_at):
+        self._update(event)
+
+    def on_attendee_removed(self, event, user_id, registered_at):
+        self._update(event)
+
+    def on_field_updated(self, event, field, old_value, new_value):
+        if field in ('location', 'date', 'max_capacity'):
+            self._update(event)
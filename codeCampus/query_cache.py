@@ -0,0 +1,95 @@
+# query_cache.py - Cache LRU kết quả tìm kiếm/xem, vô hiệu hóa theo field bị thay đổi
+
+from collections import OrderedDict
+
+from models import EventListener
+
+# Các "field" mà một kết quả có thể phụ thuộc: field của Event (như update_field) và số đăng ký.
+# Mọi kết quả đều phụ thuộc tập event (thêm/xóa event) nên không cần khai báo.
+EVENTS = 'events'
+ATTENDEES = 'attendees'
+
+class QueryCache(EventListener):
+    """Cache LRU: khóa là tiêu chí đã chuẩn hóa, giá trị là kết quả (tuple event_id...)
+
+    - Mỗi thay đổi tăng version chung và version của field bị chạm (thêm/xóa event ->
+      EVENTS, đăng ký/hủy -> ATTENDEES, update_field -> tên field)
+    - Mỗi entry ghi lại version các field nó phụ thuộc lúc tính; khi đọc mà có field
+      đã đổi thì entry bị bỏ (invalidation) - thay đổi field khác không ảnh hưởng
+    - Giá trị lưu trong cache được dùng chung giữa các lần gọi nên phải bất biến
+    """
+
+    def __init__(self, capacity=128):
+        self.capacity = capacity
+        self.version = 0                 # tăng sau mỗi thay đổi dữ liệu
+        self._field_versions = {EVENTS: 0}
+        self._entries = OrderedDict()    # key -> (fields, versions, value), cũ nhất trước
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _versions_of(self, fields):
+        return tuple(self._field_versions.get(field, 0) for field in fields)
+
+    def get(self, key, depends_on, compute):
+        """Kết quả cho key; tính bằng compute() nếu chưa có hoặc đã cũ
+
+        depends_on: các field mà kết quả phụ thuộc (ngoài tập event)
+        """
+        fields = (EVENTS,) + tuple(sorted(depends_on))
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[1] == self._versions_of(entry[0]):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            del self._entries[key]
+            self.invalidations += 1
+
+        self.misses += 1
+        value = compute()
+        if self.capacity > 0:
+            self._entries[key] = (fields, self._versions_of(fields), value)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def stats(self):
+        """Bộ đếm để chọn kích thước cache"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'hit_rate': self.hits / lookups * 100 if lookups else 0.0,
+            'version': self.version,
+        }
+
+    # ====================== EVENT HOOKS ======================
+
+    def _touch(self, field):
+        self.version += 1
+        self._field_versions[field] = self._field_versions.get(field, 0) + 1
+
+    def on_event_added(self, event):
+        self._touch(EVENTS)
+
+    def on_event_removed(self, event):
+        self._touch(EVENTS)
+
+    def on_attendee_added(self, event, user_id, registered_at):
+        self._touch(ATTENDEES)
+
+    def on_attendee_removed(self, event, user_id, registered_at):
+        self._touch(ATTENDEES)
+
+    def on_field_updated(self, event, field, old_value, new_value):
+        self._touch(field)
@@ -0,0 +1,176 @@
+# query_planner.py - Lập kế hoạch cho tìm kiếm nâng cao dựa trên thống kê của các index
+
+from models import fold_text
+from indexes import FillStatusIndex
+from query_cache import ATTENDEES
+
+# Tình trạng của tìm kiếm nâng cao -> các nhóm của FillStatusIndex
+_STATUS_BUCKETS = {
+    'full': (FillStatusIndex.FULL,),
+    'available': FillStatusIndex.AVAILABLE,
+    'empty': (FillStatusIndex.EMPTY,),
+}
+
+class IndexScan:
+    """Bước lấy tập event_id từ một index, kèm ước tính số dòng"""
+    __slots__ = ('label', 'estimate', 'fetch', 'predicate', 'actual')
+
+    def __init__(self, label, estimate, fetch, predicate):
+        self.label = label
+        self.estimate = estimate
+        self.fetch = fetch            # () -> các event_id khớp
+        self.predicate = predicate    # event -> bool, dùng khi bước bị hạ thành bộ lọc
+        self.actual = None
+
+class Filter:
+    """Bước kiểm tra điều kiện trên từng event còn lại"""
+    __slots__ = ('label', 'predicate', 'actual')
+
+    def __init__(self, label, predicate):
+        self.label = label
+        self.predicate = predicate
+        self.actual = None
+
+class QueryPlan:
+    """Kế hoạch thực thi cho dict tiêu chí của SearchManager.advanced_search
+
+    - Tiêu chí có index (tên, địa điểm, ngày, tình trạng) được ước tính số dòng từ index; tên và
+      địa điểm so khớp trên khóa đã bỏ dấu (fold_text) lưu sẵn trong index
+    - Bắt đầu từ index chọn lọc nhất; index tiếp theo chỉ được giao thêm khi ước
+      tính của nó nhỏ hơn số ứng viên hiện có, nếu không thì hạ thành bộ lọc
+    - Các tiêu chí còn lại chỉ được kiểm tra trên các event sống sót
+    Kết quả trả về theo thứ tự ngày (như bảng hiển thị).
+    """
+
+    def __init__(self, system, criteria):
+        self.system = system
+        self.criteria = criteria
+        self.total = len(system.events)
+        self.scans = []
+        self.filters = []
+        self.result_count = None
+        self._compile()
+
+    @staticmethod
+    def cache_key(criteria):
+        """Khóa cache: tiêu chí đã chuẩn hóa (tên/địa điểm bỏ dấu, sắp theo tên tiêu chí)"""
+        normalized = dict(criteria)
+        for field in ('name', 'location'):
+            if field in normalized:
+                normalized[field] = fold_text(normalized[field])
+        return ('advanced',) + tuple(sorted(normalized.items()))
+
+    @staticmethod
+    def dependencies(criteria):
+        """Các field mà kết quả phụ thuộc (ngày luôn có vì kết quả sắp theo ngày)"""
+        fields = {'date'}
+        fields.update(field for field in ('name', 'location') if field in criteria)
+        if 'status' in criteria or 'attendee_range' in criteria:
+            fields.add(ATTENDEES)
+        if 'status' in criteria:
+            fields.add('max_capacity')
+        return fields
+
+    def _compile(self):
+        system, criteria = self.system, self.criteria
+        scans = []
+
+        if 'name' in criteria:
+            name = fold_text(criteria['name'])
+            name_index = system.name_index
+            scans.append(IndexScan(
+                f"tên chứa '{name}'", name_index.estimate(name),
+                lambda: name_index.search(name),
+                lambda event: name_index.matches(event.event_id, name)))
+
+        if 'location' in criteria:
+            location = fold_text(criteria['location'])
+            location_index = system.location_index
+            scans.append(IndexScan(
+                f"địa điểm chứa '{location}'", location_index.count(location),
+                lambda: location_index.event_ids(location),
+                lambda event: location in location_index.key_of(event.location)))
+
+        if 'date_range' in criteria:
+            start_date, end_date = criteria['date_range']
+            scans.append(IndexScan(
+                f"ngày {start_date} .. {end_date}",
+                system.date_index.count_between(start_date, end_date),
+                lambda: system.date_index.between(start_date, end_date),
+                lambda event: start_date <= event.date <= end_date))
+
+        if 'status' in criteria:
+            status = criteria['status']
+            fill_index = system.fill_status_index
+            buckets = _STATUS_BUCKETS[status]
+            scans.append(IndexScan(
+                f"tình trạng = {status}", fill_index.count(*buckets),
+                lambda: fill_index.event_ids(*buckets),
+                lambda event: fill_index.bucket_of(event.event_id) in buckets))
+
+        if 'attendee_range' in criteria:
+            min_val, max_val = criteria['attendee_range']
+            self.filters.append(Filter(f"số đăng ký trong [{min_val}, {max_val}]",
+                                       lambda event: min_val <= len(event.attendees) <= max_val))
+
+        # Chọn thứ tự: ước tính nhỏ nhất trước; index đắt hơn số ứng viên thì lọc trực tiếp
+        scans.sort(key=lambda scan: scan.estimate)
+        rows = self.total
+        demoted = []
+        for scan in scans:
+            if not self.scans or scan.estimate < rows:
+                self.scans.append(scan)
+                rows = min(rows, scan.estimate)
+            else:
+                demoted.append(Filter(scan.label, scan.predicate))
+        # Điều kiện có index bị hạ (rẻ, đã sắp theo độ chọn lọc) chạy trước lọc số đăng ký
+        self.filters = demoted + self.filters
+
+    def execute(self):
+        """Chạy kế hoạch, trả về list event theo thứ tự ngày"""
+        events = self.system.events
+
+        if self.scans:
+            candidates = None
+            for scan in self.scans:
+                ids = scan.fetch()
+                if candidates is None:
+                    candidates = set(ids)
+                else:
+                    candidates.intersection_update(ids)
+                scan.actual = len(candidates)
+                if not candidates:
+                    break
+            survivors = [events[event_id] for event_id in candidates]
+        else:
+            survivors = list(events.values())
+
+        for step in self.filters:
+            survivors = [event for event in survivors if step.predicate(event)]
+            step.actual = len(survivors)
+
+        sort_key = self.system.date_index.sort_key
+        survivors.sort(key=lambda event: sort_key(event.event_id))
+        self.result_count = len(survivors)
+        return survivors
+
+    def explain(self):
+        """Mô tả kế hoạch: các bước, ước tính và số dòng thực tế (nếu đã chạy)"""
+        def actual(step):
+            return f" -> {step.actual}" if step.actual is not None else ""
+
+        lines = ["KẾ HOẠCH TRUY VẤN", f"Tổng số sự kiện: {self.total}"]
+        step_no = 0
+        if not self.scans:
+            step_no += 1
+            lines.append(f"{step_no}. Quét toàn bộ sự kiện (~{self.total} dòng)")
+        for i, scan in enumerate(self.scans):
+            step_no += 1
+            action = "Lấy từ" if i == 0 else "Giao với"
+            lines.append(f"{step_no}. {action} index {scan.label} (~{scan.estimate} dòng){actual(scan)}")
+        for step in self.filters:
+            step_no += 1
+            lines.append(f"{step_no}. Lọc: {step.label}{actual(step)}")
+        if self.result_count is not None:
+            lines.append(f"Kết quả: {self.result_count} sự kiện")
+        return "\n".join(lines)
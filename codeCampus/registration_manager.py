@@ -1,5 +1,7 @@
 # registration_manager.py - Quản lý đăng ký sự kiện
 
+from registration_timeline import format_stamp
+
 class RegistrationManager:
     """Class quản lý đăng ký sự kiện"""
     
@@ -13,10 +15,9 @@ class RegistrationManager:
             return
         
         # Hiển thị events chưa đăng ký
-        available_events = []
-        for event in self.system.events.values():
-            if self.system.current_user.user_id not in event.attendees:
-                available_events.append(event)
+        user_id = self.system.current_user.user_id
+        available_events = [e for e in self.system.events.values() 
+                           if not self.system.registration_index.is_registered(user_id, e.event_id)]
         
         if not available_events:
             print("Không có sự kiện nào để đăng ký")
@@ -43,10 +44,7 @@ class RegistrationManager:
     
     def view_my_registrations(self):
         """Xem sự kiện đã đăng ký (Student/Visitor)"""
-        my_events = []
-        for event in self.system.events.values():
-            if self.system.current_user.user_id in event.attendees:
-                my_events.append(event)
+        my_events = self.system.get_user_registrations(self.system.current_user.user_id)
         
         if not my_events:
             print("Bạn chưa đăng ký sự kiện nào")
@@ -65,8 +63,7 @@ class RegistrationManager:
     def manage_registrations(self):
         """Quản lý đăng ký sự kiện (Organizer)"""
         # Hiển thị sự kiện của organizer
-        my_events = [e for e in self.system.events.values() 
-                    if e.organizer_id == self.system.current_user.user_id]
+        my_events = self.system.get_organizer_events(self.system.current_user.user_id)
         
         if not my_events:
             print("Bạn chưa có sự kiện nào")
@@ -171,15 +168,16 @@ class RegistrationManager:
             print("Chưa có người đăng ký")
             return
         
-        print(f"{'STT':<3} {'Họ tên':<25} {'Email':<30} {'Vai trò':<15}")
-        print("-" * 80)
+        print(f"{'STT':<3} {'Họ tên':<25} {'Email':<30} {'Vai trò':<15} {'Ngày đăng ký':<16}")
+        print("-" * 97)
         
-        for i, user_id in enumerate(event.attendees, 1):
+        for i, (user_id, stamp) in enumerate(event.attendees.registrations(), 1):
+            registered_at = format_stamp(stamp)
             if user_id in self.system.users:
                 attendee = self.system.users[user_id]
-                print(f"{i:<3} {attendee.full_name:<25} {attendee.email:<30} {attendee.role:<15}")
+                print(f"{i:<3} {attendee.full_name:<25} {attendee.email:<30} {attendee.role:<15} {registered_at:<16}")
             else:
-                print(f"{i:<3} {'Unknown User':<25} {'N/A':<30} {'Unknown':<15}")
+                print(f"{i:<3} {'Unknown User':<25} {'N/A':<30} {'Unknown':<15} {registered_at:<16}")
         
         print(f"\nTổng cộng: {len(event.attendees)} người")
     
@@ -214,17 +212,18 @@ class RegistrationManager:
                 
                 # Attendee data
                 writer.writerow(['DANH SÁCH NGƯỜI THAM DỰ'])
-                writer.writerow(['STT', 'Họ tên', 'Email', 'Vai trò'])
+                writer.writerow(['STT', 'Họ tên', 'Email', 'Vai trò', 'Ngày đăng ký'])
                 
-                for i, user_id in enumerate(event.attendees, 1):
+                for i, (user_id, stamp) in enumerate(event.attendees.registrations(), 1):
+                    registered_at = format_stamp(stamp, '%Y-%m-%d %H:%M:%S')
                     if user_id in self.system.users:
                         attendee = self.system.users[user_id]
                         writer.writerow([
-                            i, attendee.full_name, attendee.email, attendee.role
+                            i, attendee.full_name, attendee.email, attendee.role, registered_at
                         ])
                     else:
                         writer.writerow([
-                            i, 'Unknown User', 'N/A', 'Unknown'
+                            i, 'Unknown User', 'N/A', 'Unknown', registered_at
                         ])
             
             print(f"Đã xuất danh sách: {filename}")
@@ -232,6 +231,22 @@ class RegistrationManager:
         except Exception as e:
             print(f"Lỗi xuất file: {e}")
     
+    def _show_registration_rate(self, event):
+        """Tốc độ đăng ký: giờ/ngày đông nhất và đường lấp đầy theo ngày"""
+        timeline = self.system.timeline
+        curve = timeline.fill_curve(event, 'day')
+        if not curve:
+            return
+        
+        print(f"\nTốc độ đăng ký:")
+        peak_hour, hour_count = timeline.peak('hour', event)
+        peak_day, day_count = timeline.peak('day', event)
+        print(f"   Giờ đông nhất: {peak_hour:%Y-%m-%d %H:00} ({hour_count} lượt)")
+        print(f"   Ngày đông nhất: {peak_day:%Y-%m-%d} ({day_count} lượt)")
+        print(f"   Đường lấp đầy theo ngày:")
+        for start, count, total, rate in curve[-10:]:
+            print(f"      {start:%Y-%m-%d}: +{count:<4} -> {total} ({rate:.1f}%)")
+    
     def _show_registration_statistics(self, event):
         """Hiển thị thống kê đăng ký"""
         total_capacity = event.max_capacity
@@ -257,6 +272,8 @@ class RegistrationManager:
             for role, count in role_stats.items():
                 print(f"   {role}: {count} người")
         
+        self._show_registration_rate(event)
+        
         # Cảnh báo nếu gần đầy
         if fill_rate >= 90:
             print(f"\nCảnh báo: Sự kiện sắp đầy!")
@@ -0,0 +1,136 @@
+# registration_timeline.py - Biểu đồ tốc độ đăng ký theo phút/giờ/ngày, cập nhật qua EventBus
+
+from collections import Counter
+from datetime import datetime
+
+from indexes import DeferredIndex
+from reports import fill_rate
+
+# Độ phân giải -> độ rộng một ô (giây)
+RESOLUTIONS = {'minute': 60, 'hour': 3600, 'day': 86400}
+
+# Ô được chia theo giờ địa phương (lệch UTC lấy một lần lúc khởi động, bỏ qua đổi giờ mùa hè)
+_UTC_OFFSET = int(datetime.now().astimezone().utcoffset().total_seconds())
+
+def format_stamp(stamp, pattern='%Y-%m-%d %H:%M'):
+    """Hiển thị thời điểm đăng ký (giây epoch), chuỗi rỗng nếu không rõ"""
+    return datetime.fromtimestamp(stamp).strftime(pattern) if stamp else ''
+
+def _bucket_start(key, width):
+    return datetime.fromtimestamp(key * width - _UTC_OFFSET)
+
+def _new_histograms():
+    return {resolution: Counter() for resolution in RESOLUTIONS}
+
+def _count(histograms, stamp, delta):
+    shifted = stamp + _UTC_OFFSET
+    for resolution, width in RESOLUTIONS.items():
+        counter = histograms[resolution]
+        key = shifted // width
+        counter[key] += delta
+        if counter[key] <= 0:
+            del counter[key]
+
+class RegistrationTimeline(DeferredIndex):
+    """Số lượt đăng ký theo từng phút/giờ/ngày - toàn campus và từng event
+
+    - Đếm ròng: hủy đăng ký trừ lại đúng ô của thời điểm đăng ký ban đầu
+    - Biểu đồ toàn campus cập nhật O(1) mỗi lượt; biểu đồ của một event chỉ được
+      dựng (từ thời điểm lưu trong AttendeeSet) ở lần đầu được hỏi, sau đó cũng
+      cập nhật tăng dần
+    - Lượt đăng ký không rõ thời điểm (dữ liệu cũ, stamp 0) không được tính
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._campus = _new_histograms()
+        self._events = {}     # event_id -> biểu đồ của event (chỉ event đã được hỏi)
+        self._known = 0       # số lượt đăng ký có thời điểm
+
+    # ====================== QUERY ======================
+
+    @property
+    def known_registrations(self):
+        self._load_deferred()
+        return self._known
+
+    def _histograms(self, event=None):
+        self._load_deferred()
+        if event is None:
+            return self._campus
+        histograms = self._events.get(event.event_id)
+        if histograms is None:
+            histograms = self._events[event.event_id] = _new_histograms()
+            for _, stamp in event.attendees.registrations():
+                if stamp:
+                    _count(histograms, stamp, 1)
+        return histograms
+
+    def histogram(self, resolution='day', event=None, last=None):
+        """[(thời điểm bắt đầu ô, số lượt)] theo thứ tự thời gian, chỉ ô có đăng ký;
+        last: chỉ lấy last ô gần nhất"""
+        counter = self._histograms(event)[resolution]
+        keys = sorted(counter)
+        if last is not None:
+            keys = keys[-last:] if last > 0 else []
+        width = RESOLUTIONS[resolution]
+        return [(_bucket_start(key, width), counter[key]) for key in keys]
+
+    def peak(self, resolution='hour', event=None):
+        """(thời điểm bắt đầu ô, số lượt) của ô đông nhất - ô sớm nhất khi bằng nhau; None nếu chưa có"""
+        counter = self._histograms(event)[resolution]
+        if not counter:
+            return None
+        key = min(counter, key=lambda key: (-counter[key], key))
+        return _bucket_start(key, RESOLUTIONS[resolution]), counter[key]
+
+    def fill_curve(self, event, resolution='day'):
+        """[(thời điểm bắt đầu ô, số lượt trong ô, lũy kế, % sức chứa)] của một event"""
+        curve = []
+        total = 0
+        for start, count in self.histogram(resolution, event):
+            total += count
+            curve.append((start, count, total, fill_rate(total, event.max_capacity)))
+        return curve
+
+    # ====================== UPDATE ======================
+
+    def _add(self, event_id, stamp, delta):
+        if not stamp:
+            return
+        self._known += delta
+        _count(self._campus, stamp, delta)
+        histograms = self._events.get(event_id)
+        if histograms is not None:
+            _count(histograms, stamp, delta)
+
+    def load_registration_times(self, pairs):
+        """Nạp các cặp (event_id, thời điểm) của event có danh sách tải lười"""
+        for event_id, stamp in pairs:
+            self._add(event_id, stamp, 1)
+
+    def load(self, rows):
+        self.load_registration_times(rows)
+
+    # ====================== EVENT HOOKS ======================
+
+    def on_event_added(self, event):
+        self._load_deferred()
+        # Danh sách chưa tải (SQLite): thời điểm được nạp qua load_registration_times
+        if event.attendees.is_loaded:
+            for _, stamp in event.attendees.registrations():
+                self._add(event.event_id, stamp, 1)
+
+    def on_event_removed(self, event):
+        self._load_deferred()
+        for _, stamp in event.attendees.registrations():
+            self._add(event.event_id, stamp, -1)
+        self._events.pop(event.event_id, None)
+
+    def on_attendee_added(self, event, user_id, registered_at):
+        self._load_deferred()
+        self._add(event.event_id, registered_at, 1)
+
+    def on_attendee_removed(self, event, user_id, registered_at):
+        self._load_deferred()
+        self._add(event.event_id, registered_at, -1)
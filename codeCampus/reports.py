@@ -0,0 +1,222 @@
+# reports.py - Mô hình báo cáo thống kê: tính một lần, xuất ra nhiều định dạng
+
+import csv
+from datetime import datetime
+
+def fill_rate(registered, capacity):
+    """Tỷ lệ lấp đầy (%), 0 nếu sức chứa không hợp lệ"""
+    return registered / capacity * 100 if capacity > 0 else 0.0
+
+class ReportRow:
+    """Số liệu của một sự kiện trong báo cáo"""
+    __slots__ = ('event_id', 'name', 'date', 'location', 'registered', 'capacity', 'fill_rate')
+
+    def __init__(self, event):
+        self.event_id = event.event_id
+        self.name = event.name
+        self.date = event.date
+        self.location = event.location
+        self.registered = len(event.attendees)
+        self.capacity = event.max_capacity
+        self.fill_rate = fill_rate(self.registered, self.capacity)
+
+class StatisticsReport:
+    """Thống kê của một tập sự kiện, tính trong đúng một lần duyệt
+
+    Các bản Excel/WPS (và màn hình thống kê) đều đọc lại từ object này.
+    """
+
+    def __init__(self, events):
+        self.generated_at = datetime.now()
+        self.rows = []
+        self.total_attendees = 0
+        self.total_capacity = 0
+        self.most_popular = None
+        self.least_popular = None
+        self.occupancy = None      # [(địa điểm, tỷ lệ lấp đầy × 7 thứ)] nếu có ma trận dựng sẵn
+        self.rolling = None        # [(hướng, số ngày, tổng)] của các cửa sổ trượt nếu có
+
+        for event in events:
+            row = ReportRow(event)
+            self.rows.append(row)
+            self.total_attendees += row.registered
+            self.total_capacity += row.capacity
+            # Giữ sự kiện đầu tiên khi bằng nhau (giống max()/min())
+            if self.most_popular is None or row.registered > self.most_popular.registered:
+                self.most_popular = row
+            if self.least_popular is None or row.registered < self.least_popular.registered:
+                self.least_popular = row
+
+    @classmethod
+    def from_indexes(cls, events, stats, ranking, occupancy=None, rolling=None):
+        """Báo cáo cho toàn bộ events đọc từ các index duy trì sẵn: số tổng (StatsRegistry),
+        phổ biến nhất/ít nhất (PopularityRanking), ma trận lấp đầy (OccupancyMatrix),
+        cửa sổ 7/30/90 ngày (RollingWindows); các dòng chi tiết chỉ được tạo khi ghi file"""
+        report = cls(())
+        report.rows = _EventRows(events)
+        report.total_attendees = stats.total_registrations
+        report.total_capacity = stats.total_capacity
+        top, bottom = ranking.top(1), ranking.bottom(1)
+        if top:
+            report.most_popular = ReportRow(events[top[0][0]])
+            report.least_popular = ReportRow(events[bottom[0][0]])
+        if occupancy is not None:
+            report.occupancy = occupancy.fill_rates()
+        if rolling is not None:
+            report.rolling = rolling.summary()
+        return report
+
+    @property
+    def total_events(self):
+        return len(self.rows)
+
+    @property
+    def average_attendees(self):
+        return self.total_attendees / self.total_events if self.total_events > 0 else 0
+
+    @property
+    def overall_fill_rate(self):
+        return fill_rate(self.total_attendees, self.total_capacity)
+
+    @property
+    def timestamp(self):
+        """Hậu tố tên file theo thời điểm tạo báo cáo"""
+        return self.generated_at.strftime('%Y%m%d_%H%M%S')
+
+class _EventRows:
+    """Các dòng báo cáo của mapping events, tạo dần mỗi lần duyệt"""
+
+    def __init__(self, events):
+        self._events = events
+
+    def __len__(self):
+        return len(self._events)
+
+    def __iter__(self):
+        return map(ReportRow, self._events.values())
+
+# ====================== RENDERING ======================
+
+# Nhãn cho từng định dạng: Excel (tiếng Anh, UTF-8 BOM) và WPS (tiếng Việt không dấu, UTF-8 thuần)
+EXCEL_LABELS = {
+    'encoding': 'utf-8-sig',
+    'system': 'CAMPUS EVENT MANAGEMENT SYSTEM',
+    'title': 'STATISTICS REPORT',
+    'generated': 'Generated:',
+    'summary': 'STATISTICS SUMMARY',
+    'summary_report': 'SUMMARY STATISTICS',
+    'total_events': 'Total Events',
+    'total_attendees': 'Total Attendees',
+    'average': 'Average Attendees per Event',
+    'average_report': 'Average per Event',
+    'most_popular': 'MOST POPULAR EVENT',
+    'least_popular': 'LEAST POPULAR EVENT',
+    'event_name': 'Event Name',
+    'attendees': 'Attendees',
+    'details': 'EVENT DETAILS',
+    'details_summary': 'EVENT DETAILS',
+    'columns': ['ID', 'Event Name', 'Date', 'Location', 'Registered', 'Capacity', 'Fill Rate (%)'],
+    'occupancy': 'FILL RATE BY LOCATION AND WEEKDAY (%)',
+    'weekdays': ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'],
+    'rolling': 'ROLLING WINDOWS (BY EVENT DATE)',
+    'rolling_columns': ['Window', 'Events', 'Capacity', 'Registered', 'Fill Rate (%)'],
+    'next': 'Next {} days',
+    'last': 'Last {} days',
+}
+
+WPS_LABELS = {
+    'encoding': 'utf-8',
+    'system': 'HE THONG QUAN LY SU KIEN CAMPUS',
+    'title': 'BAO CAO THONG KE',
+    'generated': 'Tao ngay:',
+    'summary': 'THONG KE TONG QUAN',
+    'summary_report': 'THONG KE TONG QUAN',
+    'total_events': 'Tong so su kien',
+    'total_attendees': 'Tong so nguoi tham du',
+    'average': 'Trung binh nguoi/su kien',
+    'average_report': 'Trung binh moi su kien',
+    'most_popular': 'SU KIEN PHO BIEN NHAT',
+    'least_popular': 'SU KIEN IT QUAN TAM NHAT',
+    'event_name': 'Ten su kien',
+    'attendees': 'So nguoi tham du',
+    'details': 'CHI TIET SU KIEN',
+    'details_summary': 'CHI TIET TUNG SU KIEN',
+    'columns': ['ID', 'Ten su kien', 'Ngay', 'Dia diem', 'Da dang ky', 'Suc chua', 'Ty le (%)'],
+    'occupancy': 'TY LE LAP DAY THEO DIA DIEM VA THU (%)',
+    'weekdays': ['T2', 'T3', 'T4', 'T5', 'T6', 'T7', 'CN'],
+    'rolling': 'CUA SO TRUOT (THEO NGAY DIEN RA)',
+    'rolling_columns': ['Cua so', 'So su kien', 'Suc chua', 'Da dang ky', 'Ty le (%)'],
+    'next': '{} ngay toi',
+    'last': '{} ngay qua',
+}
+
+def _detail_rows(report, with_location=True):
+    """Các dòng chi tiết, sinh dần khi ghi file (không dựng list trung gian)"""
+    for row in report.rows:
+        values = [row.event_id, row.name, str(row.date)]
+        if with_location:
+            values.append(row.location)
+        values += [str(row.registered), str(row.capacity), f"{row.fill_rate:.1f}"]
+        yield values
+
+def write_summary_csv(filename, report, labels):
+    """Báo cáo dạng xuất nhanh (FileManager): tổng quan, phổ biến nhất/ít nhất, chi tiết"""
+    with open(filename, 'w', newline='', encoding=labels['encoding']) as f:
+        writer = csv.writer(f, delimiter=',', quoting=csv.QUOTE_MINIMAL)
+
+        writer.writerow([labels['summary']])
+        writer.writerow([labels['total_events'], str(report.total_events)])
+        writer.writerow([labels['total_attendees'], str(report.total_attendees)])
+        writer.writerow([labels['average'], f"{report.average_attendees:.2f}"])
+        writer.writerow([''])
+
+        if report.rows:
+            for title, row in ((labels['most_popular'], report.most_popular),
+                               (labels['least_popular'], report.least_popular)):
+                writer.writerow([title])
+                writer.writerow([labels['event_name'], row.name])
+                writer.writerow([labels['attendees'], str(row.registered)])
+                writer.writerow([''])
+
+        writer.writerow([labels['details_summary']])
+        columns = labels['columns']
+        writer.writerow(columns[:3] + columns[4:])
+        writer.writerows(_detail_rows(report, with_location=False))
+    return filename
+
+def write_statistics_csv(filename, report, labels):
+    """Báo cáo thống kê đầy đủ (StatisticsManager): tiêu đề, tổng quan, chi tiết có địa điểm"""
+    with open(filename, 'w', newline='', encoding=labels['encoding']) as f:
+        writer = csv.writer(f, delimiter=',')
+
+        writer.writerow([labels['system']])
+        writer.writerow([labels['title']])
+        writer.writerow([labels['generated'], report.generated_at.strftime('%Y-%m-%d %H:%M:%S')])
+        writer.writerow([])
+
+        writer.writerow([labels['summary_report']])
+        writer.writerow([labels['total_events'], str(report.total_events)])
+        writer.writerow([labels['total_attendees'], str(report.total_attendees)])
+        writer.writerow([labels['average_report'], f"{report.average_attendees:.2f}"])
+        writer.writerow([])
+
+        if report.rolling:
+            writer.writerow([labels['rolling']])
+            writer.writerow(labels['rolling_columns'])
+            for direction, days, totals in report.rolling:
+                writer.writerow([labels[direction].format(days), str(totals['events']),
+                                 str(totals['capacity']), str(totals['registrations']),
+                                 f"{totals['fill_rate']:.1f}"])
+            writer.writerow([])
+
+        if report.occupancy:
+            writer.writerow([labels['occupancy']])
+            writer.writerow([labels['columns'][3]] + labels['weekdays'])
+            for location, rates in report.occupancy:
+                writer.writerow([location] + ['' if rate is None else f"{rate:.1f}" for rate in rates])
+            writer.writerow([])
+
+        writer.writerow([labels['details']])
+        writer.writerow(labels['columns'])
+        writer.writerows(_detail_rows(report))
+    return filename
@@ -0,0 +1,158 @@
+# rolling_stats.py - Thống kê cửa sổ trượt 7/30/90 ngày từ tổng theo ngày trong vòng đệm
+
+from array import array
+from datetime import date
+
+from indexes import DeferredIndex
+from reports import fill_rate
+
+WINDOWS = (7, 30, 90)
+HISTORY_DAYS = max(WINDOWS)    # số ngày đã qua (kể cả hôm nay) luôn nằm trong vòng đệm
+RING_DAYS = 256
+
+class RollingWindows(DeferredIndex):
+    """Số event, sức chứa, số đăng ký theo ngày diễn ra, gom theo cửa sổ N ngày tới/qua
+
+    - Vòng đệm RING_DAYS ô phủ các ngày [hôm nay - HISTORY_DAYS + 1, + RING_DAYS);
+      ngày nằm ngoài (xa hơn) được giữ trong dict phụ
+    - Mỗi thay đổi chỉ cộng/trừ vào đúng ô ngày của event, O(1)
+    - Sang ngày mới, vòng đệm trượt đi một ô: ô ngày cũ nhất được nhường cho ngày
+      mới ở cuối (lấy từ dict phụ nếu có) - O(1) mỗi ngày trượt
+    - Truy vấn một cửa sổ cộng đúng số ô trong cửa sổ, O(số ngày)
+    """
+    snapshot_fields = ('date', 'max_capacity', 'attendee_count')
+
+    def __init__(self, today=date.today):
+        super().__init__()
+        self._today = today
+        self._origin = today().toordinal() - HISTORY_DAYS + 1   # ordinal của ô đầu vòng
+        self._events = array('q', [0]) * RING_DAYS
+        self._capacity = array('q', [0]) * RING_DAYS
+        self._registered = array('q', [0]) * RING_DAYS
+        self._overflow = {}    # ordinal -> [số event, sức chứa, đăng ký] ngoài vòng đệm
+
+    # ====================== QUERY ======================
+
+    def window(self, first_day, days):
+        """Tổng của days ngày bắt đầu từ first_day"""
+        self._load_deferred()
+        self._slide()
+        events = capacity = registered = 0
+        start = first_day.toordinal()
+        for ordinal in range(start, start + days):
+            if self._origin <= ordinal < self._origin + RING_DAYS:
+                slot = ordinal % RING_DAYS
+                events += self._events[slot]
+                capacity += self._capacity[slot]
+                registered += self._registered[slot]
+            else:
+                totals = self._overflow.get(ordinal)
+                if totals is not None:
+                    events += totals[0]
+                    capacity += totals[1]
+                    registered += totals[2]
+        return {
+            'events': events,
+            'capacity': capacity,
+            'registrations': registered,
+            'fill_rate': fill_rate(registered, capacity),
+        }
+
+    def upcoming(self, days):
+        """Event diễn ra trong days ngày tới (tính cả hôm nay)"""
+        return self.window(self._today(), days)
+
+    def recent(self, days):
+        """Event đã diễn ra trong days ngày qua (tính cả hôm nay)"""
+        return self.window(date.fromordinal(self._today().toordinal() - days + 1), days)
+
+    def summary(self):
+        """[(hướng 'next'/'last', số ngày, tổng)] cho mọi cửa sổ trong WINDOWS"""
+        return ([('next', days, self.upcoming(days)) for days in WINDOWS] +
+                [('last', days, self.recent(days)) for days in WINDOWS])
+
+    # ====================== SLIDING ======================
+
+    def _slide(self):
+        """Trượt vòng đệm tới hôm nay"""
+        target = self._today().toordinal() - HISTORY_DAYS + 1
+        if target == self._origin:
+            return
+        if not 0 < target - self._origin < RING_DAYS:
+            return self._rebase(target)
+        while self._origin < target:
+            self._release(self._origin)
+            self._origin += 1
+            self._claim(self._origin + RING_DAYS - 1)
+
+    def _release(self, ordinal):
+        """Chuyển ô của ordinal sang dict phụ (nếu khác 0) và xóa ô"""
+        slot = ordinal % RING_DAYS
+        if self._events[slot] or self._registered[slot] or self._capacity[slot]:
+            self._overflow[ordinal] = [self._events[slot], self._capacity[slot], self._registered[slot]]
+            self._events[slot] = self._capacity[slot] = self._registered[slot] = 0
+
+    def _claim(self, ordinal):
+        """Đưa tổng của ordinal từ dict phụ vào ô của nó"""
+        totals = self._overflow.pop(ordinal, None)
+        if totals is not None:
+            slot = ordinal % RING_DAYS
+            self._events[slot], self._capacity[slot], self._registered[slot] = totals
+
+    def _rebase(self, origin):
+        """Nhảy vòng đệm tới origin (đổi ngày xa hoặc lùi đồng hồ) - O(RING_DAYS + dict phụ)"""
+        for ordinal in range(self._origin, self._origin + RING_DAYS):
+            self._release(ordinal)
+        self._origin = origin
+        for ordinal in [day for day in self._overflow if origin <= day < origin + RING_DAYS]:
+            self._claim(ordinal)
+
+    # ====================== UPDATE ======================
+
+    def _bump(self, day, events, capacity, registered):
+        ordinal = day.toordinal()
+        if self._origin <= ordinal < self._origin + RING_DAYS:
+            slot = ordinal % RING_DAYS
+            self._events[slot] += events
+            self._capacity[slot] += capacity
+            self._registered[slot] += registered
+        else:
+            totals = self._overflow.setdefault(ordinal, [0, 0, 0])
+            totals[0] += events
+            totals[1] += capacity
+            totals[2] += registered
+            if not any(totals):
+                del self._overflow[ordinal]
+
+    def load(self, rows):
+        """Nạp hàng loạt (event_id, ngày, sức chứa, số đăng ký)"""
+        for _, day, capacity, registered in rows:
+            self._bump(day, 1, capacity, registered)
+
+    # ====================== EVENT HOOKS ======================
+
+    def on_event_added(self, event):
+        self._load_deferred()
+        self._bump(event.date, 1, event.max_capacity, len(event.attendees))
+
+    def on_event_removed(self, event):
+        self._load_deferred()
+        self._bump(event.date, -1, -event.max_capacity, -len(event.attendees))
+
+    def on_attendee_added(self, event, user_id, registered_at):
+        self._load_deferred()
+        self._bump(event.date, 0, 0, 1)
+
+    def on_attendee_removed(self, event, user_id, registered_at):
+        self._load_deferred()
+        self._bump(event.date, 0, 0, -1)
+
+    def on_field_updated(self, event, field, old_value, new_value):
+        if field == 'date':
+            self._load_deferred()
+            registered = len(event.attendees)
+            self._bump(old_value, -1, -event.max_capacity, -registered)
+            self._bump(new_value, 1, event.max_capacity, registered)
+        elif field == 'max_capacity':
+            self._load_deferred()
+            self._bump(event.date, 0, new_value - old_value, 0)
@@ -1,12 +1,16 @@
 # search_manager.py - Quản lý tìm kiếm và lọc sự kiện
 
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
+
+from event_queries import PAGE_SIZE
+from autocomplete import LIST_ALL_LIMIT
 
 class SearchManager:
-    """Class quản lý tìm kiếm và lọc sự kiện"""
+    """Class quản lý tìm kiếm và lọc sự kiện: nhập tiêu chí, gọi system.queries, hiển thị"""
     
     def __init__(self, system):
         self.system = system
+        self.queries = system.queries
     
     def search_events(self):
         """Menu tìm kiếm sự kiện với nhiều tiêu chí"""
@@ -18,9 +22,11 @@ class SearchManager:
         print("4. Tìm theo organizer")
         print("5. Lọc theo tình trạng đăng ký")
         print("6. Tìm kiếm nâng cao")
+        print("7. Tìm kiếm nâng cao (xem kế hoạch truy vấn)")
+        print("8. Tìm toàn văn trong tên và mô tả (xếp theo độ liên quan)")
         print("0. Quay lại")
         
-        choice = input("\nChọn cách tìm kiếm (0-6): ").strip()
+        choice = input("\nChọn cách tìm kiếm (0-8): ").strip()
         
         if choice == '1':
             self.search_by_name()
@@ -34,6 +40,10 @@ class SearchManager:
             self.filter_by_registration_status()
         elif choice == '6':
             self.advanced_search()
+        elif choice == '7':
+            self.advanced_search(explain=True)
+        elif choice == '8':
+            self.search_full_text()
         elif choice == '0':
             return
         else:
@@ -41,44 +51,92 @@ class SearchManager:
     
     def search_by_name(self):
         """Tìm kiếm theo tên sự kiện"""
-        search_term = input("\nNhập tên sự kiện cần tìm: ").strip()
+        search_term = input("\nNhập tên sự kiện cần tìm (kết thúc bằng '?' để xem gợi ý): ").strip()
+        
+        if search_term.endswith('?'):
+            # Gợi ý tên bắt đầu bằng phần đã gõ, event nhiều đăng ký nhất trước
+            event_ids = self.system.autocomplete.complete_event_names(search_term[:-1])
+            names = list(dict.fromkeys(self.system.events[event_id].name for event_id in event_ids))
+            search_term = self._pick_suggestion(names, "tên sự kiện")
+            if search_term is None:
+                return
         
         if not search_term:
             print("Vui lòng nhập từ khóa tìm kiếm")
             return
         
-        found_events = []
-        search_term_lower = search_term.lower()
+        # Index trigram trên tên đã bỏ dấu: "hoi thao" khớp "Hội thảo"; không khớp thì thử sửa lỗi gõ
+        result = self.queries.by_name(search_term)
+        self._display_matches(result, "tên", search_term)
+    
+    def search_full_text(self):
+        """Tìm toàn văn trên tên + mô tả, xếp hạng BM25"""
+        query = input("\nNhập nội dung cần tìm (tên, mô tả): ").strip()
+        
+        if not query:
+            print("Vui lòng nhập từ khóa tìm kiếm")
+            return
         
-        for event in self.system.events.values():
-            if search_term_lower in event.name.lower():
-                found_events.append(event)
+        result = self.queries.full_text(query)
+        if result:
+            print(f"\nĐỘ LIÊN QUAN:")
+            for rank, (event, score) in enumerate(zip(result, result.scores), 1):
+                print(f"   {rank:>2}. {event.event_id:<8} {score:6.2f}  {event.name[:40]}")
         
-        self._display_search_results(found_events, f"tên chứa '{search_term}'")
+        self._display_search_results(result, f"toàn văn '{query}'")
     
     def search_by_location(self):
         """Tìm kiếm theo địa điểm"""
-        # Hiển thị các địa điểm có sẵn
-        locations = set(event.location for event in self.system.events.values())
+        # Chỉ hiện các địa điểm nhiều lượt đăng ký nhất thay vì toàn bộ
+        autocomplete = self.system.autocomplete
+        popular = autocomplete.complete_locations()
         
-        print(f"\nCÁC ĐỊA ĐIỂM CÓ SẴN:")
-        for i, location in enumerate(sorted(locations), 1):
+        print(f"\nCÁC ĐỊA ĐIỂM PHỔ BIẾN ({len(popular)}/{autocomplete.location_count()}):")
+        for i, location in enumerate(popular, 1):
             print(f"{i}. {location}")
         
-        search_term = input(f"\nNhập địa điểm cần tìm (hoặc từ khóa): ").strip()
+        search_term = input(f"\nNhập địa điểm cần tìm (hoặc từ khóa, kết thúc bằng '?' để xem gợi ý): ").strip()
+        
+        if search_term.endswith('?'):
+            search_term = self._pick_suggestion(autocomplete.complete_locations(search_term[:-1]), "địa điểm")
+            if search_term is None:
+                return
         
         if not search_term:
             print("Vui lòng nhập địa điểm")
             return
         
-        found_events = []
-        search_term_lower = search_term.lower()
+        # Khóa địa điểm đã bỏ dấu sẵn trong index - chỉ so từng địa điểm khác nhau một lần
+        result = self.queries.by_location(search_term)
+        self._display_matches(result, "địa điểm", search_term)
+    
+    def _pick_suggestion(self, suggestions, label):
+        """Cho chọn một gợi ý theo số; None nếu không có gợi ý hoặc chọn không hợp lệ"""
+        if not suggestions:
+            print(f"Không có {label} nào bắt đầu như vậy")
+            return None
         
-        for event in self.system.events.values():
-            if search_term_lower in event.location.lower():
-                found_events.append(event)
+        print(f"\nGỢI Ý {label.upper()}:")
+        for i, suggestion in enumerate(suggestions, 1):
+            print(f"{i}. {suggestion}")
         
-        self._display_search_results(found_events, f"địa điểm chứa '{search_term}'")
+        try:
+            choice = int(input(f"\nChọn {label} (1-{len(suggestions)}): ")) - 1
+            if choice < 0:
+                raise IndexError
+            return suggestions[choice]
+        except (ValueError, IndexError):
+            print("Lựa chọn không hợp lệ")
+            return None
+    
+    def _display_matches(self, result, field_label, search_term):
+        """Hiển thị kết quả tìm theo từ khóa, báo rõ khi đó là kết quả gần đúng"""
+        if result and result.is_fuzzy:
+            phrases = ', '.join(f"'{phrase}'" for phrase in result.phrases)
+            print(f"\nKhông có {field_label} chứa '{search_term}', hiển thị kết quả gần đúng")
+            self._display_search_results(result, f"{field_label} gần giống '{search_term}' ({phrases})")
+        else:
+            self._display_search_results(result, f"{field_label} chứa '{search_term}'")
     
     def search_by_date(self):
         """Tìm kiếm theo ngày"""
@@ -92,22 +150,19 @@ class SearchManager:
         choice = input("\nChọn (1-5): ").strip()
         
         today = date.today()
-        found_events = []
         search_description = ""
         
         if choice == '1':
             # Sự kiện hôm nay
-            found_events = [e for e in self.system.events.values() if e.date == today]
+            date_range = (today, today)
             search_description = "hôm nay"
             
         elif choice == '2':
             # Sự kiện tuần này
-            from datetime import timedelta
             week_start = today - timedelta(days=today.weekday())
             week_end = week_start + timedelta(days=6)
             
-            found_events = [e for e in self.system.events.values() 
-                          if week_start <= e.date <= week_end]
+            date_range = (week_start, week_end)
             search_description = "tuần này"
             
         elif choice == '3':
@@ -118,8 +173,7 @@ class SearchManager:
             else:
                 month_end = today.replace(month=today.month + 1, day=1) - timedelta(days=1)
             
-            found_events = [e for e in self.system.events.values() 
-                          if month_start <= e.date <= month_end]
+            date_range = (month_start, month_end)
             search_description = "tháng này"
             
         elif choice == '4':
@@ -127,7 +181,7 @@ class SearchManager:
             date_str = input("Nhập ngày (YYYY-MM-DD): ").strip()
             try:
                 search_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                found_events = [e for e in self.system.events.values() if e.date == search_date]
+                date_range = (search_date, search_date)
                 search_description = f"ngày {search_date}"
             except ValueError:
                 print("Format ngày không đúng")
@@ -146,8 +200,7 @@ class SearchManager:
                     print("Ngày bắt đầu phải trước ngày kết thúc")
                     return
                 
-                found_events = [e for e in self.system.events.values() 
-                              if start_date <= e.date <= end_date]
+                date_range = (start_date, end_date)
                 search_description = f"từ {start_date} đến {end_date}"
                 
             except ValueError:
@@ -157,40 +210,41 @@ class SearchManager:
             print("Lựa chọn không hợp lệ")
             return
         
-        self._display_search_results(found_events, search_description)
+        # Index ngày trả kết quả đã sắp theo ngày
+        self._display_search_results(self.queries.between(*date_range), search_description)
     
     def search_by_organizer(self):
         """Tìm kiếm theo organizer"""
-        # Hiển thị danh sách organizers
-        organizers = {}
-        for event in self.system.events.values():
-            if event.organizer_id in self.system.users:
-                organizer = self.system.users[event.organizer_id]
-                if organizer.user_id not in organizers:
-                    organizers[organizer.user_id] = {
-                        'name': organizer.full_name,
-                        'events': []
-                    }
-                organizers[organizer.user_id]['events'].append(event)
-        
-        if not organizers:
+        organizer_index = self.system.organizer_index
+        org_ids = [org_id for org_id in organizer_index.organizers() if org_id in self.system.users]
+        
+        if not org_ids:
             print("Không có organizer nào")
             return
         
+        if len(org_ids) > LIST_ALL_LIMIT:
+            # Nhiều organizer: gõ đầu họ tên/username, gợi ý organizer nhiều lượt đăng ký nhất
+            prefix = input(f"\nCó {len(org_ids)} organizer. Nhập đầu họ tên hoặc username: ").strip()
+            org_ids = [org_id for org_id in self.system.autocomplete.complete_users("EventOrganizer", prefix)
+                       if organizer_index.count_of(org_id) > 0]
+            if not org_ids:
+                print(f"Không có organizer nào khớp '{prefix}'")
+                return
+        
         print(f"\nDANH SÁCH ORGANIZERS:")
-        org_list = list(organizers.items())
+        org_list = [(org_id, {'name': self.system.users[org_id].full_name,
+                              'event_count': organizer_index.count_of(org_id)})
+                    for org_id in org_ids]
         for i, (org_id, org_info) in enumerate(org_list, 1):
-            event_count = len(org_info['events'])
-            print(f"{i}. {org_info['name']} ({event_count} sự kiện)")
+            print(f"{i}. {org_info['name']} ({org_info['event_count']} sự kiện)")
         
         try:
             choice = int(input(f"\nChọn organizer (1-{len(org_list)}): ")) - 1
             selected_org_id, selected_org_info = org_list[choice]
             
-            found_events = selected_org_info['events']
             search_description = f"organizer '{selected_org_info['name']}'"
             
-            self._display_search_results(found_events, search_description)
+            self._display_search_results(self.queries.by_organizer(selected_org_id), search_description)
             
         except (ValueError, IndexError):
             print("Lựa chọn không hợp lệ")
@@ -206,35 +260,23 @@ class SearchManager:
         
         choice = input("\nChọn (1-5): ").strip()
         
-        found_events = []
-        search_description = ""
-        
-        for event in self.system.events.values():
-            fill_rate = len(event.attendees) / event.max_capacity if event.max_capacity > 0 else 0
-            
-            if choice == '1' and fill_rate >= 1.0:
-                found_events.append(event)
-                search_description = "đã đầy"
-            elif choice == '2' and 0.8 <= fill_rate < 1.0:
-                found_events.append(event)
-                search_description = "gần đầy (80-99%)"
-            elif choice == '3' and fill_rate < 0.5:
-                found_events.append(event)
-                search_description = "còn nhiều chỗ"
-            elif choice == '4' and fill_rate == 0:
-                found_events.append(event)
-                search_description = "chưa có đăng ký"
-            elif choice == '5' and fill_rate < 1.0:
-                found_events.append(event)
-                search_description = "còn chỗ"
-        
-        if choice in ['1', '2', '3', '4', '5']:
-            self._display_search_results(found_events, search_description)
-        else:
+        # Mỗi lựa chọn đọc một hoặc vài nhóm của index tình trạng
+        statuses = {
+            '1': ('full', "đã đầy"),
+            '2': ('nearly_full', "gần đầy (80-99%)"),
+            '3': ('spacious', "còn nhiều chỗ"),
+            '4': ('empty', "chưa có đăng ký"),
+            '5': ('available', "còn chỗ"),
+        }
+        if choice not in statuses:
             print("Lựa chọn không hợp lệ")
+            return
+        
+        status, search_description = statuses[choice]
+        self._display_search_results(self.queries.by_fill_status(status), search_description)
     
-    def advanced_search(self):
-        """Tìm kiếm nâng cao với nhiều tiêu chí"""
+    def advanced_search(self, explain=False):
+        """Tìm kiếm nâng cao với nhiều tiêu chí (explain: in kế hoạch truy vấn đã chọn)"""
         print(f"\nTÌM KIẾM NÂNG CAO")
         print("Có thể để trống các tiêu chí không muốn lọc")
         print("-" * 40)
@@ -285,58 +327,17 @@ class SearchManager:
             except ValueError:
                 print("Số không hợp lệ, bỏ qua tiêu chí số lượng")
         
-        # Thực hiện tìm kiếm
-        found_events = self._apply_advanced_criteria(criteria)
+        # Thực hiện tìm kiếm (kết quả cache theo tiêu chí; xem kế hoạch thì chạy lại để có số thực tế)
+        if explain:
+            plan, result = self.queries.explain(criteria)
+            print()
+            print(plan.explain())
+        else:
+            result = self.queries.advanced(criteria)
         
-        # Hiển thị kết quả
+        # Hiển thị kết quả (kế hoạch trả về theo thứ tự ngày)
         criteria_desc = self._build_criteria_description(criteria)
-        self._display_search_results(found_events, criteria_desc)
-    
-    def _apply_advanced_criteria(self, criteria):
-        """Áp dụng các tiêu chí tìm kiếm nâng cao"""
-        found_events = []
-        
-        for event in self.system.events.values():
-            match = True
-            
-            # Kiểm tra tên
-            if 'name' in criteria:
-                if criteria['name'] not in event.name.lower():
-                    match = False
-            
-            # Kiểm tra địa điểm
-            if 'location' in criteria and match:
-                if criteria['location'] not in event.location.lower():
-                    match = False
-            
-            # Kiểm tra ngày
-            if 'date_range' in criteria and match:
-                start_date, end_date = criteria['date_range']
-                if not (start_date <= event.date <= end_date):
-                    match = False
-            
-            # Kiểm tra tình trạng
-            if 'status' in criteria and match:
-                fill_rate = len(event.attendees) / event.max_capacity if event.max_capacity > 0 else 0
-                
-                if criteria['status'] == 'full' and fill_rate < 1.0:
-                    match = False
-                elif criteria['status'] == 'available' and fill_rate >= 1.0:
-                    match = False
-                elif criteria['status'] == 'empty' and len(event.attendees) > 0:
-                    match = False
-            
-            # Kiểm tra số lượng người tham dự
-            if 'attendee_range' in criteria and match:
-                min_val, max_val = criteria['attendee_range']
-                attendee_count = len(event.attendees)
-                if not (min_val <= attendee_count <= max_val):
-                    match = False
-            
-            if match:
-                found_events.append(event)
-        
-        return found_events
+        self._display_search_results(result, criteria_desc)
     
     def _build_criteria_description(self, criteria):
         """Tạo mô tả tiêu chí tìm kiếm"""
@@ -369,13 +370,13 @@ class SearchManager:
         
         return " và ".join(descriptions) if descriptions else "không có tiêu chí"
     
-    def _display_search_results(self, found_events, search_description):
-        """Hiển thị kết quả tìm kiếm"""
-        if not found_events:
+    def _display_search_results(self, result, search_description):
+        """Hiển thị ResultSet theo thứ tự của nó (ngày hoặc độ liên quan), từng trang PAGE_SIZE dòng"""
+        if not result:
             print(f"\nKhông tìm thấy sự kiện nào với tiêu chí: {search_description}")
             return
         
-        print(f"\nTÌM THẤY {len(found_events)} SỰ KIỆN")
+        print(f"\nTÌM THẤY {len(result)} SỰ KIỆN")
         print(f"Tiêu chí: {search_description}")
         print("="*60)
         
@@ -383,9 +384,15 @@ class SearchManager:
         print(f"{'ID':<8} {'Tên sự kiện':<30} {'Ngày':<12} {'Đăng ký':<10}")
         print("-" * 70)
         
-        for event in sorted(found_events, key=lambda e: e.date):
-            attendance = f"{len(event.attendees)}/{event.max_capacity}"
-            print(f"{event.event_id:<8} {event.name[:29]:<30} {event.date:<12} {attendance:<10}")
+        page_count = result.page_count(PAGE_SIZE)
+        for number, page in enumerate(result.pages(PAGE_SIZE), 1):
+            for event in page:
+                attendance = f"{len(event.attendees)}/{event.max_capacity}"
+                print(f"{event.event_id:<8} {event.name[:29]:<30} {event.date:<12} {attendance:<10}")
+            if number < page_count:
+                more = input(f"-- Trang {number}/{page_count} - 'n' xem trang sau, Enter để dừng: ")
+                if more.strip().lower() != 'n':
+                    break
         
         # Menu hành động với kết quả
         print(f"\nHÀNH ĐỘNG VỚI KẾT QUẢ:")
@@ -397,28 +404,22 @@ class SearchManager:
         choice = input("\nChọn (0-3): ").strip()
         
         if choice == '1':
-            self._view_search_result_details(found_events)
+            self._view_search_result_details(result)
         elif choice == '2':
-            self._register_from_search_results(found_events)
+            self._register_from_search_results(result)
         elif choice == '3':
-            self._export_search_results(found_events, search_description)
+            self._export_search_results(result, search_description)
         elif choice == '0':
             return
         else:
             print("Lựa chọn không hợp lệ")
     
-    def _view_search_result_details(self, events):
+    def _view_search_result_details(self, result):
         """Xem chi tiết từ kết quả tìm kiếm"""
         event_id = input("Nhập ID sự kiện để xem chi tiết: ").strip()
         
-        target_event = None
-        for event in events:
-            if event.event_id == event_id:
-                target_event = event
-                break
-        
-        if target_event:
-            self.system.view_ops.show_event_details(target_event)
+        if event_id in result:
+            self.system.view_ops.show_event_details(self.system.events[event_id])
         else:
             print("Event ID không có trong kết quả tìm kiếm")
     
@@ -428,10 +429,11 @@ class SearchManager:
             print("Chỉ Student/Visitor mới có thể đăng ký")
             return
         
-        # Lọc events có thể đăng ký
+        # Lọc events có thể đăng ký (dùng index đăng ký của user)
+        user_id = self.system.current_user.user_id
         available_events = []
         for event in events:
-            if (self.system.current_user.user_id not in event.attendees and 
+            if (not self.system.registration_index.is_registered(user_id, event.event_id) and 
                 len(event.attendees) < event.max_capacity):
                 available_events.append(event)
         
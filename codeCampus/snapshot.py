@@ -0,0 +1,520 @@
+# snapshot.py - Snapshot nhị phân (memory-mapped) để khởi động gần như tức thì
+#
+# Bố cục file (little-endian - mảng array/memoryview theo byte order của máy, x86/ARM đều là
+# little-endian; các section căn 8 byte):
+#   HEADER        magic, dấu của users.csv/events.csv, số lượng, offset các section
+#   STRING TABLE  offset (uint64, n+1 phần tử) + dữ liệu UTF-8 - mỗi chuỗi chỉ lưu 1 lần
+#   USERS         bản ghi cố định USER_RECORD (tham chiếu chuỗi + mã role)
+#   USER ORDER    chỉ số bản ghi user sắp theo user_id - binary search
+#   EVENTS        bản ghi cố định EVENT_RECORD
+#   EVENT ORDER   chỉ số bản ghi event sắp theo event_id - binary search
+#   ATTENDEES     mỗi event: chỉ số chuỗi của user_id, mã hóa delta + zigzag varint
+
+import os
+import sys
+import mmap
+import struct
+from array import array
+from collections.abc import MutableMapping
+from functools import partial
+from datetime import date, time
+
+from models import Event, LazyAttendeeSet, ROLES, ROLE_CODES, USER_CLASSES
+from journal import sync_file
+
+MAGIC = b'CCSNAP02'
+
+# magic | dấu users.csv, events.csv (size, mtime_ns, inode) | số chuỗi, user, event |
+# số đăng ký | offset: string offsets, string data, users, user order, events, event order, attendees
+HEADER = struct.Struct('<8s6q3I4xQ7Q')
+
+# user_id, username, full_name, email (chỉ số chuỗi), role_code
+USER_RECORD = struct.Struct('<4IB3x')
+
+# event_id, name, description (chỉ số chuỗi), date (ordinal), time (micro giây trong ngày),
+# location, max_capacity, organizer_id, số người tham dự, số byte attendees, offset attendees
+# (attendees: delta chỉ số chuỗi user_id, sau đó là delta thời điểm đăng ký nếu có)
+EVENT_RECORD = struct.Struct('<4IQ5I4xQ')
+
+_KEY = struct.Struct('<I')
+
+# ====================== ENCODING ======================
+
+def _file_stamp(path):
+    """Dấu nhận diện phiên bản file CSV: snapshot chỉ dùng được khi dấu còn khớp"""
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns, st.st_ino
+
+def data_stamps(users_file, events_file):
+    """Dấu của cặp users.csv/events.csv (cùng dạng Snapshot.stamps)"""
+    return _file_stamp(users_file), _file_stamp(events_file)
+
+def _time_to_us(value):
+    return ((value.hour * 60 + value.minute) * 60 + value.second) * 10**6 + value.microsecond
+
+def _time_from_us(us):
+    seconds, microsecond = divmod(us, 10**6)
+    minutes, second = divmod(seconds, 60)
+    hour, minute = divmod(minutes, 60)
+    return time(hour, minute, second, microsecond)
+
+def _encode_deltas(values, out):
+    """Ghi dãy số nguyên dạng delta (giữ nguyên thứ tự) + zigzag varint vào bytearray"""
+    previous = 0
+    for value in values:
+        delta = value - previous
+        previous = value
+        delta = delta * 2 if delta >= 0 else -delta * 2 - 1
+        while delta >= 0x80:
+            out.append((delta & 0x7f) | 0x80)
+            delta >>= 7
+        out.append(delta)
+
+def _decode_deltas(data):
+    """Ngược lại của _encode_deltas"""
+    values = []
+    current = value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        current += (value >> 1) if not value & 1 else -((value + 1) >> 1)
+        values.append(current)
+        value = shift = 0
+    return values
+
+def _pad(f):
+    """Căn vị trí ghi về bội số của 8, trả về offset mới"""
+    offset = f.tell()
+    padding = -offset % 8
+    if padding:
+        f.write(b'\0' * padding)
+    return offset + padding
+
+def write_snapshot(path, user_rows, event_rows, users_file, events_file):
+    """Ghi snapshot từ các dòng users/events (cùng thứ tự cột với file CSV)
+
+    Dấu của users_file/events_file được lấy trước khi đọc dòng, nên các dòng phải
+    được đọc từ chính hai file đó. Ghi file tạm, fsync rồi os.replace.
+    """
+    stamps = _file_stamp(users_file) + _file_stamp(events_file)
+
+    # Bảng chuỗi được mã hóa dần vào blob, chỉ giữ thêm dict chuỗi -> chỉ số
+    strings = {}
+    blob = bytearray()
+    string_offsets = array('Q', [0])
+    def ref(value):
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+            blob.extend(value.encode('utf-8'))
+            string_offsets.append(len(blob))
+        return index
+
+    users = bytearray()
+    user_ids = []
+    for user_id, username, full_name, email, role in user_rows:
+        if role not in ROLE_CODES:
+            raise ValueError(f"Vai trò không hợp lệ: {role}")
+        user_ids.append(user_id)
+        users += USER_RECORD.pack(ref(user_id), ref(username), ref(full_name), ref(email), ROLE_CODES[role])
+
+    events = bytearray()
+    event_ids = []
+    attendees = bytearray()
+    n_registrations = 0
+    for (event_id, name, description, date_str, time_str,
+         location, max_capacity, organizer_id, attendees_str, *rest) in event_rows:
+        event_ids.append(event_id)
+        attendee_ids = attendees_str.split(';') if attendees_str else ()
+        start = len(attendees)
+        values = [ref(user_id) for user_id in attendee_ids]
+        if rest and rest[0]:
+            values.extend(map(int, rest[0].split(';')))
+        _encode_deltas(values, attendees)
+        n_registrations += len(attendee_ids)
+        events += EVENT_RECORD.pack(
+            ref(event_id), ref(name), ref(description),
+            date.fromisoformat(date_str).toordinal(), _time_to_us(time.fromisoformat(time_str)),
+            ref(location), int(max_capacity), ref(organizer_id),
+            len(attendee_ids), len(attendees) - start, start
+        )
+    n_strings = len(strings)
+    del strings
+
+    def order(keys):
+        # So sánh str theo code point trùng với so sánh bytes UTF-8 lúc binary search
+        return array('I', sorted(range(len(keys)), key=keys.__getitem__))
+
+    temp_file = path + '.tmp'
+    with open(temp_file, 'wb') as f:
+        f.write(b'\0' * HEADER.size)
+        offsets = []
+        for section in (string_offsets, blob, users, order(user_ids), events, order(event_ids), attendees):
+            offsets.append(_pad(f))
+            f.write(section)
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, *stamps, n_strings, len(user_ids), len(event_ids),
+                            n_registrations, *offsets))
+        sync_file(f)
+
+    os.replace(temp_file, path)
+    return len(event_ids)
+
+# ====================== READING ======================
+
+class _Section:
+    """Một bảng bản ghi cố định trong snapshot, tìm theo khóa bằng binary search"""
+
+    def __init__(self, snapshot, record, offset, order_offset, count, build):
+        self.snapshot = snapshot
+        self.record = record
+        self.offset = offset
+        self.count = count
+        self.order = snapshot.view(order_offset, count * 4, 'I')
+        self.build = build
+
+    def fields(self, index):
+        return self.record.unpack_from(self.snapshot.mm, self.offset + index * self.record.size)
+
+    def key_bytes(self, index):
+        ref = _KEY.unpack_from(self.snapshot.mm, self.offset + index * self.record.size)[0]
+        return self.snapshot.string_bytes(ref)
+
+    def key_at(self, index):
+        return self.key_bytes(index).decode('utf-8')
+
+    def index_of(self, key):
+        """Chỉ số bản ghi có khóa key, None nếu không có"""
+        if not isinstance(key, str):
+            return None
+        target = key.encode('utf-8')
+        order = self.order
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key_bytes(order[mid]) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self.key_bytes(order[lo]) == target:
+            return order[lo]
+        return None
+
+    def load(self, index):
+        return self.build(self.fields(index))
+
+class Snapshot:
+    """Snapshot đã mmap: chỉ header được đọc khi mở, bản ghi được đọc khi cần
+
+    Thay đổi trong journal (chưa gộp vào CSV) được phủ lên bằng apply_changes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views = []
+        try:
+            self._open()
+        except (ValueError, struct.error):
+            self.close()
+            raise
+
+    def _open(self):
+        fields = HEADER.unpack_from(self.mm, 0)
+        if fields[0] != MAGIC:
+            raise ValueError(f"File {self.path} không phải snapshot hợp lệ")
+        self.stamps = (fields[1:4], fields[4:7])
+        n_strings, n_users, n_events, self.base_registrations = fields[7:11]
+        (strings_offset, self.data_offset, users_offset, user_order_offset,
+         events_offset, event_order_offset, self.attendees_offset) = fields[11:]
+
+        end = events_offset + n_events * EVENT_RECORD.size
+        if len(self.mm) < end:
+            raise ValueError(f"File {self.path} bị cắt cụt")
+
+        self.string_offsets = self.view(strings_offset, (n_strings + 1) * 8, 'Q')
+        self.users = _Section(self, USER_RECORD, users_offset, user_order_offset,
+                              n_users, self._build_user)
+        self.events = _Section(self, EVENT_RECORD, events_offset, event_order_offset,
+                               n_events, self._build_event)
+        self.user_changes = {}
+        self.event_changes = {}
+        self.event_sources = {}
+
+    def view(self, offset, size, format):
+        """Mảng số nguyên đọc thẳng trên vùng mmap (không sao chép)"""
+        raw = memoryview(self.mm)[offset:offset + size]
+        view = raw.cast(format)
+        self._views += (view, raw)
+        return view
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._views = []
+        self.mm.close()
+
+    def matches(self, users_file, events_file):
+        """Snapshot được ghi từ đúng phiên bản hiện tại của hai file CSV?"""
+        try:
+            return self.stamps == data_stamps(users_file, events_file)
+        except OSError:
+            return False
+
+    # ====================== RECORDS ======================
+
+    def string_bytes(self, index):
+        start = self.data_offset + self.string_offsets[index]
+        return self.mm[start:start + self.string_offsets[index + 1] - self.string_offsets[index]]
+
+    def string(self, index):
+        return self.string_bytes(index).decode('utf-8')
+
+    def _build_user(self, fields):
+        user_id, username, full_name, email, role_code = fields
+        string = self.string
+        return USER_CLASSES[ROLES[role_code]](
+            sys.intern(string(user_id)), string(username), string(full_name), string(email)
+        )
+
+    def _build_event(self, fields):
+        (event_id, name, description, ordinal, time_us, location,
+         max_capacity, organizer_id, count, size, offset) = fields
+        string = self.string
+        attendees = LazyAttendeeSet(partial(self.read_attendees, offset, size, count), count)
+        return Event.from_record(
+            string(event_id), string(name), string(description),
+            date.fromordinal(ordinal), _time_from_us(time_us),
+            string(location), max_capacity, string(organizer_id), attendees
+        )
+
+    def read_attendees(self, offset, size, count, cache=None):
+        """(danh sách user_id đã intern, danh sách thời điểm đăng ký hoặc rỗng) của
+        một event, theo thứ tự đăng ký
+
+        cache: dict chỉ số chuỗi -> chuỗi, dùng chung khi đọc nhiều event liên tiếp
+        (mỗi user thường đăng ký nhiều event nên tránh được phần lớn lần decode).
+        """
+        values = self._read_values(offset, size)
+        refs, stamps = values[:count], values[count:]
+        if cache is None:
+            string, intern = self.string, sys.intern
+            return [intern(string(ref)) for ref in refs], stamps
+
+        user_ids = []
+        for ref in refs:
+            user_id = cache.get(ref)
+            if user_id is None:
+                user_id = cache[ref] = sys.intern(self.string(ref))
+            user_ids.append(user_id)
+        return user_ids, stamps
+
+    def _read_values(self, offset, size):
+        start = self.attendees_offset + offset
+        return _decode_deltas(self.mm[start:start + size])
+
+    # ====================== JOURNAL OVERLAY ======================
+
+    def apply_changes(self, user_changes, event_changes, event_sources=None):
+        """Phủ thay đổi từ journal: {id: object mới hoặc None nếu đã xóa}
+
+        event_changes là các Event đưa vào bảng events (sẽ bị sửa khi hệ thống chạy);
+        event_sources là bản sao riêng của cùng các dòng journal, giữ nguyên trạng thái
+        lúc mở snapshot để nguồn nạp trễ của index phụ không đọc phải thay đổi mà hook
+        sẽ áp thêm lần nữa. Bỏ trống khi event_changes không bao giờ bị sửa.
+        """
+        self.user_changes = user_changes
+        self.event_changes = event_changes
+        self.event_sources = event_changes if event_sources is None else event_sources
+
+    @property
+    def registration_count(self):
+        """Tổng số đăng ký sau khi phủ journal"""
+        total = self.base_registrations
+        for event_id, event in self.event_sources.items():
+            index = self.events.index_of(event_id)
+            if index is not None:
+                total -= self.events.fields(index)[8]
+            if event is not None:
+                total += len(event.attendees)
+        return total
+
+    def user_table(self):
+        return self._table(self.users, self.user_changes)
+
+    def event_table(self, on_load=None):
+        return self._table(self.events, self.event_changes, on_load)
+
+    def _table(self, section, changes, on_load=None):
+        table = LazyTable(section, on_load)
+        for key, value in changes.items():
+            if value is None:
+                table.pop(key, None)
+            else:
+                if on_load is not None:
+                    on_load(value)
+                table[key] = value
+        return table
+
+    def iter_registrations(self):
+        """Toàn bộ cặp (event_id, user_id) - dùng nạp trễ RegistrationIndex"""
+        cache = {}
+        for event_id, index, event in self._iter_event_sources():
+            if event is not None:
+                for user_id in event.attendees:
+                    yield event_id, user_id
+            else:
+                fields = self.events.fields(index)
+                for user_id in self.read_attendees(fields[10], fields[9], fields[8], cache)[0]:
+                    yield event_id, user_id
+
+    def iter_registration_times(self):
+        """Các cặp (event_id, thời điểm đăng ký) đã biết - dùng nạp trễ thống kê theo thời gian"""
+        for event_id, index, event in self._iter_event_sources():
+            if event is not None:
+                stamps = event.attendees.stamps()
+            else:
+                count, size, offset = self.events.fields(index)[8:11]
+                stamps = self._read_values(offset, size)[count:] if size else ()
+            for stamp in stamps or ():
+                if stamp:
+                    yield event_id, stamp
+
+    def iter_event_fields(self, *names):
+        """Các bộ (event_id, *giá trị field) đọc thẳng từ bản ghi, không tạo Event
+
+        Dùng nạp trễ các index phụ. Ngoài field của Event còn có 'attendee_count'.
+        """
+        string = self.string
+        interned = lambda ref: sys.intern(string(ref))
+        decoders = {
+            'name': (1, string), 'description': (2, string), 'date': (3, date.fromordinal),
+            'time': (4, _time_from_us), 'location': (5, interned), 'max_capacity': (6, int),
+            'organizer_id': (7, interned), 'attendee_count': (8, int),
+        }
+        columns = [decoders[name] for name in names]
+
+        for event_id, index, event in self._iter_event_sources():
+            if event is not None:
+                yield (event_id, *(len(event.attendees) if name == 'attendee_count'
+                                   else getattr(event, name) for name in names))
+            else:
+                fields = self.events.fields(index)
+                yield (event_id, *(decode(fields[position]) for position, decode in columns))
+
+    def _iter_event_sources(self):
+        """(event_id, chỉ số bản ghi, bản sao event từ journal hoặc None) theo đúng thứ
+        tự của bảng events; event bị xóa trong journal được bỏ qua
+
+        Chỉ đọc trạng thái lúc mở snapshot (bản ghi mmap và event_sources), không đọc
+        Event đang sống trong bảng events.
+        """
+        events, changed = self.events, self.event_sources
+        for index in range(events.count):
+            event_id = events.key_at(index)
+            if event_id not in changed:
+                yield event_id, index, None
+            elif changed[event_id] is not None:
+                yield event_id, index, changed[event_id]
+        for event_id, event in changed.items():
+            if event is not None and events.index_of(event_id) is None:
+                yield event_id, None, event
+
+class LazyTable(MutableMapping):
+    """Mapping thay cho dict users/events: bản ghi snapshot chỉ thành object khi được truy cập
+
+    Tra cứu/kiểm tra theo khóa chỉ tạo đúng object đó. Lần duyệt toàn bộ đầu tiên
+    (values(), items(), for ...) tạo mọi object còn lại theo thứ tự trong snapshot,
+    sau đó bảng hoạt động như một dict thường.
+    """
+
+    def __init__(self, section, on_load=None):
+        self._section = section
+        self._on_load = on_load
+        self._items = {}
+        self._hidden = set()
+        self._size = section.count
+
+    def _find(self, key):
+        if self._section is None or key in self._hidden:
+            return None
+        return self._section.index_of(key)
+
+    def __getitem__(self, key):
+        try:
+            return self._items[key]
+        except KeyError:
+            pass
+        index = self._find(key)
+        if index is None:
+            raise KeyError(key)
+        item = self._section.load(index)
+        if self._on_load is not None:
+            self._on_load(item)
+        self._items[key] = item
+        return item
+
+    def __contains__(self, key):
+        return key in self._items or self._find(key) is not None
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self._size += 1
+        self._items[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._items.pop(key, None)
+        self._hidden.add(key)
+        self._size -= 1
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return iter(self._materialize())
+
+    def keys(self):
+        return self._materialize().keys()
+
+    def values(self):
+        return self._materialize().values()
+
+    def items(self):
+        return self._materialize().items()
+
+    @property
+    def is_materialized(self):
+        return self._section is None
+
+    def _materialize(self):
+        """Tạo mọi object còn lại, giữ thứ tự snapshot rồi tới các khóa thêm mới"""
+        section = self._section
+        if section is None:
+            return self._items
+
+        items, hidden, on_load = self._items, self._hidden, self._on_load
+        materialized = {}
+        for index in range(section.count):
+            key = section.key_at(index)
+            if key in hidden:
+                continue
+            item = items.get(key)
+            if item is None:
+                item = section.load(index)
+                if on_load is not None:
+                    on_load(item)
+            materialized[key] = item
+        for key, item in items.items():
+            if key not in materialized:
+                materialized[key] = item
+
+        self._items = materialized
+        self._hidden = set()
+        self._section = None
+        return materialized
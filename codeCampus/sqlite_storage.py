@@ -0,0 +1,233 @@
+# sqlite_storage.py - Storage backend SQLite (thay thế CSV, cùng interface với FileManager)
+
+import os
+import sqlite3
+from functools import partial
+from datetime import date, time
+
+from models import Event, LazyAttendeeSet
+from file_manager import user_from_row, parse_rows
+from journal import set_aside
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id   TEXT PRIMARY KEY,
+    username  TEXT NOT NULL,
+    full_name TEXT NOT NULL,
+    email     TEXT NOT NULL,
+    role      TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    event_id     TEXT PRIMARY KEY,
+    name         TEXT NOT NULL,
+    description  TEXT NOT NULL,
+    date         TEXT NOT NULL,
+    time         TEXT NOT NULL,
+    location     TEXT NOT NULL,
+    max_capacity INTEGER NOT NULL,
+    organizer_id TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS registrations (
+    event_id TEXT NOT NULL,
+    user_id  TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    registered_at INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (event_id, user_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_events_date ON events(date);
+CREATE INDEX IF NOT EXISTS idx_events_location ON events(location);
+CREATE INDEX IF NOT EXISTS idx_events_organizer ON events(organizer_id);
+CREATE INDEX IF NOT EXISTS idx_registrations_user ON registrations(user_id);
+"""
+
+UPSERT_USER = """
+INSERT INTO users (user_id, username, full_name, email, role) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(user_id) DO UPDATE SET username = excluded.username, full_name = excluded.full_name,
+    email = excluded.email, role = excluded.role
+"""
+
+UPSERT_EVENT = """
+INSERT INTO events (event_id, name, description, date, time, location, max_capacity, organizer_id)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(event_id) DO UPDATE SET name = excluded.name, description = excluded.description,
+    date = excluded.date, time = excluded.time, location = excluded.location,
+    max_capacity = excluded.max_capacity, organizer_id = excluded.organizer_id
+"""
+
+INSERT_REGISTRATION = ("INSERT INTO registrations (event_id, user_id, position, registered_at) "
+                       "VALUES (?, ?, ?, ?)")
+
+def _event_values(event):
+    return (event.event_id, event.name, event.description, event.date.isoformat(),
+            event.time.isoformat(), event.location, event.max_capacity, event.organizer_id)
+
+def _registration_values(event):
+    event_id = event.event_id
+    return ((event_id, user_id, position, stamp)
+            for position, (user_id, stamp) in enumerate(event.attendees.registrations()))
+
+class SQLiteStorage:
+    """Lưu users, events và bảng registrations chuẩn hóa trong một file SQLite
+
+    - journal_mode=WAL: đọc không bị chặn khi đang ghi, commit nhanh
+    - Mỗi lần lưu là một transaction, ghi theo lô bằng executemany
+    - Danh sách người tham dự được tải lười (LazyAttendeeSet) - chỉ đọc khi cần
+    """
+
+    def __init__(self, db_file='campus.db'):
+        self.db_file = db_file
+        self.text_index_file = None
+        self._conn = None
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_file)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self._migrate()
+        return self._conn
+
+    def _migrate(self):
+        """Thêm cột mới vào file tạo bởi phiên bản cũ"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(registrations)")}
+        if 'registered_at' not in columns:
+            with self._conn:
+                self._conn.execute(
+                    "ALTER TABLE registrations ADD COLUMN registered_at INTEGER NOT NULL DEFAULT 0"
+                )
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # ====================== SAVE ======================
+
+    def save_all_data(self, users, events):
+        """Ghi lại toàn bộ dữ liệu trong một transaction
+        
+        Đăng ký của các event chưa tải danh sách vẫn nằm nguyên trong bảng
+        registrations nên không cần đọc ra rồi ghi lại.
+        """
+        try:
+            loaded = [e for e in events.values() if e.attendees.is_loaded]
+            with self.conn:
+                self.conn.execute("DELETE FROM users")
+                self.conn.execute("DELETE FROM events")
+                self.conn.executemany(UPSERT_USER, (
+                    (u.user_id, u.username, u.full_name, u.email, u.role) for u in users.values()
+                ))
+                self.conn.executemany(UPSERT_EVENT, (_event_values(e) for e in events.values()))
+                
+                self.conn.execute(
+                    "DELETE FROM registrations WHERE event_id NOT IN (SELECT event_id FROM events)"
+                )
+                self.conn.executemany("DELETE FROM registrations WHERE event_id = ?",
+                                      ((e.event_id,) for e in loaded))
+                for event in loaded:
+                    self.conn.executemany(INSERT_REGISTRATION, _registration_values(event))
+
+            print(f"Đã lưu {len(users)} users, {len(events)} events vào {self.db_file}")
+            return True
+
+        except sqlite3.Error as e:
+            print(f"Lỗi lưu dữ liệu SQLite: {e}")
+            return False
+
+    def save_changes(self, users, events, tracker):
+        """Chỉ ghi các dòng đã thay đổi (theo DirtyTracker) trong một transaction"""
+        if tracker.full_rewrite or not self.has_saved_data():
+            return self.save_all_data(users, events)
+
+        try:
+            with self.conn:
+                self.conn.executemany(UPSERT_USER, (
+                    (u.user_id, u.username, u.full_name, u.email, u.role)
+                    for u in (users[user_id] for user_id in tracker.dirty_users if user_id in users)
+                ))
+
+                deleted = [(event_id,) for event_id in tracker.deleted_events]
+                self.conn.executemany("DELETE FROM registrations WHERE event_id = ?", deleted)
+                self.conn.executemany("DELETE FROM events WHERE event_id = ?", deleted)
+
+                dirty = [events[event_id] for event_id in tracker.dirty_events if event_id in events]
+                self.conn.executemany(UPSERT_EVENT, (_event_values(e) for e in dirty))
+                for event in dirty:
+                    # Danh sách chưa tải nghĩa là chưa có ai đăng ký/hủy - không cần ghi lại
+                    if not event.attendees.is_loaded:
+                        continue
+                    self.conn.execute("DELETE FROM registrations WHERE event_id = ?", (event.event_id,))
+                    self.conn.executemany(INSERT_REGISTRATION, _registration_values(event))
+
+            print(f"Đã ghi {tracker.change_count()} thay đổi vào {self.db_file}")
+            return True
+
+        except sqlite3.Error as e:
+            print(f"Lỗi lưu thay đổi SQLite: {e}")
+            return False
+
+    # ====================== LOAD ======================
+
+    def has_saved_data(self):
+        if not os.path.exists(self.db_file):
+            return False
+        return self.conn.execute("SELECT EXISTS (SELECT 1 FROM users)").fetchone()[0] == 1
+
+    def open_snapshot(self):
+        """SQLite tự đọc theo trang khi cần - không dùng snapshot nhị phân"""
+        return None
+    
+    def data_stamps(self):
+        """Không lưu segment toàn văn cho SQLite - index được dựng khi load"""
+        return None
+
+    def set_aside_saved_data(self):
+        """Đổi tên file SQLite không đọc được thành *.bad (kèm file -wal/-shm) để lần lưu
+        sau không ghi vào đó; trả về danh sách file đã đổi tên"""
+        self.close()
+        paths = (self.db_file, self.db_file + '-wal', self.db_file + '-shm')
+        return [set_aside(path) for path in paths if os.path.exists(path)]
+
+    def load_users(self):
+        cursor = self.conn.execute("SELECT user_id, username, full_name, email, role FROM users ORDER BY rowid")
+        return parse_rows(cursor, user_from_row, self.db_file)
+
+    def load_events(self):
+        """Yield Event với danh sách người tham dự tải lười"""
+        counts = dict(self.conn.execute(
+            "SELECT event_id, COUNT(*) FROM registrations GROUP BY event_id"
+        ))
+        parse_date = date.fromisoformat
+        parse_time = time.fromisoformat
+
+        def build(row):
+            event_id, name, description, date_str, time_str, location, max_capacity, organizer_id = row
+            attendees = LazyAttendeeSet(partial(self.load_attendees, event_id), counts.get(event_id, 0))
+            return Event.from_record(
+                event_id, name, description, parse_date(date_str), parse_time(time_str),
+                location, max_capacity, organizer_id, attendees
+            )
+
+        cursor = self.conn.execute(
+            "SELECT event_id, name, description, date, time, location, max_capacity, organizer_id "
+            "FROM events ORDER BY rowid"
+        )
+        return parse_rows(cursor, build, self.db_file)
+
+    def load_attendees(self, event_id):
+        """(danh sách user_id, danh sách thời điểm đăng ký) của event, theo thứ tự đăng ký"""
+        cursor = self.conn.execute(
+            "SELECT user_id, registered_at FROM registrations WHERE event_id = ? ORDER BY position",
+            (event_id,)
+        )
+        rows = cursor.fetchall()
+        return [user_id for user_id, _ in rows], [stamp for _, stamp in rows]
+
+    def iter_lazy_registrations(self):
+        """Toàn bộ bộ (event_id, user_id, thời điểm đăng ký) - dùng dựng các index đăng ký
+        mà không tải từng event, chỉ quét bảng registrations một lần"""
+        return self.conn.execute(
+            "SELECT event_id, user_id, registered_at FROM registrations ORDER BY event_id, position"
+        )
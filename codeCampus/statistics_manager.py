@@ -1,7 +1,11 @@
 # statistics_manager.py - Quản lý thống kê và báo cáo
 
 import csv
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from reports import StatisticsReport, fill_rate, write_statistics_csv, EXCEL_LABELS, WPS_LABELS
+from hyperloglog import STANDARD_ERROR
+from popularity import WEEKDAYS
 
 class StatisticsManager:
     """Class quản lý thống kê và báo cáo"""
@@ -15,33 +19,29 @@ class StatisticsManager:
             print("Chỉ Admin mới có quyền xem thống kê tổng quan")
             return
         
-        total_events = len(self.system.events)
-        total_attendees = sum(len(event.attendees) for event in self.system.events.values())
+        # Các con số tổng đọc từ bộ đếm; báo cáo đầy đủ chỉ được tính khi xuất file
+        stats = self.system.stats
         
-        if total_events == 0:
+        if stats.event_count == 0:
             print("Chưa có sự kiện nào")
             return
         
-        average_attendees = total_attendees / total_events
-        
-        # Tìm sự kiện có attendance cao nhất và thấp nhất
-        events_list = list(self.system.events.values())
-        max_event = max(events_list, key=lambda e: len(e.attendees))
-        min_event = min(events_list, key=lambda e: len(e.attendees))
+        # Nhiều/ít đăng ký nhất đọc từ heap duy trì sẵn
+        ranking = self.system.ranking
+        max_event = self.system.events[ranking.top(1)[0][0]]
+        min_event = self.system.events[ranking.bottom(1)[0][0]]
         
         print("\n" + "="*50)
         print("THỐNG KÊ TỔNG QUAN HỆ THỐNG")
         print("="*50)
         
-        print(f"Tổng số sự kiện: {total_events}")
-        print(f"Tổng số người tham dự: {total_attendees}")
-        print(f"Trung bình người tham dự/sự kiện: {average_attendees:.1f}")
+        print(f"Tổng số sự kiện: {stats.event_count}")
+        print(f"Tổng số người tham dự: {stats.total_registrations}")
+        print(f"Trung bình người tham dự/sự kiện: {stats.average_attendees:.1f}")
         
         # Thống kê sức chứa
-        total_capacity = sum(e.max_capacity for e in self.system.events.values())
-        fill_rate = (total_attendees / total_capacity) * 100 if total_capacity > 0 else 0
-        print(f"Tổng sức chứa: {total_capacity}")
-        print(f"Tỷ lệ lấp đầy: {fill_rate:.1f}%")
+        print(f"Tổng sức chứa: {stats.total_capacity}")
+        print(f"Tỷ lệ lấp đầy: {stats.overall_fill_rate:.1f}%")
         
         print(f"\nSự kiện phổ biến nhất:")
         print(f"   {max_event.name} - {len(max_event.attendees)} người")
@@ -52,12 +52,25 @@ class StatisticsManager:
         # Thống kê theo vai trò
         self._show_role_statistics()
         
+        # Số người khác nhau (ước lượng bằng sketch)
+        self._show_audience_statistics()
+        
         # Thống kê theo organizer
         self._show_organizer_statistics()
         
+        # Thống kê theo địa điểm
+        self._show_location_statistics()
+        self._show_occupancy_matrix()
+        
         # Thống kê trạng thái sự kiện
         self._show_event_status_statistics()
         
+        # Cửa sổ trượt 7/30/90 ngày
+        self._show_rolling_statistics()
+        
+        # Tốc độ đăng ký toàn campus
+        self._show_registration_rate_statistics()
+        
         # Menu xuất báo cáo
         self._show_export_menu()
     
@@ -67,8 +80,7 @@ class StatisticsManager:
             print("Chỉ Event Organizer mới có thể xem thống kê sự kiện của mình")
             return
         
-        my_events = [e for e in self.system.events.values() 
-                    if e.organizer_id == self.system.current_user.user_id]
+        my_events = self.system.get_organizer_events(self.system.current_user.user_id)
         
         if not my_events:
             print("Bạn chưa được phân công tổ chức sự kiện nào")
@@ -84,6 +96,8 @@ class StatisticsManager:
         print(f"Số sự kiện tổ chức: {total_events}")
         print(f"Tổng người tham dự: {total_attendees}")
         print(f"Trung bình/sự kiện: {average_attendees:.1f} người")
+        audience = self.system.audience.organizer_audience(self.system.current_user.user_id)
+        print(f"Số người khác nhau: ~{audience} (sai số ~{STANDARD_ERROR * 100:.1f}%)")
         
         if my_events:
             # Sự kiện thành công nhất
@@ -102,9 +116,11 @@ class StatisticsManager:
             print("-" * 70)
             
             for event in my_events:
-                fill_rate = (len(event.attendees) / event.max_capacity) * 100
+                event_fill_rate = fill_rate(len(event.attendees), event.max_capacity)
                 attendance = f"{len(event.attendees)}/{event.max_capacity}"
-                print(f"{event.name[:29]:<30} {event.date:<12} {attendance:<10} {fill_rate:.1f}%")
+                print(f"{event.name[:29]:<30} {event.date:<12} {attendance:<10} {event_fill_rate:.1f}%")
+            
+            self._show_audience_overlap(my_events)
         
         # Xuất báo cáo cá nhân
         export = input("\nXuất báo cáo cá nhân? (y/n): ").lower()
@@ -115,12 +131,7 @@ class StatisticsManager:
         """Thống kê theo vai trò người tham dự"""
         print(f"\nTHỐNG KÊ THEO VAI TRÒ:")
         
-        role_stats = {}
-        for event in self.system.events.values():
-            for user_id in event.attendees:
-                if user_id in self.system.users:
-                    role = self.system.users[user_id].role
-                    role_stats[role] = role_stats.get(role, 0) + 1
+        role_stats = self.system.stats.registrations_by_role()
         
         if role_stats:
             total_registrations = sum(role_stats.values())
@@ -130,58 +141,112 @@ class StatisticsManager:
         else:
             print("   Chưa có đăng ký nào")
     
+    def _show_audience_statistics(self):
+        """Số người khác nhau tham dự sự kiện trong tháng này (lượt đăng ký đếm trùng người)"""
+        today = datetime.now().date()
+        month_start = today.replace(day=1)
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+        audience = self.system.audience.audience_between(month_start, next_month - timedelta(days=1))
+        print(f"\nNgười tham dự khác nhau (sự kiện tháng {today:%m/%Y}): ~{audience} "
+              f"(ước lượng, sai số ~{STANDARD_ERROR * 100:.1f}%)")
+    
+    AUDIENCE_OVERLAP_EVENTS = 20
+    
+    def _show_audience_overlap(self, events):
+        """Các cặp sự kiện có nhiều người tham dự chung nhất (ước lượng)"""
+        events = sorted(events, key=lambda e: len(e.attendees), reverse=True)
+        events = [e for e in events[:self.AUDIENCE_OVERLAP_EVENTS] if e.attendees]
+        pairs = []
+        for i, first in enumerate(events):
+            for second in events[i + 1:]:
+                common, jaccard = self.system.audience.overlap(first.event_id, second.event_id)
+                if common > 0:
+                    pairs.append((common, jaccard, first, second))
+        if not pairs:
+            return
+        
+        pairs.sort(key=lambda pair: pair[0], reverse=True)
+        print(f"\nKHÁN GIẢ CHUNG GIỮA CÁC SỰ KIỆN (ước lượng):")
+        for common, jaccard, first, second in pairs[:5]:
+            print(f"   {first.name[:25]} & {second.name[:25]}: ~{common} người ({jaccard * 100:.0f}%)")
+    
     def _show_organizer_statistics(self):
         """Thống kê theo organizer"""
         print(f"\nTHỐNG KÊ THEO ORGANIZER:")
         
-        organizer_stats = {}
-        for event in self.system.events.values():
-            org_id = event.organizer_id
-            if org_id not in organizer_stats:
+        if self.system.columnar is not None:
+            # Group-by trên mảng cột, đã sắp theo số người tham dự
+            sorted_orgs = [(org_id, {'events': events, 'attendees': attendees,
+                                     'name': self._user_name(org_id)})
+                           for org_id, events, attendees, _ in self.system.columnar.by_organizer()]
+        else:
+            organizer_stats = {}
+            for org_id in self.system.organizer_index.organizers():
+                org_events = self.system.get_organizer_events(org_id)
                 organizer_stats[org_id] = {
-                    'events': 0,
-                    'attendees': 0,
-                    'name': 'Unknown'
+                    'events': len(org_events),
+                    'attendees': sum(len(e.attendees) for e in org_events),
+                    'name': self._user_name(org_id)
                 }
             
-            if org_id in self.system.users:
-                organizer_stats[org_id]['name'] = self.system.users[org_id].full_name
-            
-            organizer_stats[org_id]['events'] += 1
-            organizer_stats[org_id]['attendees'] += len(event.attendees)
-        
-        # Sắp xếp theo số người tham dự
-        sorted_orgs = sorted(organizer_stats.items(), 
-                           key=lambda x: x[1]['attendees'], 
-                           reverse=True)
+            # Sắp xếp theo số người tham dự
+            sorted_orgs = sorted(organizer_stats.items(), 
+                               key=lambda x: x[1]['attendees'], 
+                               reverse=True)
         
         for org_id, stats in sorted_orgs:
             avg = stats['attendees'] / stats['events'] if stats['events'] > 0 else 0
             print(f"   {stats['name']}: {stats['events']} sự kiện, {stats['attendees']} người (TB: {avg:.1f})")
     
+    def _user_name(self, user_id):
+        return self.system.users[user_id].full_name if user_id in self.system.users else 'Unknown'
+    
+    def _show_location_statistics(self):
+        """Thống kê theo địa điểm: số sự kiện, người tham dự, tỷ lệ lấp đầy"""
+        print(f"\nTHỐNG KÊ THEO ĐỊA ĐIỂM:")
+        
+        if self.system.columnar is not None:
+            location_stats = self.system.columnar.by_location()
+        else:
+            totals = {}
+            for event in self.system.events.values():
+                stats = totals.setdefault(event.location, [0, 0, 0])
+                stats[0] += 1
+                stats[1] += len(event.attendees)
+                stats[2] += event.max_capacity
+            location_stats = sorted(((location, *stats) for location, stats in totals.items()),
+                                    key=lambda x: x[2], reverse=True)
+        
+        for location, events, attendees, capacity in location_stats:
+            print(f"   {location}: {events} sự kiện, {attendees} người "
+                  f"(lấp đầy {fill_rate(attendees, capacity):.1f}%)")
+    
+    OCCUPANCY_LOCATIONS = 10
+    
+    def _show_occupancy_matrix(self):
+        """Tỷ lệ lấp đầy theo địa điểm × thứ trong tuần (các địa điểm nhiều đăng ký nhất)"""
+        rows = self.system.occupancy.fill_rates(self.OCCUPANCY_LOCATIONS)
+        if not rows:
+            return
+        
+        print(f"\nTỶ LỆ LẤP ĐẦY THEO ĐỊA ĐIỂM × THỨ (%):")
+        print(f"   {'Địa điểm':<25}" + "".join(f"{day:>7}" for day in WEEKDAYS))
+        for location, rates in rows:
+            cells = "".join(f"{'-':>7}" if rate is None else f"{rate:>7.1f}" for rate in rates)
+            print(f"   {location[:24]:<25}{cells}")
+    
     def _show_event_status_statistics(self):
         """Thống kê trạng thái sự kiện"""
         print(f"\nTHỐNG KÊ TRẠNG THÁI SỰ KIỆN:")
         
-        full_events = 0     # Đầy 100%
-        high_events = 0     # 80-99%
-        medium_events = 0   # 50-79%
-        low_events = 0      # 1-49%
-        empty_events = 0    # 0%
-        
-        for event in self.system.events.values():
-            fill_rate = len(event.attendees) / event.max_capacity if event.max_capacity > 0 else 0
-            
-            if fill_rate >= 1.0:
-                full_events += 1
-            elif fill_rate >= 0.8:
-                high_events += 1
-            elif fill_rate >= 0.5:
-                medium_events += 1
-            elif fill_rate > 0:
-                low_events += 1
-            else:
-                empty_events += 1
+        # Số event từng nhóm có sẵn trong index tình trạng, không cần duyệt event
+        fill_index = self.system.fill_status_index
+        counts = fill_index.counts()
+        full_events = counts[fill_index.FULL]           # Đầy 100%
+        high_events = counts[fill_index.NEARLY_FULL]    # 80-99%
+        medium_events = counts[fill_index.HALF]         # 50-79%
+        low_events = counts[fill_index.LOW]             # 1-49%
+        empty_events = counts[fill_index.EMPTY]         # 0%
         
         total = len(self.system.events)
         print(f"   Đầy (100%): {full_events}/{total} sự kiện")
@@ -189,9 +254,50 @@ class StatisticsManager:
         print(f"   Khá tốt (50-79%): {medium_events}/{total} sự kiện")
         print(f"   Còn ít (1-49%): {low_events}/{total} sự kiện")
         print(f"   Chưa có (0%): {empty_events}/{total} sự kiện")
+        
+        # Phân bố tỷ lệ lấp đầy - chỉ tính khi có bản sao dạng cột (NumPy)
+        if self.system.columnar is not None:
+            percentiles = self.system.columnar.fill_percentiles()
+            if percentiles:
+                print("   Phân vị tỷ lệ lấp đầy: " +
+                      ", ".join(f"P{percent} {value:.1f}%" for percent, value in percentiles.items()))
+    
+    def _show_rolling_statistics(self):
+        """Số event, sức chứa, đăng ký, tỷ lệ lấp đầy của các cửa sổ 7/30/90 ngày tới và qua"""
+        print(f"\nTHỐNG KÊ CỬA SỔ TRƯỢT (theo ngày diễn ra):")
+        print(f"   {'Cửa sổ':<14} {'Sự kiện':>8} {'Sức chứa':>10} {'Đăng ký':>10} {'Lấp đầy':>8}")
+        for direction, days, totals in self.system.rolling.summary():
+            label = f"{days} ngày {'tới' if direction == 'next' else 'qua'}"
+            print(f"   {label:<14} {totals['events']:>8} {totals['capacity']:>10} "
+                  f"{totals['registrations']:>10} {totals['fill_rate']:>7.1f}%")
+    
+    def _show_registration_rate_statistics(self):
+        """Tốc độ đăng ký toàn campus: phút/giờ/ngày đông nhất và 7 ngày có đăng ký gần nhất"""
+        print(f"\nTỐC ĐỘ ĐĂNG KÝ:")
+        
+        timeline = self.system.timeline
+        known = timeline.known_registrations
+        if known == 0:
+            print("   Chưa có lượt đăng ký nào có thời điểm")
+            return
+        
+        unknown = self.system.stats.total_registrations - known
+        if unknown > 0:
+            print(f"   ({unknown} lượt đăng ký cũ không rõ thời điểm)")
+        for resolution, label, pattern in (('minute', 'Phút', '%Y-%m-%d %H:%M'),
+                                           ('hour', 'Giờ', '%Y-%m-%d %H:00'),
+                                           ('day', 'Ngày', '%Y-%m-%d')):
+            start, count = timeline.peak(resolution)
+            print(f"   {label} đông nhất: {start.strftime(pattern)} ({count} lượt)")
+        
+        days = timeline.histogram('day', last=7)
+        largest = max(count for _, count in days)
+        for start, count in days:
+            bar = '#' * max(1, round(count / largest * 30))
+            print(f"   {start:%Y-%m-%d} {count:>6} {bar}")
     
     def _show_export_menu(self):
-        """Menu xuất báo cáo"""
+        """Menu xuất báo cáo (báo cáo được dựng từ các index khi chọn xuất)"""
         print(f"\nXUẤT BÁO CÁO:")
         print("1. Báo cáo Excel (UTF-8 with BOM)")
         print("2. Báo cáo WPS (UTF-8 thuần)")
@@ -214,42 +320,18 @@ class StatisticsManager:
         else:
             print("Lựa chọn không hợp lệ")
     
-    def _export_excel_report(self):
+    def _full_report(self):
+        """Báo cáo toàn hệ thống đọc từ các index duy trì sẵn (không duyệt events)"""
+        return StatisticsReport.from_indexes(self.system.events, self.system.stats,
+                                             self.system.ranking, self.system.occupancy,
+                                             self.system.rolling)
+    
+    def _export_excel_report(self, report=None):
         """Xuất báo cáo Excel format"""
         try:
-            filename = f"statistics_Excel_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            
-            with open(filename, 'w', newline='', encoding='utf-8-sig') as f:
-                writer = csv.writer(f, delimiter=',')
-                
-                # Header thông tin
-                writer.writerow(['CAMPUS EVENT MANAGEMENT SYSTEM'])
-                writer.writerow(['STATISTICS REPORT'])
-                writer.writerow(['Generated:', datetime.now().strftime('%Y-%m-%d %H:%M:%S')])
-                writer.writerow([])
-                
-                # Thống kê tổng quan
-                total_events = len(self.system.events)
-                total_attendees = sum(len(e.attendees) for e in self.system.events.values())
-                average = total_attendees / total_events if total_events > 0 else 0
-                
-                writer.writerow(['SUMMARY STATISTICS'])
-                writer.writerow(['Total Events', str(total_events)])
-                writer.writerow(['Total Attendees', str(total_attendees)])
-                writer.writerow(['Average per Event', f"{average:.2f}"])
-                writer.writerow([])
-                
-                # Chi tiết sự kiện
-                writer.writerow(['EVENT DETAILS'])
-                writer.writerow(['ID', 'Event Name', 'Date', 'Location', 'Registered', 'Capacity', 'Fill Rate (%)'])
-                
-                for event in self.system.events.values():
-                    fill_rate = (len(event.attendees) / event.max_capacity) * 100
-                    writer.writerow([
-                        event.event_id, event.name, str(event.date), event.location,
-                        str(len(event.attendees)), str(event.max_capacity), f"{fill_rate:.1f}"
-                    ])
-            
+            report = report or self._full_report()
+            filename = write_statistics_csv(f"statistics_Excel_{report.timestamp}.csv",
+                                            report, EXCEL_LABELS)
             print(f"Đã xuất báo cáo Excel: {filename}")
             return filename
             
@@ -257,42 +339,12 @@ class StatisticsManager:
             print(f"Lỗi xuất báo cáo Excel: {e}")
             return None
     
-    def _export_wps_report(self):
+    def _export_wps_report(self, report=None):
         """Xuất báo cáo WPS format"""
         try:
-            filename = f"statistics_WPS_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            
-            with open(filename, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f, delimiter=',')
-                
-                # Header tiếng Việt
-                writer.writerow(['HE THONG QUAN LY SU KIEN CAMPUS'])
-                writer.writerow(['BAO CAO THONG KE'])
-                writer.writerow(['Tao ngay:', datetime.now().strftime('%Y-%m-%d %H:%M:%S')])
-                writer.writerow([])
-                
-                # Thống kê
-                total_events = len(self.system.events)
-                total_attendees = sum(len(e.attendees) for e in self.system.events.values())
-                average = total_attendees / total_events if total_events > 0 else 0
-                
-                writer.writerow(['THONG KE TONG QUAN'])
-                writer.writerow(['Tong so su kien', str(total_events)])
-                writer.writerow(['Tong so nguoi tham du', str(total_attendees)])
-                writer.writerow(['Trung binh moi su kien', f"{average:.2f}"])
-                writer.writerow([])
-                
-                # Chi tiết
-                writer.writerow(['CHI TIET SU KIEN'])
-                writer.writerow(['ID', 'Ten su kien', 'Ngay', 'Dia diem', 'Da dang ky', 'Suc chua', 'Ty le (%)'])
-                
-                for event in self.system.events.values():
-                    fill_rate = (len(event.attendees) / event.max_capacity) * 100
-                    writer.writerow([
-                        event.event_id, event.name, str(event.date), event.location,
-                        str(len(event.attendees)), str(event.max_capacity), f"{fill_rate:.1f}"
-                    ])
-            
+            report = report or self._full_report()
+            filename = write_statistics_csv(f"statistics_WPS_{report.timestamp}.csv",
+                                            report, WPS_LABELS)
             print(f"Đã xuất báo cáo WPS: {filename}")
             return filename
             
@@ -300,10 +352,11 @@ class StatisticsManager:
             print(f"Lỗi xuất báo cáo WPS: {e}")
             return None
     
-    def _export_full_report(self):
-        """Xuất báo cáo đầy đủ cả 2 format"""
-        excel_file = self._export_excel_report()
-        wps_file = self._export_wps_report()
+    def _export_full_report(self, report=None):
+        """Xuất báo cáo đầy đủ cả 2 format (thống kê chỉ tính một lần)"""
+        report = report or self._full_report()
+        excel_file = self._export_excel_report(report)
+        wps_file = self._export_wps_report(report)
         
         if excel_file and wps_file:
             print(f"Đã xuất báo cáo đầy đủ:")
@@ -366,25 +419,22 @@ class StatisticsManager:
                 writer.writerow([])
                 
                 # Thống kê cá nhân
-                total_events = len(my_events)
-                total_attendees = sum(len(e.attendees) for e in my_events)
-                avg_attendees = total_attendees / total_events if total_events > 0 else 0
+                report = StatisticsReport(my_events)
                 
                 writer.writerow(['PERSONAL STATISTICS'])
-                writer.writerow(['Total Events Organized', str(total_events)])
-                writer.writerow(['Total Attendees', str(total_attendees)])
-                writer.writerow(['Average per Event', f"{avg_attendees:.2f}"])
+                writer.writerow(['Total Events Organized', str(report.total_events)])
+                writer.writerow(['Total Attendees', str(report.total_attendees)])
+                writer.writerow(['Average per Event', f"{report.average_attendees:.2f}"])
                 writer.writerow([])
                 
                 # Chi tiết sự kiện
                 writer.writerow(['MY EVENT DETAILS'])
                 writer.writerow(['Event ID', 'Event Name', 'Date', 'Location', 'Attendees', 'Capacity', 'Fill Rate'])
                 
-                for event in my_events:
-                    fill_rate = (len(event.attendees) / event.max_capacity) * 100
+                for row in report.rows:
                     writer.writerow([
-                        event.event_id, event.name, str(event.date), event.location,
-                        str(len(event.attendees)), str(event.max_capacity), f"{fill_rate:.1f}%"
+                        row.event_id, row.name, str(row.date), row.location,
+                        str(row.registered), str(row.capacity), f"{row.fill_rate:.1f}%"
                     ])
             
             print(f"Đã xuất báo cáo cá nhân: {filename}")
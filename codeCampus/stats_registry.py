@@ -0,0 +1,155 @@
+# stats_registry.py - Bộ đếm tổng hợp (tổng đăng ký, sức chứa, người dùng theo vai trò) cập nhật qua EventBus
+
+from collections import Counter
+
+from models import ROLES
+from indexes import DeferredIndex
+from reports import fill_rate
+
+class StatsRegistry(DeferredIndex):
+    """Các con số tổng của hệ thống, mỗi thay đổi chỉ cập nhật O(1)
+
+    - Số event, tổng lượt đăng ký, tổng sức chứa
+    - Số người dùng theo vai trò và số lượt đăng ký theo vai trò người đăng ký
+    Dashboard đọc thẳng các bộ đếm thay vì duyệt toàn bộ event/user; check() so
+    sánh với kết quả tính lại từ đầu để phát hiện lệch.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._event_count = 0
+        self._registrations = 0
+        self._capacity = 0
+        self._users = Counter()           # vai trò -> số người dùng
+        self._role_registrations = Counter()  # vai trò -> số lượt đăng ký
+        self._role_of = {}                # user_id -> vai trò
+
+    # ====================== QUERY ======================
+
+    @property
+    def event_count(self):
+        self._load_deferred()
+        return self._event_count
+
+    @property
+    def total_registrations(self):
+        self._load_deferred()
+        return self._registrations
+
+    @property
+    def total_capacity(self):
+        self._load_deferred()
+        return self._capacity
+
+    @property
+    def average_attendees(self):
+        """Số người đăng ký trung bình mỗi event"""
+        return self.total_registrations / self.event_count if self.event_count > 0 else 0
+
+    @property
+    def overall_fill_rate(self):
+        return fill_rate(self.total_registrations, self.total_capacity)
+
+    def user_counts(self):
+        """Vai trò -> số người dùng (đủ 4 vai trò chuẩn, vai trò khác xếp sau)"""
+        self._load_deferred()
+        counts = {role: self._users[role] for role in ROLES}
+        counts.update((role, count) for role, count in self._users.items() if role not in counts)
+        return counts
+
+    def registrations_by_role(self):
+        """Vai trò -> số lượt đăng ký của người dùng vai trò đó (chỉ vai trò có đăng ký)"""
+        self._load_deferred()
+        return {role: count for role, count in self._role_registrations.items() if count > 0}
+
+    def check(self, events, users):
+        """So với kết quả tính lại toàn bộ; trả về danh sách chênh lệch (rỗng nếu khớp)"""
+        expected = StatsRegistry()
+        expected.load((((len(e.attendees), e.max_capacity) for e in events.values()),
+                       ((u.user_id, u.role) for u in users.values()),
+                       (user_id for e in events.values() for user_id in e.attendees)))
+        self._load_deferred()
+        issues = []
+        for label, actual, wanted in (
+                ("số event", self._event_count, expected._event_count),
+                ("tổng đăng ký", self._registrations, expected._registrations),
+                ("tổng sức chứa", self._capacity, expected._capacity)):
+            if actual != wanted:
+                issues.append(f"Bộ đếm {label} lệch: {actual} (đúng: {wanted})")
+        for label, actual, wanted in (
+                ("người dùng", self._users, expected._users),
+                ("đăng ký", self._role_registrations, expected._role_registrations)):
+            for role in sorted(set(actual) | set(wanted)):
+                if actual[role] != wanted[role]:
+                    issues.append(f"Bộ đếm {label} vai trò {role} lệch: "
+                                  f"{actual[role]} (đúng: {wanted[role]})")
+        return issues
+
+    # ====================== UPDATE ======================
+
+    def _count_registration(self, user_id, delta):
+        role = self._role_of.get(user_id)
+        if role is not None:
+            self._role_registrations[role] += delta
+
+    def load_registrations(self, pairs):
+        """Đếm lượt đăng ký theo vai trò từ các cặp (event_id, user_id) của event có danh sách tải lười"""
+        for _, user_id in pairs:
+            self._count_registration(user_id, 1)
+
+    def load(self, rows):
+        """Nạp hàng loạt: (các bộ (số đăng ký, sức chứa), các bộ (user_id, vai trò),
+        user_id của từng lượt đăng ký)"""
+        event_rows, user_rows, registered_user_ids = rows
+        for registered, capacity in event_rows:
+            self._event_count += 1
+            self._registrations += registered
+            self._capacity += capacity
+        for user_id, role in user_rows:
+            self._role_of[user_id] = role
+            self._users[role] += 1
+        for user_id in registered_user_ids:
+            self._count_registration(user_id, 1)
+
+    # ====================== EVENT HOOKS ======================
+
+    def on_user_added(self, user):
+        self._load_deferred()
+        old_role = self._role_of.get(user.user_id)
+        if old_role is not None:
+            self._users[old_role] -= 1
+        self._role_of[user.user_id] = user.role
+        self._users[user.role] += 1
+
+    def on_event_added(self, event):
+        self._load_deferred()
+        self._event_count += 1
+        self._registrations += len(event.attendees)
+        self._capacity += event.max_capacity
+        # Danh sách chưa tải (SQLite): lượt đăng ký theo vai trò được đếm qua load_registrations
+        if event.attendees.is_loaded:
+            for user_id in event.attendees:
+                self._count_registration(user_id, 1)
+
+    def on_event_removed(self, event):
+        self._load_deferred()
+        self._event_count -= 1
+        self._registrations -= len(event.attendees)
+        self._capacity -= event.max_capacity
+        for user_id in event.attendees:
+            self._count_registration(user_id, -1)
+
+    def on_attendee_added(self, event, user_id, registered_at):
+        self._load_deferred()
+        self._registrations += 1
+        self._count_registration(user_id, 1)
+
+    def on_attendee_removed(self, event, user_id, registered_at):
+        self._load_deferred()
+        self._registrations -= 1
+        self._count_registration(user_id, -1)
+
+    def on_field_updated(self, event, field, old_value, new_value):
+        if field == 'max_capacity':
+            self._load_deferred()
+            self._capacity += new_value - old_value
@@ -0,0 +1,54 @@
+# test_attendee_set.py - AttendeeSet: thứ tự đăng ký, thời điểm đăng ký, hủy đăng ký
+#
+# Chạy: python -m unittest test_attendee_set (trong thư mục codeCampus)
+
+import unittest
+
+from models import AttendeeSet, LazyAttendeeSet
+
+class AttendeeSetTest(unittest.TestCase):
+
+    def test_keeps_registration_order_and_stamps(self):
+        attendees = AttendeeSet(['a', 'b'], [100, 0])
+        self.assertTrue(attendees.add('c', 300))
+        self.assertFalse(attendees.add('a', 999))
+        self.assertEqual(list(attendees), ['a', 'b', 'c'])
+        self.assertEqual(list(attendees.registrations()), [('a', 100), ('b', 0), ('c', 300)])
+        self.assertEqual(list(attendees.stamps()), [100, 0, 300])
+        self.assertEqual(attendees.registered_at('c'), 300)
+        self.assertEqual(attendees.registered_at('zz'), 0)
+
+    def test_pop_returns_stamp_and_keeps_the_rest_aligned(self):
+        attendees = AttendeeSet(['a', 'b', 'c'], [100, 200, 300])
+        self.assertEqual(attendees.pop('b'), 200)
+        self.assertIsNone(attendees.pop('b'))
+        self.assertEqual(list(attendees.registrations()), [('a', 100), ('c', 300)])
+        attendees.add('b', 400)
+        self.assertEqual(list(attendees.registrations()), [('a', 100), ('c', 300), ('b', 400)])
+        self.assertRaises(KeyError, attendees.remove, 'zz')
+        self.assertTrue(attendees.discard('a'))
+        self.assertFalse(attendees.discard('a'))
+
+    def test_without_any_stamp(self):
+        attendees = AttendeeSet(['a', 'b'])
+        self.assertIsNone(attendees.stamps())
+        self.assertEqual(attendees.pop('a'), 0)
+        self.assertEqual(attendees, ['b'])
+
+    def test_lazy_set_loads_on_first_use(self):
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return ['a', 'b'], [100, 200]
+
+        attendees = LazyAttendeeSet(loader, 2)
+        self.assertEqual(len(attendees), 2)
+        self.assertEqual(calls, [])
+        self.assertEqual(attendees.pop('a'), 100)
+        self.assertIs(type(attendees), AttendeeSet)
+        self.assertEqual(list(attendees.registrations()), [('b', 200)])
+        self.assertEqual(calls, [1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+# test_autocomplete.py - PrefixIndex: top-k theo tiền tố khớp với lọc + sắp xếp toàn bộ khi điểm thay đổi
+#
+# Chạy: python -m unittest test_autocomplete (trong thư mục codeCampus)
+
+import random
+import unittest
+
+from autocomplete import PrefixIndex
+
+class SmallBurstIndex(PrefixIndex):
+    """Lá nhỏ để trie tách nút (và giữ top ở nút trong) ngay với ít mục"""
+    BURST = 4
+
+class PrefixIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(5)
+        self.index = SmallBurstIndex()
+        self.texts = {}     # mục -> các chuỗi
+        self.scores = {}    # mục -> điểm
+
+    def _word(self):
+        return ''.join(self.rng.choice('abc') for _ in range(self.rng.randrange(1, 6)))
+
+    def _add(self, entry):
+        # Chuỗi đầu duy nhất để thứ hạng không bao giờ bằng nhau
+        texts = (f'{self._word()} {entry}', self._word())
+        score = self.rng.randrange(5)
+        self.texts[entry], self.scores[entry] = texts, score
+        self.index.add(entry, texts, score)
+
+    def _expected(self, prefix, k):
+        matches = [entry for entry, texts in self.texts.items()
+                   if any(text.startswith(prefix) for text in texts)]
+        matches.sort(key=lambda entry: (-self.scores[entry], self.texts[entry][0]))
+        return matches[:k]
+
+    def _assert_matches_sort(self):
+        for prefix in ['', 'a', 'b', 'ab', 'ca', 'abc', 'bba', 'cccc', self._word()]:
+            k = self.rng.randrange(1, PrefixIndex.TOP_K + 1)
+            self.assertEqual(self.index.complete(prefix, k), self._expected(prefix, k), prefix)
+
+    def test_top_k_follows_score_changes(self):
+        for i in range(200):
+            self._add(i)
+        self._assert_matches_sort()
+        next_entry = 200
+        for step in range(3000):
+            action = self.rng.random()
+            if action < 0.6:
+                entry = self.rng.choice(list(self.texts))
+                delta = self.rng.choice((-2, -1, 1, 1, 2, 3))
+                self.scores[entry] += delta
+                self.index.add_score(entry, delta)
+            elif action < 0.75:
+                entry = self.rng.choice(list(self.texts))
+                del self.texts[entry], self.scores[entry]
+                self.index.remove(entry)
+            elif action < 0.85:
+                # Thêm lại mục đang có: thay chuỗi và điểm
+                self._add(self.rng.choice(list(self.texts)))
+            else:
+                self._add(next_entry)
+                next_entry += 1
+            if step % 20 == 0:
+                self._assert_matches_sort()
+        self._assert_matches_sort()
+        self.assertEqual(len(self.index), len(self.texts))
+
+    def test_unknown_entry_and_prefix(self):
+        self.index.add('x', ['Hội trường A'], 3)
+        self.index.add_score('missing', 5)
+        self.assertEqual(self.index.complete('hoi'), ['x'])
+        self.assertEqual(self.index.complete('zz'), [])
+        self.index.remove('missing')
+        self.assertEqual(self.index.score_of('missing'), 0)
+
+if __name__ == '__main__':
+    unittest.main()
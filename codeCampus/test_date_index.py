@@ -0,0 +1,95 @@
+# test_date_index.py - DateIndex: truy vấn khoảng ngày khớp với lọc + sắp xếp toàn bộ sau mọi thay đổi
+#
+# Chạy: python -m unittest test_date_index (trong thư mục codeCampus)
+
+import random
+import unittest
+from datetime import date, timedelta
+
+from indexes import DateIndex
+
+START = date(2030, 1, 1)
+
+class FakeEvent:
+    def __init__(self, event_id, day):
+        self.event_id = event_id
+        self.date = day
+
+class DateIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = DateIndex()
+        self.rng = random.Random(12)
+        self.events = {}    # event_id -> (ngày, thứ tự thêm)
+        self.added = 0
+
+    def _day(self):
+        return START + timedelta(days=self.rng.randrange(60))
+
+    def _add(self, event_id, day):
+        self.events[event_id] = (day, self.added)
+        self.added += 1
+        self.index.on_event_added(FakeEvent(event_id, day))
+
+    def _remove(self, event_id):
+        day, _ = self.events.pop(event_id)
+        self.index.on_event_removed(FakeEvent(event_id, day))
+
+    def _move(self, event_id, day):
+        old, order = self.events[event_id]
+        self.events[event_id] = (day, order)
+        self.index.on_field_updated(FakeEvent(event_id, day), 'date', old, day)
+
+    def _assert_matches_sort(self):
+        ordered = sorted(self.events, key=self.events.get)
+        for _ in range(5):
+            start, end = sorted((self._day(), self._day()))
+            expected = [event_id for event_id in ordered if start <= self.events[event_id][0] <= end]
+            self.assertEqual(self.index.between(start, end), expected)
+            self.assertEqual(self.index.count_between(start, end), len(expected))
+        self.assertEqual(self.index.between(), ordered)
+        self.assertEqual(self.index.between(end_date=START - timedelta(days=1)), [])
+
+    def _random_changes(self, steps, check_every):
+        for step in range(steps):
+            action = self.rng.random()
+            if action < 0.35 or not self.events:
+                self._add(f'n{step}', self._day())
+            elif action < 0.55:
+                self._remove(self.rng.choice(list(self.events)))
+            elif action < 0.65:
+                # Thêm lại event đang có: lấy thứ tự thêm mới
+                self._add(self.rng.choice(list(self.events)), self._day())
+            else:
+                self._move(self.rng.choice(list(self.events)), self._day())
+            if step % check_every == 0:
+                self._assert_matches_sort()
+        self._assert_matches_sort()
+
+    def test_bulk_load_then_single_changes(self):
+        rows = [(f'e{i}', self._day()) for i in range(3000)]
+        self.index.load(rows)
+        self.events = {event_id: (day, order) for order, (event_id, day) in enumerate(rows)}
+        self.added = len(rows)
+        # Mỗi lần chỉ vài thay đổi chờ trộn: đi đường chèn từng khóa
+        self._random_changes(600, check_every=3)
+
+    def test_large_batches_are_merged(self):
+        for _ in range(3):
+            for i in range(400):
+                self._add(f'b{self.added}', self._day())
+            self._assert_matches_sort()
+        self._random_changes(1000, check_every=97)
+
+    def test_change_before_flush_keeps_order_among_same_day(self):
+        day = START + timedelta(days=3)
+        for event_id in 'abc':
+            self._add(event_id, day)
+        self._move('a', day + timedelta(days=1))
+        self._move('a', day)
+        self._remove('b')
+        self.assertEqual(self.index.on_date(day), ['a', 'c'])
+        self._assert_matches_sort()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# test_load_recovery.py - Dữ liệu đã lưu bị lỗi: bỏ qua dòng lỗi, không ghi dữ liệu mẫu đè lên file thật
+#
+# Chạy: python -m unittest test_load_recovery (trong thư mục codeCampus)
+
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+from main import SimpleCampusEventSystem
+from sqlite_storage import SQLiteStorage
+from benchmark import write_csv_dataset
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        return list(csv.reader(f))
+
+def write_rows(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        csv.writer(f).writerows(rows)
+
+# Dữ liệu mẫu có ngày cố định - thay bằng tập rỗng để test không phụ thuộc ngày chạy
+@mock.patch('main.initialize_sample_data', lambda: ({}, {}))
+class LoadRecoveryTest(unittest.TestCase):
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._dir = tempfile.mkdtemp()
+        os.chdir(self._dir)
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def _start(self, storage=None):
+        with redirect_stdout(StringIO()):
+            return SimpleCampusEventSystem(storage)
+
+    def _save_and_close(self, system):
+        with redirect_stdout(StringIO()):
+            system.save_data()
+            system.wal.close()
+
+    def test_bad_row_is_skipped_and_kept_on_disk(self):
+        write_csv_dataset('.', 50)
+        rows = read_rows('events.csv')
+        rows[5][3] = '2025-13-45'
+        write_rows('events.csv', rows)
+
+        system = self._start()
+        self.assertEqual(len(system.events), 49)
+        self.assertNotIn(rows[5][0], system.events)
+        self.assertEqual(system.validate_system_data(), [])
+        next(iter(system.events.values())).update_field('name', 'Đã đổi tên')
+        self._save_and_close(system)
+
+        saved = {row[0]: row for row in read_rows('events.csv')}
+        self.assertEqual(len(saved), 51)
+        self.assertEqual(saved[rows[5][0]], rows[5])
+
+    def test_unknown_role_skips_only_that_user(self):
+        write_csv_dataset('.', 50)
+        rows = read_rows('users.csv')
+        rows[3][4] = 'Alien'
+        write_rows('users.csv', rows)
+
+        system = self._start()
+        self.assertEqual(len(system.users), len(rows) - 2)
+        self.assertEqual(len(system.events), 50)
+        system.wal.close()
+
+    def test_unreadable_csv_is_set_aside(self):
+        write_csv_dataset('.', 50)
+        rows = read_rows('events.csv')
+        rows[0][1] = 'tên'
+        write_rows('events.csv', rows)
+
+        system = self._start()
+        self.assertEqual(len(system.events), 0)
+        self._save_and_close(system)
+
+        self.assertEqual(read_rows('events.csv.bad'), rows)
+        self.assertTrue(os.path.exists('users.csv.bad'))
+        self.assertEqual(read_rows('events.csv')[1:], [])
+
+    def test_corrupt_sqlite_file_is_set_aside(self):
+        with open('campus.db', 'wb') as f:
+            f.write(b'garbage ' * 64)
+
+        system = self._start(SQLiteStorage())
+        self._save_and_close(system)
+        system.storage.close()
+
+        with open('campus.db.bad', 'rb') as f:
+            self.assertEqual(f.read(), b'garbage ' * 64)
+        self.assertTrue(os.path.exists('campus.db'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+# test_popularity.py - PopularityRanking: top-K/bottom-K khớp với sắp xếp toàn bộ, thu hồi chỗ event đã xóa
+#
+# Chạy: python -m unittest test_popularity (trong thư mục codeCampus)
+
+import random
+import unittest
+
+from popularity import PopularityRanking
+
+class FakeEvent:
+    def __init__(self, event_id, count):
+        self.event_id = event_id
+        self.attendees = range(count)
+
+class PopularityRankingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ranking = PopularityRanking()
+        self.events = {}    # event_id -> số đăng ký, theo thứ tự thêm
+
+    def _add(self, event_id, count):
+        # Event đang có: cập nhật tại chỗ, giữ thứ tự thêm
+        self.events[event_id] = count
+        self.ranking.on_event_added(FakeEvent(event_id, count))
+
+    def _remove(self, event_id):
+        del self.events[event_id]
+        self.ranking.on_event_removed(FakeEvent(event_id, 0))
+
+    def _register(self, event_id, delta):
+        self.events[event_id] += delta
+        event = FakeEvent(event_id, self.events[event_id])
+        if delta > 0:
+            self.ranking.on_attendee_added(event, 'u', 0)
+        else:
+            self.ranking.on_attendee_removed(event, 'u', 0)
+
+    def _assert_matches_sort(self, k):
+        # sorted() ổn định: bằng nhau thì event thêm trước đứng trước, như max()/min()
+        items = list(self.events.items())
+        self.assertEqual(self.ranking.top(k), sorted(items, key=lambda item: -item[1])[:k])
+        self.assertEqual(self.ranking.bottom(k), sorted(items, key=lambda item: item[1])[:k])
+        self.assertEqual(len(self.ranking), len(self.events))
+
+    def test_ties_keep_insertion_order(self):
+        for event_id in 'abcd':
+            self._add(event_id, 5)
+        self._register('c', 1)
+        self._register('c', -1)
+        self.assertEqual(self.ranking.top(4), [('a', 5), ('b', 5), ('c', 5), ('d', 5)])
+        self._remove('a')
+        self._add('a', 5)
+        self.assertEqual(self.ranking.bottom(4), [('b', 5), ('c', 5), ('d', 5), ('a', 5)])
+
+    def test_random_changes_match_full_sort(self):
+        rng = random.Random(7)
+        next_id = 0
+        for step in range(5000):
+            action = rng.random()
+            if action < 0.3 or not self.events:
+                self._add(f'e{next_id}', rng.randrange(20))
+                next_id += 1
+            elif action < 0.45:
+                self._remove(rng.choice(list(self.events)))
+            elif action < 0.5:
+                # Thêm lại event đã xóa thì đứng cuối thứ tự thêm
+                self._add(f'e{rng.randrange(next_id)}', rng.randrange(20))
+            else:
+                event_id = rng.choice(list(self.events))
+                self._register(event_id, 1 if rng.random() < 0.6 or not self.events[event_id] else -1)
+            if step % 50 == 0:
+                self._assert_matches_sort(rng.randrange(1, 15))
+        self._assert_matches_sort(len(self.events))
+
+    def test_removed_slots_are_reclaimed(self):
+        for round_ in range(20):
+            for i in range(500):
+                self._add(f'{round_}-{i}', i % 7)
+            for i in range(500):
+                if i % 10:
+                    self._remove(f'{round_}-{i}')
+            self.assertLessEqual(len(self.ranking._ids), 2 * len(self.events) + 1)
+        self._assert_matches_sort(30)
+
+if __name__ == '__main__':
+    unittest.main()
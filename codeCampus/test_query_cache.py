@@ -0,0 +1,131 @@
+# test_query_cache.py - QueryCache: LRU, vô hiệu theo field, kết quả qua cache luôn bằng kết quả tính lại
+#
+# Chạy: python -m unittest test_query_cache (trong thư mục codeCampus)
+
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from datetime import date, time, timedelta
+from io import StringIO
+
+from main import SimpleCampusEventSystem
+from models import Event
+from query_cache import QueryCache, ATTENDEES
+from benchmark import write_csv_dataset
+
+class FakeEvent:
+    event_id = 'e1'
+
+class QueryCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = QueryCache(capacity=2)
+        self.computed = []
+
+    def _get(self, key, depends_on=()):
+        return self.cache.get(key, depends_on, lambda: self.computed.append(key) or (key, len(self.computed)))
+
+    def test_hit_until_a_dependency_changes(self):
+        first = self._get('q', ('location',))
+        self.assertIs(self._get('q', ('location',)), first)
+        self.cache.on_field_updated(FakeEvent(), 'name', 'a', 'b')
+        self.cache.on_attendee_added(FakeEvent(), 'u1', 0)
+        self.assertIs(self._get('q', ('location',)), first)
+
+        self.cache.on_field_updated(FakeEvent(), 'location', 'a', 'b')
+        self.assertEqual(self._get('q', ('location',)), ('q', 2))
+        self.cache.on_event_removed(FakeEvent())
+        self.assertEqual(self._get('q', ('location',)), ('q', 3))
+        self.assertEqual((self.cache.hits, self.cache.misses, self.cache.invalidations), (2, 3, 2))
+
+    def test_attendee_changes_invalidate_dependent_entries(self):
+        self._get('fill', (ATTENDEES,))
+        self.cache.on_attendee_removed(FakeEvent(), 'u1', 0)
+        self._get('fill', (ATTENDEES,))
+        self.assertEqual(self.computed, ['fill', 'fill'])
+
+    def test_least_recently_used_entry_is_evicted(self):
+        self._get('a')
+        self._get('b')
+        self._get('a')
+        self._get('c')
+        self.assertEqual(len(self.cache), 2)
+        self._get('a')
+        self._get('b')
+        self.assertEqual(self.computed, ['a', 'b', 'c', 'b'])
+        self.assertEqual(self.cache.evictions, 2)
+
+    def test_zero_capacity_never_stores(self):
+        cache = QueryCache(capacity=0)
+        cache.get('a', (), lambda: 1)
+        cache.get('a', (), lambda: 2)
+        self.assertEqual((len(cache), cache.hits, cache.misses), (0, 0, 2))
+
+class CachedQueriesTest(unittest.TestCase):
+    """Sau mỗi thay đổi, kết quả qua cache phải bằng kết quả tính lại không qua cache"""
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._dir = tempfile.mkdtemp()
+        os.chdir(self._dir)
+        write_csv_dataset('.', 60, registrations_per_event=5)
+        with redirect_stdout(StringIO()):
+            self.system = SimpleCampusEventSystem()
+        self.today = date.today()
+
+    def tearDown(self):
+        self.system.wal.close()
+        os.chdir(self._cwd)
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def _queries(self):
+        queries = self.system.queries
+        return {
+            'name': lambda: queries.by_name('hoi thao', fuzzy=False),
+            'location': lambda: queries.by_location('phong', fuzzy=False),
+            'between': lambda: queries.between(self.today + timedelta(days=30), self.today + timedelta(days=120)),
+            'available': lambda: queries.by_fill_status('available'),
+            'empty': lambda: queries.by_fill_status('empty'),
+            'keyword': lambda: queries.keyword('python'),
+            'advanced': lambda: queries.advanced({'location': 'hội trường', 'attendee_range': (3, 8)}),
+        }
+
+    def _assert_cache_matches_fresh(self):
+        cached = {name: query().event_ids for name, query in self._queries().items()}
+        shared, self.system.query_cache = self.system.query_cache, QueryCache(capacity=0)
+        try:
+            fresh = {name: query().event_ids for name, query in self._queries().items()}
+        finally:
+            self.system.query_cache = shared
+        self.assertEqual(cached, fresh)
+
+    def test_results_follow_changes(self):
+        system = self.system
+        events = list(system.events.values())
+        attendee = next(user_id for user_id, user in system.users.items() if user.role == 'Student')
+        changes = [
+            lambda: events[0].update_field('name', 'Hội thảo mới về Python'),
+            lambda: events[1].update_field('location', 'Phòng họp 9'),
+            lambda: events[2].update_field('date', self.today + timedelta(days=45)),
+            lambda: events[3].update_field('description', 'Python cho người mới'),
+            lambda: events[4].update_field('max_capacity', len(events[4].attendees)),
+            lambda: events[5].add_attendee(attendee),
+            lambda: events[6].remove_attendee(next(iter(events[6].attendees))),
+            lambda: system.add_event(Event('e9999999', 'Hội thảo cuối năm', 'Mô tả',
+                                           self.today + timedelta(days=60), time(8, 0),
+                                           'Phòng Lab 201 - Tòa nhà Công nghệ', 30,
+                                           events[0].organizer_id)),
+            lambda: (events[7].prepare_for_deletion(), system.remove_event(events[7].event_id)),
+        ]
+        self._assert_cache_matches_fresh()
+        for change in changes:
+            with redirect_stdout(StringIO()):
+                change()
+            self._assert_cache_matches_fresh()
+            self._assert_cache_matches_fresh()
+        self.assertGreater(system.query_cache.hits, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+# test_snapshot_journal.py - Index nạp trễ từ snapshot + journal không được đếm trùng thay đổi đầu tiên
+#
+# Chạy: python -m unittest test_snapshot_journal (trong thư mục codeCampus)
+
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+from io import StringIO
+
+from main import SimpleCampusEventSystem
+from file_manager import FileManager
+from benchmark import write_csv_dataset
+from autocomplete import AutocompleteIndex
+import columnar
+from registration_timeline import RegistrationTimeline, RESOLUTIONS
+from rolling_stats import RollingWindows
+
+class SnapshotJournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def _prepare(self, name):
+        """Dữ liệu đã lưu gồm CSV + snapshot, và journal có thay đổi của 2 event"""
+        os.chdir(tempfile.mkdtemp(prefix=name, dir=self._dir))
+        write_csv_dataset('.', 20, registrations_per_event=3)
+        FileManager().write_snapshot()
+        system = self._start()
+        first, second = list(system.events.values())[:2]
+        with redirect_stdout(StringIO()):
+            first.update_field('name', 'Sự kiện đã đổi tên')
+            second.update_field('location', 'Phòng mới')
+            system.save_data()
+            system.wal.close()
+        self.changed_ids = first.event_id, second.event_id
+
+    def _start(self):
+        with redirect_stdout(StringIO()):
+            return SimpleCampusEventSystem()
+
+    def _restart_from_snapshot(self):
+        system = self._start()
+        self.assertEqual(type(system.events).__name__, 'LazyTable')
+        self.assertIn(self.changed_ids[0], system.storage.journal.read_changes()[1])
+        return system
+
+    def _new_attendee(self, system, event):
+        return next(user_id for user_id, user in system.users.items()
+                    if user.role in ('Student', 'Visitor') and user_id not in event.attendees)
+
+    def _assert_consistent(self, system):
+        self.assertEqual(system.stats.check(system.events, system.users), [])
+        registrations = sum(len(event.attendees) for event in system.events.values())
+        self.assertEqual(system.timeline.known_registrations, registrations)
+        expected = RegistrationTimeline()
+        expected.load_registration_times((event.event_id, stamp) for event in system.events.values()
+                                         for _, stamp in event.attendees.registrations())
+        for resolution in RESOLUTIONS:
+            self.assertEqual(system.timeline.histogram(resolution), expected.histogram(resolution))
+        if system.columnar is not None:
+            self._assert_matches_rebuild(system, system.columnar, columnar.EventColumns(),
+                                         lambda columns: (columns.totals(), sorted(columns.by_organizer())))
+        occupancy = sum(cell[1] for _, cells in system.occupancy.rows() for cell in cells)
+        self.assertEqual(occupancy, registrations)
+        # Dữ liệu benchmark rải event trong 365 ngày tới: so từng ngày trong 400 ngày tới
+        days = [date.today() + timedelta(days=offset) for offset in range(400)]
+        self._assert_matches_rebuild(system, system.rolling, RollingWindows(),
+                                     lambda windows: (windows.summary(),
+                                                      [windows.window(day, 1) for day in days]))
+        self._assert_matches_rebuild(system, system.autocomplete, AutocompleteIndex(),
+                                     lambda index: [(location, index.locations.score_of(location))
+                                                    for location in index.complete_locations(k=100)])
+
+    def _assert_matches_rebuild(self, system, listener, fresh, state):
+        """state(listener) phải bằng state của listener mới được dựng lại từ dữ liệu hiện tại"""
+        for user in system.users.values():
+            fresh.on_user_added(user)
+        for event in system.events.values():
+            fresh.on_event_added(event)
+        self.assertEqual(state(listener), state(fresh))
+
+    def _run(self, change, crash=False):
+        system = self._restart_from_snapshot()
+        event = system.events[self.changed_ids[0]]
+        with redirect_stdout(StringIO()):
+            change(system, event)
+            system.wal.close()
+        if crash:
+            # Không lưu: lần khởi động sau phát lại WAL qua chính các hook này
+            system = self._start()
+            system.wal.close()
+        self._assert_consistent(system)
+
+    def test_first_change_is_counted_once(self):
+        changes = {
+            'add_attendee': lambda system, event: event.add_attendee(self._new_attendee(system, event)),
+            'remove_attendee': lambda system, event: event.remove_attendee(next(iter(event.attendees))),
+            'max_capacity': lambda system, event: event.update_field('max_capacity', event.max_capacity + 7),
+            'date': lambda system, event: event.update_field('date', event.date + timedelta(days=3)),
+            'location': lambda system, event: event.update_field('location', 'Hội trường Z'),
+            'remove_event': lambda system, event: (event.prepare_for_deletion(),
+                                                   system.remove_event(event.event_id)),
+        }
+        for name, change in changes.items():
+            for crash in (False, True):
+                with self.subTest(change=name, crash=crash):
+                    self._prepare(name)
+                    self._run(change, crash)
+
+if __name__ == '__main__':
+    unittest.main()
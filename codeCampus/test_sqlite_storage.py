@@ -0,0 +1,92 @@
+# test_sqlite_storage.py - Backend SQLite: lưu/tải lại, danh sách tải lười, quét bảng đăng ký một lần
+#
+# Chạy: python -m unittest test_sqlite_storage (trong thư mục codeCampus)
+
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from main import SimpleCampusEventSystem
+from sqlite_storage import SQLiteStorage
+from benchmark import generate_dataset
+
+class SQLiteStorageTest(unittest.TestCase):
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._dir = tempfile.mkdtemp()
+        os.chdir(self._dir)
+        self.users, self.events = generate_dataset(40, registrations_per_event=4)
+        storage = SQLiteStorage()
+        self.assertTrue(storage.save_all_data(self.users, self.events))
+        storage.close()
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def _start(self, storage):
+        with redirect_stdout(StringIO()):
+            return SimpleCampusEventSystem(storage)
+
+    def _close(self, system):
+        system.wal.close()
+        system.storage.close()
+
+    def test_round_trip_keeps_attendees_and_stamps(self):
+        system = self._start(SQLiteStorage())
+        self.assertEqual(set(system.users), set(self.users))
+        self.assertEqual(set(system.events), set(self.events))
+        for event_id, event in self.events.items():
+            loaded = system.events[event_id]
+            self.assertEqual(len(loaded.attendees), len(event.attendees))
+            self.assertEqual(list(loaded.attendees.registrations()), list(event.attendees.registrations()))
+        self.assertEqual(system.validate_system_data(), [])
+        self._close(system)
+
+    def test_indexes_are_built_without_loading_attendee_lists(self):
+        system = self._start(SQLiteStorage())
+        self.assertFalse(any(event.attendees.is_loaded for event in system.events.values()))
+
+        registrations = sum(len(event.attendees) for event in self.events.values())
+        self.assertEqual(system.stats.total_registrations, registrations)
+        self.assertEqual(system.timeline.known_registrations, registrations)
+        for event_id, event in self.events.items():
+            for user_id in event.attendees:
+                self.assertTrue(system.registration_index.is_registered(user_id, event_id))
+        self.assertEqual(system.stats.check(system.events, system.users), [])
+        self._close(system)
+
+    def test_registrations_table_is_read_once_on_load(self):
+        storage = SQLiteStorage()
+        statements = []
+        storage.conn.set_trace_callback(statements.append)
+        system = self._start(storage)
+        # Ngoài câu COUNT(*) theo event để dựng danh sách tải lười
+        scans = [sql for sql in statements if 'FROM registrations' in sql and 'COUNT(*)' not in sql]
+        self.assertEqual(len(scans), 1)
+        self._close(system)
+
+    def test_saved_changes_are_loaded_back(self):
+        system = self._start(SQLiteStorage())
+        event = next(event for event in system.events.values() if event.attendees)
+        removed = next(iter(event.attendees))
+        with redirect_stdout(StringIO()):
+            event.remove_attendee(removed)
+            event.update_field('location', 'Phòng mới')
+            self.assertTrue(system.save_data())
+        self._close(system)
+
+        system = self._start(SQLiteStorage())
+        reloaded = system.events[event.event_id]
+        self.assertEqual(reloaded.location, 'Phòng mới')
+        self.assertNotIn(removed, reloaded.attendees)
+        self.assertFalse(system.registration_index.is_registered(removed, event.event_id))
+        self.assertEqual(system.stats.check(system.events, system.users), [])
+        self._close(system)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+# test_wal.py - WAL: khôi phục thao tác chưa lưu sau crash, phát lại idempotent, dòng ghi dở
+#
+# Chạy: python -m unittest test_wal (trong thư mục codeCampus)
+
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from datetime import date, time, timedelta
+from io import StringIO
+
+from main import SimpleCampusEventSystem
+from models import Event, Student
+from file_manager import event_to_row, user_to_row
+from benchmark import write_csv_dataset
+
+class WriteAheadLogTest(unittest.TestCase):
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._dir = tempfile.mkdtemp()
+        os.chdir(self._dir)
+        write_csv_dataset('.', 30, registrations_per_event=3)
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def _start(self):
+        with redirect_stdout(StringIO()):
+            return SimpleCampusEventSystem()
+
+    def _state(self, system):
+        users = {user_id: user_to_row(user) for user_id, user in system.users.items()}
+        events = {event_id: event_to_row(event) for event_id, event in system.events.items()}
+        return users, events
+
+    def _make_changes(self, system):
+        """Đủ mọi loại bản ghi: tạo user/event, đăng ký, hủy, đổi field, xóa event"""
+        events = list(system.events.values())
+        crowded = next(event for event in events[6:] if event.attendees)
+        student = system.add_user(Student('u9999999', 'newstudent', 'Sinh viên mới', 'new@campus.edu.vn'))
+        created = system.add_event(Event('e9999999', 'Hội thảo mới', 'Mô tả', date.today() + timedelta(days=9),
+                                         time(9, 30), 'Phòng mới', 40, events[0].organizer_id))
+        created.add_attendee(student.user_id)
+        events[1].add_attendee(student.user_id)
+        crowded.remove_attendee(next(iter(crowded.attendees)))
+        events[3].update_field('date', events[3].date + timedelta(days=2))
+        events[3].update_field('max_capacity', events[3].max_capacity + 5)
+        events[4].update_field('location', 'Hội trường Z')
+        events[5].prepare_for_deletion()
+        system.remove_event(events[5].event_id)
+
+    def _crash_after_changes(self):
+        system = self._start()
+        with redirect_stdout(StringIO()):
+            self._make_changes(system)
+        # Crash: không lưu, chỉ những gì đã fsync vào WAL còn lại
+        system.wal.close()
+        return self._state(system)
+
+    def test_unsaved_changes_are_recovered(self):
+        expected = self._crash_after_changes()
+        self.assertGreater(os.path.getsize('events.wal'), 0)
+
+        system = self._start()
+        self.assertEqual(self._state(system), expected)
+        self.assertEqual(system.validate_system_data(), [])
+        self.assertEqual(system.stats.check(system.events, system.users), [])
+        system.wal.close()
+
+    def test_replay_after_save_is_idempotent(self):
+        # Crash sau khi lưu nhưng trước khi cắt WAL: WAL cũ được phát lại trên dữ liệu đã lưu
+        expected = self._crash_after_changes()
+        shutil.copy('events.wal', 'events.wal.copy')
+        system = self._start()
+        with redirect_stdout(StringIO()):
+            self.assertTrue(system.save_data())
+        system.wal.close()
+        self.assertEqual(os.path.getsize('events.wal'), 0)
+        os.replace('events.wal.copy', 'events.wal')
+
+        system = self._start()
+        self.assertEqual(self._state(system), expected)
+        self.assertEqual(system.stats.check(system.events, system.users), [])
+        system.wal.close()
+
+    def test_torn_last_record_is_ignored(self):
+        expected = self._crash_after_changes()
+        with open('events.wal', 'a', encoding='utf-8') as f:
+            f.write('{"op": "delete", "id": "e00')
+
+        system = self._start()
+        self.assertEqual(self._state(system), expected)
+        system.wal.close()
+
+if __name__ == '__main__':
+    unittest.main()
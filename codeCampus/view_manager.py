@@ -13,7 +13,7 @@ class ViewManager:
             return
         
         print("\n=== TẤT CẢ SỰ KIỆN ===")
-        self.display_events_table(list(self.system.events.values()))
+        self.display_events_table(self.system.get_events_between(), sorted_by_date=True)
         
         # Xem chi tiết
         detail = input("\nXem chi tiết sự kiện nào? (Event ID hoặc Enter): ").strip()
@@ -22,8 +22,7 @@ class ViewManager:
     
     def view_my_events(self):
         """Xem sự kiện của organizer"""
-        my_events = [e for e in self.system.events.values() 
-                    if e.organizer_id == self.system.current_user.user_id]
+        my_events = self.system.get_organizer_events(self.system.current_user.user_id)
         
         if not my_events:
             print("Bạn chưa được phân công tổ chức sự kiện nào")
@@ -41,14 +40,14 @@ class ViewManager:
             else:
                 print("Bạn chỉ có thể xem chi tiết sự kiện của mình")
     
-    def display_events_table(self, events):
-        """Hiển thị danh sách events dạng table"""
+    def display_events_table(self, events, sorted_by_date=False):
+        """Hiển thị danh sách events dạng table (sorted_by_date: danh sách đã theo thứ tự ngày)"""
         if not events:
             print("Không có sự kiện nào")
             return
         
         # Sắp xếp theo ngày
-        events_sorted = sorted(events, key=lambda e: e.date)
+        events_sorted = events if sorted_by_date else sorted(events, key=lambda e: e.date)
         
         print(f"{'ID':<8} {'Tên sự kiện':<30} {'Ngày':<12} {'Đăng ký':<10} {'Trạng thái':<10}")
         print("-" * 80)
@@ -159,17 +158,15 @@ class ViewManager:
         if not end_date:
             end_date = date(2025, 12, 31)
         
-        filtered_events = []
-        for event in self.system.events.values():
-            if start_date <= event.date <= end_date:
-                filtered_events.append(event)
+        # Index ngày: chỉ đọc các event trong khoảng, đã sắp theo ngày
+        filtered_events = self.system.get_events_between(start_date, end_date)
         
         if not filtered_events:
             print(f"Không có sự kiện nào từ {start_date} đến {end_date}")
             return
         
         print(f"\n=== SỰ KIỆN TỪ {start_date} ĐẾN {end_date} ===")
-        self.display_events_table(filtered_events)
+        self.display_events_table(filtered_events, sorted_by_date=True)
     
     def show_events_by_location(self, location_filter=""):
         """Hiển thị sự kiện theo địa điểm"""
@@ -177,17 +174,15 @@ class ViewManager:
             print("Cần nhập từ khóa tìm kiếm địa điểm")
             return
         
-        filtered_events = []
-        for event in self.system.events.values():
-            if location_filter.lower() in event.location.lower():
-                filtered_events.append(event)
+        # Index địa điểm: so khớp không dấu trên từng địa điểm khác nhau
+        filtered_events = self.system.queries.by_location(location_filter, fuzzy=False)
         
         if not filtered_events:
             print(f"Không có sự kiện nào tại '{location_filter}'")
             return
         
         print(f"\n=== SỰ KIỆN TẠI '{location_filter}' ===")
-        self.display_events_table(filtered_events)
+        self.display_events_table(filtered_events, sorted_by_date=True)
     
     def show_events_summary(self):
         """Hiển thị tóm tắt tất cả sự kiện"""
@@ -198,9 +193,10 @@ class ViewManager:
         print(f"\nTÓM TẮT SỰ KIỆN")
         print("="*40)
         
-        total_events = len(self.system.events)
-        total_capacity = sum(e.max_capacity for e in self.system.events.values())
-        total_registered = sum(len(e.attendees) for e in self.system.events.values())
+        stats = self.system.stats
+        total_events = stats.event_count
+        total_capacity = stats.total_capacity
+        total_registered = stats.total_registrations
         
         print(f"Tổng số sự kiện: {total_events}")
         print(f"Tổng sức chứa: {total_capacity}")
@@ -211,22 +207,15 @@ class ViewManager:
             fill_rate = (total_registered / total_capacity) * 100
             print(f"Tỷ lệ lấp đầy: {fill_rate:.1f}%")
         
-        # Top 3 sự kiện nhiều người đăng ký nhất
-        events_by_attendance = sorted(
-            self.system.events.values(), 
-            key=lambda e: len(e.attendees), 
-            reverse=True
-        )
-        
+        # Top 3 sự kiện nhiều người đăng ký nhất (đọc từ heap, không sắp xếp toàn bộ)
         print(f"\nTOP 3 SỰ KIỆN PHỔ BIẾN:")
-        for i, event in enumerate(events_by_attendance[:3], 1):
-            attendance = len(event.attendees)
-            print(f"   {i}. {event.name} - {attendance} người")
+        for i, (event_id, attendance) in enumerate(self.system.ranking.top(3), 1):
+            print(f"   {i}. {self.system.events[event_id].name} - {attendance} người")
         
         # Sự kiện sắp diễn ra
         from datetime import date
-        upcoming_events = [e for e in self.system.events.values() if e.date >= date.today()]
-        upcoming_events.sort(key=lambda e: e.date)
+        upcoming_ids = self.system.date_index.between(date.today())
+        upcoming_events = [self.system.events[event_id] for event_id in upcoming_ids[:3]]
         
         if upcoming_events:
             print(f"\nSỰ KIỆN SẮP DIỄN RA:")
@@ -239,16 +228,17 @@ class ViewManager:
         from datetime import date, timedelta
         from collections import defaultdict
         
-        # Nhóm events theo ngày
+        today = date.today()
+        
+        # Nhóm events theo ngày - chỉ các event trong 7 ngày tới (qua index ngày)
         events_by_date = defaultdict(list)
-        for event in self.system.events.values():
+        for event in self.system.get_events_between(today, today + timedelta(days=6)):
             events_by_date[event.date].append(event)
         
         # Hiển thị 7 ngày tới
         print(f"\nLỊCH SỰ KIỆN 7 NGÀY TỚI")
         print("="*50)
         
-        today = date.today()
         for i in range(7):
             current_date = today + timedelta(days=i)
             day_name = ["Thứ 2", "Thứ 3", "Thứ 4", "Thứ 5", "Thứ 6", "Thứ 7", "CN"][current_date.weekday()]
@@ -271,14 +261,9 @@ class ViewManager:
             return
         
         search_term = search_term.lower()
-        found_events = []
         
-        for event in self.system.events.values():
-            # Tìm trong tên, mô tả, địa điểm
-            if (search_term in event.name.lower() or 
-                search_term in event.description.lower() or 
-                search_term in event.location.lower()):
-                found_events.append(event)
+        # Tìm trong tên, mô tả, địa điểm - trên khóa đã bỏ dấu lưu sẵn trong các index
+        found_events = self.system.queries.keyword(search_term)
         
         if not found_events:
             print(f"Không tìm thấy sự kiện nào với từ khóa '{search_term}'")
@@ -288,12 +273,12 @@ class ViewManager:
         print(f"Tìm thấy {len(found_events)} sự kiện")
         print("="*50)
         
-        self.display_events_table(found_events)
+        self.display_events_table(found_events, sorted_by_date=True)
         
         # Cho phép xem chi tiết
         detail = input("\nXem chi tiết sự kiện nào? (Event ID hoặc Enter): ").strip()
         if detail and detail in self.system.events:
-            if self.system.events[detail] in found_events:
+            if detail in found_events:
                 self.show_event_details(self.system.events[detail])
             else:
                 print("Event ID không có trong kết quả tìm kiếm")
@@ -304,12 +289,12 @@ class ViewManager:
             print("Chỉ Student/Visitor mới có thể đăng ký")
             return
         
-        available_events = []
-        for event in self.system.events.values():
-            # Kiểm tra chưa đăng ký và còn chỗ
-            if (self.system.current_user.user_id not in event.attendees and 
-                len(event.attendees) < event.max_capacity):
-                available_events.append(event)
+        # Chỉ đọc các nhóm còn chỗ của index tình trạng, bỏ event user đã đăng ký
+        user_id = self.system.current_user.user_id
+        fill_index = self.system.fill_status_index
+        available_events = [self.system.events[event_id] 
+                            for event_id in fill_index.event_ids(*fill_index.AVAILABLE)
+                            if not self.system.registration_index.is_registered(user_id, event_id)]
         
         if not available_events:
             print("Không có sự kiện nào để đăng ký")
@@ -329,10 +314,7 @@ class ViewManager:
             print("Chỉ Student/Visitor mới có lịch sử đăng ký")
             return
         
-        my_events = []
-        for event in self.system.events.values():
-            if self.system.current_user.user_id in event.attendees:
-                my_events.append(event)
+        my_events = self.system.get_user_registrations(self.system.current_user.user_id)
         
         if not my_events:
             print("Bạn chưa đăng ký sự kiện nào")
@@ -358,8 +340,7 @@ class ViewManager:
         if not organizer_id:
             organizer_id = self.system.current_user.user_id
         
-        organizer_events = [e for e in self.system.events.values() 
-                           if e.organizer_id == organizer_id]
+        organizer_events = self.system.get_organizer_events(organizer_id)
         
         if not organizer_events:
             print("Không có sự kiện nào")
@@ -386,29 +367,24 @@ class ViewManager:
         print("="*30)
         
         # Thống kê cơ bản
-        total_events = len(self.system.events)
-        total_registered = sum(len(e.attendees) for e in self.system.events.values())
+        stats = self.system.stats
+        total_events = stats.event_count
         
         print(f"Tổng sự kiện: {total_events}")
-        print(f"Lượt đăng ký: {total_registered}")
+        print(f"Lượt đăng ký: {stats.total_registrations}")
         
         if total_events > 0:
-            avg_attendance = total_registered / total_events
-            print(f"TB/sự kiện: {avg_attendance:.1f} người")
+            print(f"TB/sự kiện: {stats.average_attendees:.1f} người")
         
         # Sự kiện hot nhất
         if self.system.events:
             hottest_event = max(self.system.events.values(), key=lambda e: len(e.attendees))
             print(f"Sự kiện hot: {hottest_event.name} ({len(hottest_event.attendees)} người)")
         
-        # Tình trạng đăng ký
-        full_events = sum(1 for e in self.system.events.values() 
-                         if len(e.attendees) >= e.max_capacity)
-        print(f"Sự kiện đầy: {full_events}/{total_events}")
-        
-        empty_events = sum(1 for e in self.system.events.values() 
-                          if len(e.attendees) == 0)
-        print(f"Chưa có đăng ký: {empty_events}/{total_events}")
+        # Tình trạng đăng ký - đọc số event của từng nhóm trong index
+        fill_index = self.system.fill_status_index
+        print(f"Sự kiện đầy: {fill_index.count(fill_index.FULL)}/{total_events}")
+        print(f"Chưa có đăng ký: {fill_index.count(fill_index.EMPTY)}/{total_events}")
     
     def display_compact_events_list(self, events, show_details=False):
         """Hiển thị danh sách sự kiện dạng compact"""
@@ -0,0 +1,204 @@
+# wal.py - Write-ahead log: ghi từng thao tác ngay khi xảy ra để khôi phục sau crash
+
+import os
+import json
+import threading
+from datetime import date, time
+
+from models import EventListener, intern_value
+from file_manager import event_to_row, event_from_row, user_to_row, user_from_row
+from journal import sync_file
+
+def _encode_value(value):
+    """Giá trị field -> dạng JSON được"""
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    return value
+
+def _decode_value(field, value):
+    """Dạng JSON -> giá trị field của Event"""
+    if field == "date":
+        return date.fromisoformat(value)
+    if field == "time":
+        return time.fromisoformat(value)
+    if field == "max_capacity":
+        return int(value)
+    if field == "location":
+        return intern_value(value)
+    return value
+
+class WriteAheadLog(EventListener):
+    """WAL dạng JSON lines cho mọi thay đổi: create, update_field, add/remove attendee, delete
+
+    Group commit: thao tác được ghi vào buffer của file ngay lập tức, còn fsync được
+    gom lại - chạy khi đủ sync_batch bản ghi hoặc sau tối đa sync_interval giây
+    (thread nền). Như vậy tốc độ đăng ký không bị giới hạn bởi 1 fsync/lượt; đổi lại
+    crash có thể mất tối đa sync_interval giây thao tác cuối. sync_interval=0 thì
+    fsync ngay sau mỗi thao tác.
+
+    Khi save_data ghi xong snapshot/journal, WAL được cắt về rỗng (checkpoint).
+    """
+
+    def __init__(self, path='events.wal', sync_interval=0.05, sync_batch=256):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.sync_batch = sync_batch
+        self.enabled = False
+        self.pending = 0
+        self.sync_count = 0
+        self._file = None
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher = None
+
+    # ====================== LIFECYCLE ======================
+
+    def open(self):
+        """Mở WAL để ghi tiếp và bật ghi log"""
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._closed.clear()
+        self.enabled = True
+        if self.sync_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, name="wal-flusher", daemon=True)
+            self._flusher.start()
+
+    def close(self):
+        """Fsync phần còn lại và đóng WAL"""
+        self.enabled = False
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.sync_interval):
+            self.sync()
+
+    # ====================== WRITE ======================
+
+    def _log(self, record):
+        if not self.enabled:
+            return
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self.pending += 1
+            if self.sync_interval <= 0 or self.pending >= self.sync_batch:
+                self._sync_locked()
+
+    def _sync_locked(self):
+        sync_file(self._file)
+        self.pending = 0
+        self.sync_count += 1
+
+    def sync(self):
+        """Group commit: fsync tất cả bản ghi đang chờ bằng 1 lần fsync"""
+        with self._lock:
+            if self._file is not None and self.pending:
+                self._sync_locked()
+
+    def checkpoint(self):
+        """Cắt WAL về rỗng sau khi dữ liệu đã được lưu bền vững ở snapshot/journal"""
+        with self._lock:
+            if self._file is None:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+                return
+            self._file.seek(0)
+            self._file.truncate()
+            self._sync_locked()
+
+    # ====================== EVENT HOOKS ======================
+    # Kiểm tra enabled trước khi dựng bản ghi: lúc load/replay không tốn công serialize
+
+    def on_user_added(self, user):
+        if self.enabled:
+            self._log({'op': 'create_user', 'row': user_to_row(user)})
+
+    def on_event_added(self, event):
+        if self.enabled:
+            self._log({'op': 'create', 'row': event_to_row(event)})
+
+    def on_event_removed(self, event):
+        if self.enabled:
+            self._log({'op': 'delete', 'id': event.event_id})
+
+    def on_attendee_added(self, event, user_id, registered_at):
+        if self.enabled:
+            self._log({'op': 'add_attendee', 'id': event.event_id, 'user': user_id, 'at': registered_at})
+
+    def on_attendee_removed(self, event, user_id, registered_at):
+        if self.enabled:
+            self._log({'op': 'remove_attendee', 'id': event.event_id, 'user': user_id})
+
+    def on_field_updated(self, event, field, old_value, new_value):
+        if self.enabled:
+            self._log({'op': 'update_field', 'id': event.event_id, 'field': field,
+                       'value': _encode_value(new_value)})
+
+    # ====================== RECOVERY ======================
+
+    def read_records(self):
+        """Đọc bản ghi WAL, dừng ở dòng cuối bị ghi dở (crash khi đang ghi)"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    break
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    break
+
+    def replay(self, system):
+        """Áp lại các thao tác trong WAL lên dữ liệu đã load từ snapshot
+
+        Mỗi thao tác được áp theo kiểu idempotent (bỏ qua nếu đã có hiệu lực) vì
+        crash có thể xảy ra sau khi snapshot đã lưu nhưng trước khi WAL được cắt.
+        Trả về số thao tác đã đọc.
+        """
+        count = 0
+        for record in self.read_records():
+            self._apply(system, record)
+            count += 1
+        return count
+
+    def _apply(self, system, record):
+        op = record['op']
+
+        if op == 'create_user':
+            if record['row'][0] not in system.users:
+                system.add_user(user_from_row(record['row']))
+            return
+
+        if op == 'create':
+            if record['row'][0] not in system.events:
+                system.add_event(event_from_row(record['row']))
+            return
+
+        event = system.events.get(record['id'])
+        if event is None:
+            return
+
+        if op == 'delete':
+            event.prepare_for_deletion()
+            system.remove_event(event.event_id)
+        elif op == 'add_attendee':
+            # Không kiểm tra sức chứa: thao tác đã hợp lệ tại thời điểm ghi log
+            # WAL cũ không có thời điểm đăng ký ('at') -> 0 = không rõ
+            stamp = record.get('at', 0)
+            if event.attendees.add(record['user'], stamp):
+                event.bus.emit('on_attendee_added', event, record['user'], stamp)
+        elif op == 'remove_attendee':
+            event.remove_attendee(record['user'])
+        elif op == 'update_field':
+            field = record['field']
+            old_value = getattr(event, field)
+            new_value = _decode_value(field, record['value'])
+            setattr(event, field, new_value)
+            event.bus.emit('on_field_updated', event, field, old_value, new_value)